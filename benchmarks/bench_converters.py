@@ -0,0 +1,49 @@
+"""
+Micro-benchmark of the per-call cost of resolving step text and converting
+its arguments, compared with matching and converting from scratch.
+
+Usage: python benchmarks/bench_converters.py
+"""
+import os
+import re
+import sys
+import timeit
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'),
+)
+
+from romaine.registry import StepRegistry, registering_into  # noqa
+from romaine.steps import Given  # noqa
+
+CALLS = 100000
+TEXTS = ['I have entered {} into the calculator on 2015-06-{:02d}'.format(
+    number, number % 28 + 1) for number in range(50)]
+
+
+def main():
+    registry = StepRegistry()
+    with registering_into(registry):
+        Given('I have entered {number:int} into the calculator '
+              'on {day:date}')(lambda number, day: None)
+        Given('I press add')(lambda: None)
+
+    def uncompiled(text):
+        match = re.match(
+            r'I have entered ([-+]?\d+) into the calculator on '
+            r'(\d{4}-\d{2}-\d{2})\Z', text)
+        return int(match.group(1)), match.group(2).split('-')
+
+    cases = [
+        ('literal step', lambda: registry.resolve('I press add')),
+        ('typed step', lambda: [registry.resolve(text) for text in TEXTS]),
+        ('uncompiled', lambda: [uncompiled(text) for text in TEXTS]),
+    ]
+    for name, case in cases:
+        per_loop = len(TEXTS) if name != 'literal step' else 1
+        seconds = min(timeit.repeat(case, number=CALLS // per_loop, repeat=3))
+        print('{:<14} {:8.0f} ns/call'.format(name, seconds / CALLS * 1e9))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark of how long the slowest worker takes to get through scenarios of
+skewed durations, dealt out to workers feature by feature round-robin,
+with and without work stealing.
+
+Scenarios sleep rather than doing work, so the numbers show scheduling
+alone.
+
+Usage: python benchmarks/bench_scheduling.py
+"""
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(os.path.dirname(__file__)), 'src'),
+)
+
+from romaine.parallel import WorkStealingScheduler  # noqa
+
+WORKERS = 8
+FEATURES = 40
+SCENARIOS_PER_FEATURE = 10
+# Seconds a scenario of duration 1 sleeps for
+SCALE = 0.002
+
+
+def skewed_durations(seed, shape):
+    """
+        Get each feature's scenario durations from a Pareto distribution,
+        with a few features much slower than the rest.
+    """
+    generator = random.Random(seed)
+    return [
+        [generator.paretovariate(shape) * (5 if feature % 13 == 0 else 1)
+         for _ in range(SCENARIOS_PER_FEATURE)]
+        for feature in range(FEATURES)
+    ]
+
+
+def run_workers(take):
+    """
+        Run WORKERS threads, each sleeping through the durations that take
+        gives it until it gives None.
+
+        Returns:
+        List of the seconds each worker finished after the start, slowest
+        last.
+    """
+    finished = []
+    started = time.time()
+
+    def work(worker):
+        while True:
+            duration = take(worker)
+            if duration is None:
+                break
+            time.sleep(duration * SCALE)
+        finished.append(time.time() - started)
+
+    threads = [
+        threading.Thread(target=work, args=(worker,))
+        for worker in range(WORKERS)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(finished)
+
+
+def round_robin(features):
+    queues = [[] for _ in range(WORKERS)]
+    for index, durations in enumerate(features):
+        queues[index % WORKERS].extend(durations)
+    queues = [iter(queue) for queue in queues]
+    return run_workers(lambda worker: next(queues[worker], None))
+
+
+def work_stealing(features):
+    scheduler = WorkStealingScheduler(WORKERS)
+    for index, durations in enumerate(features):
+        for duration in durations:
+            scheduler.push(index % WORKERS, index, duration)
+    return run_workers(scheduler.take), scheduler.steals
+
+
+def main():
+    print('{:<6} {:<14} {:>9} {:>9} {:>7}'.format(
+        'shape', 'scheduler', 'median s', 'slowest s', 'steals'))
+    for shape in (3.0, 1.5, 1.1):
+        features = skewed_durations(42, shape)
+        finished = round_robin(features)
+        print('{:<6} {:<14} {:9.3f} {:9.3f} {:>7}'.format(
+            shape, 'round-robin', finished[WORKERS // 2], finished[-1], '-'))
+        finished, steals = work_stealing(features)
+        print('{:<6} {:<14} {:9.3f} {:9.3f} {:>7}'.format(
+            shape, 'work stealing', finished[WORKERS // 2], finished[-1],
+            steals))
+
+
+if __name__ == '__main__':
+    main()
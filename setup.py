@@ -5,6 +5,13 @@ setup(
     version="0.1.0",
     package_dir={'': 'src'},
     packages=find_packages('src'),
+    install_requires=[
+        'futures; python_version < "3.2"',
+        'scandir; python_version < "3.5"',
+    ],
+    entry_points={
+        'console_scripts': ['romaine = romaine.cli:main'],
+    },
 
     test_suite="tests",
 )
@@ -0,0 +1,5 @@
+import sys
+
+from romaine.cli import main
+
+sys.exit(main())
@@ -0,0 +1,265 @@
+import asyncio
+import sys
+
+from romaine import exc
+from romaine.logs import BufferingRomaineLogger
+from romaine.parallel import merge_feature
+from romaine.runner import (
+    DEFAULT_GRACE,
+    POLL_INTERVAL,
+    Cancellation,
+    batch_outcomes,
+    cancelled_stats,
+    run_coroutine,
+    running_scenario,
+)
+from romaine.timings import longest_first
+
+
+class _AsyncContext(object):
+    """
+        Lets a logger's context manager be used with async with.
+    """
+
+    def __init__(self, context):
+        self._context = context
+
+    async def __aenter__(self):
+        return self._context.__enter__()
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return self._context.__exit__(exc_type, exc_val, exc_tb)
+
+
+def in_scenario(logger, scenario):
+    """
+        Async version of a logger's in_scenario context.
+    """
+    return _AsyncContext(logger.in_scenario(scenario))
+
+
+def in_step(logger, step, verbose=True):
+    """
+        Async version of a logger's in_step context. A step's duration
+        includes the time it spends awaiting.
+    """
+    return _AsyncContext(logger.in_step(step, verbose))
+
+
+class AsyncRunner(object):
+    """
+        Runs scenarios concurrently as tasks on one event loop.
+
+        Steps defined with async def are awaited, so scenarios waiting on
+        I/O overlap. Other steps block the loop while they run.
+
+        Each scenario reports to its own buffering logger and gets its own
+        romaine.runner.scenario_context. Scenarios estimated to take
+        longest start first. Results are merged feature by feature in
+        serial order, as with romaine.parallel's runners.
+
+        Once the run is cancelled, scenarios not yet started are reported
+        as cancelled, and those running stop before their next step. Tasks
+        still running after the grace period are cancelled.
+    """
+
+    def __init__(self, core, logger, verbose=True, concurrency=100,
+                 fail_fast=False, grace=DEFAULT_GRACE):
+        """
+            Initialise an asyncio runner.
+
+            Keyword arguments:
+            core -- The romaine Core with the steps to run.
+            logger -- An entered AbstractRomaineLogger to report to.
+            verbose -- Whether passing steps are logged at INFO rather than
+                       DEBUG level.
+            concurrency -- The most scenarios to run at once.
+            fail_fast -- Whether to cancel the run after the first
+                         scenario, or outline example row, that fails.
+            grace -- Seconds to wait for scenarios running when the run is
+                     cancelled.
+        """
+        self.core = core
+        self.logger = logger
+        self.verbose = verbose
+        self.level = logger.enabled_level()
+        self.concurrency = concurrency
+        self.fail_fast = fail_fast
+        self.grace = grace
+        self.cancellation = Cancellation()
+        self._deadline = None
+
+    def run_features(self, features):
+        """
+            Run features prepared by romaine.runner.prepare_feature in a new
+            event loop.
+
+            Keyword arguments:
+            features -- Iterable of prepared features.
+        """
+        run_coroutine(self.run_features_async(features))
+
+    async def run_features_async(self, features):
+        """
+            Run features prepared by romaine.runner.prepare_feature on the
+            running event loop.
+        """
+        semaphore = asyncio.Semaphore(self.concurrency)
+        features = list(features)
+        # Tasks get past the semaphore in the order they were created
+        tasks = {}
+        for element in longest_first(
+            [element for feature in features
+             for element in feature['elements']],
+            lambda element: [element],
+        ):
+            tasks[id(element)] = asyncio.ensure_future(
+                self._run_buffered(semaphore, element))
+        for feature in features:
+            results = []
+            for element in feature['elements']:
+                results.append(await self._result(tasks[id(element)]))
+            merge_feature(self.logger, feature, results)
+        if self._deadline is not None:
+            await asyncio.gather(*tasks.values(), return_exceptions=True)
+
+    async def _result(self, task):
+        """
+            Wait for a scenario's task, unless the run is cancelled and the
+            task doesn't finish within the grace period.
+
+            Returns:
+            The (stats, records) tuple, or None if the task was cancelled.
+        """
+        loop = asyncio.get_event_loop()
+        while not self.cancellation.cancelled:
+            done, running = await asyncio.wait(
+                [task], timeout=POLL_INTERVAL)
+            if done:
+                return task.result()
+        if self._deadline is None:
+            self._deadline = loop.time() + self.grace
+        try:
+            return await asyncio.wait_for(
+                asyncio.shield(task), max(0, self._deadline - loop.time()))
+        except asyncio.TimeoutError:
+            task.cancel()
+            return None
+
+    async def _run_buffered(self, semaphore, element):
+        async with semaphore:
+            logger = BufferingRomaineLogger(self.level)
+            await self.run_element(logger, element)
+            return element['stats'], logger.records
+
+    async def run_element(self, logger, element):
+        """
+            Run a prepared scenario or scenario outline.
+        """
+        if self.cancellation.cancelled:
+            element['stats'] = cancelled_stats()
+        elif element['type'] == 'scenario outline':
+            await self.run_scenario_outline(logger, element)
+        else:
+            await self.run_scenario(logger, element)
+
+    async def run_scenario(self, logger, scenario):
+        """
+            Run a prepared scenario, logging anything it raises.
+        """
+        finished = True
+        try:
+            async with in_scenario(logger, scenario):
+                with running_scenario():
+                    finished = await self.run_steps(
+                        logger, scenario['steps'])
+        except Exception:
+            logger.handle_exception(*sys.exc_info())
+        if not finished:
+            scenario['stats']['cancelled'] = True
+        self._check(scenario['steps'])
+
+    async def run_scenario_outline(self, logger, outline):
+        """
+            Run every example row of a prepared scenario outline, one after
+            another.
+        """
+        finished = True
+        with logger.in_scenario_outline(outline):
+            for example in outline['examples']:
+                with logger.in_scenario_outline_example(example):
+                    for index in range(len(example['hashes'])):
+                        finished = await self.run_example_row(
+                            logger, example, index)
+                        if not finished:
+                            break
+                if not finished:
+                    break
+        # A row that failed, failing fast, cancels the rest, but the
+        # outline is reported as failed rather than cancelled
+        if not finished and not outline['stats']['failed']:
+            outline['stats']['cancelled'] = True
+
+    async def run_example_row(self, logger, example, index):
+        """
+            Run one row of a prepared example, logging anything it raises.
+
+            Returns:
+            False if the run was cancelled before the row finished,
+            otherwise True.
+        """
+        if self.cancellation.cancelled:
+            return False
+        finished = True
+        steps = ()
+        try:
+            with logger.in_scenario_outline_example_row(
+                example, index
+            ) as steps, running_scenario():
+                finished = await self.run_steps(logger, steps)
+        except Exception:
+            logger.handle_exception(*sys.exc_info())
+        self._check(steps)
+        return finished
+
+    def _check(self, steps):
+        """
+            Cancel the run if it fails fast and one of the steps just run
+            failed.
+        """
+        if self.fail_fast and any(
+            step.get('stats', {}).get('failed') for step in steps
+        ):
+            self.cancellation.cancel()
+
+    async def run_steps(self, logger, steps):
+        """
+            Run steps in order, awaiting those defined with async def.
+            Steps defined with batch=True are called with one row at a time.
+
+            Returns:
+            False if the run was cancelled before every step had run,
+            otherwise True.
+        """
+        resolve = self.core.steps.resolve
+        verbose = self.verbose
+        cancellation = self.cancellation
+        for step in steps:
+            if cancellation.cancelled:
+                return False
+            resolved = resolve(step['text'])
+            async with in_step(logger, step, verbose):
+                if resolved is None:
+                    raise exc.UnimplementedStepError(step)
+                definition, arguments = resolved
+                if definition.batch:
+                    result = definition.func([arguments])
+                else:
+                    result = definition.func(*arguments)
+                if definition.is_async:
+                    result = await result
+                if definition.batch:
+                    outcome = batch_outcomes(result, 1)[0]
+                    if outcome is not None:
+                        raise outcome
+        return True
@@ -0,0 +1,57 @@
+import json
+import os
+import tempfile
+
+# Where romaine keeps state between runs, relative to the working directory
+CACHE_DIR = '.romaine_cache'
+
+# os.rename can't replace files on Windows, os.replace is Python 3.3+
+_replace = getattr(os, 'replace', os.rename)
+
+
+def cache_path(name, cache_dir=None):
+    """
+        Get the path of a file in the cache directory.
+
+        Keyword arguments:
+        name -- The file name.
+        cache_dir -- The cache directory, defaulting to CACHE_DIR.
+    """
+    return os.path.join(cache_dir or CACHE_DIR, name)
+
+
+def load_json(path, default=None):
+    """
+        Load JSON from a cache file.
+
+        Keyword arguments:
+        path -- The file to load.
+        default -- What to return if the file is missing or unreadable.
+    """
+    try:
+        with open(path) as cache_file:
+            return json.load(cache_file)
+    except (IOError, OSError, ValueError):
+        return default
+
+
+def save_json(path, data):
+    """
+        Save JSON to a cache file, replacing it atomically so that readers
+        never see a partly written file.
+
+        Keyword arguments:
+        path -- The file to save to. Missing directories are created.
+        data -- The data to save.
+    """
+    directory = os.path.dirname(path) or '.'
+    if not os.path.isdir(directory):
+        os.makedirs(directory)
+    handle, temporary_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'w') as cache_file:
+            json.dump(data, cache_file, sort_keys=True)
+        _replace(temporary_path, path)
+    except Exception:
+        os.remove(temporary_path)
+        raise
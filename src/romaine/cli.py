@@ -0,0 +1,214 @@
+import argparse
+import functools
+import logging
+import os
+import subprocess
+import sys
+
+from romaine.core import Core
+from romaine.failures import FailureCache
+from romaine.impact import ImpactMap, changed_since
+from romaine.logs import RomaineLogger
+from romaine.results import ResultCache
+from romaine.parallel import (
+    ProcessPoolRunner,
+    ThreadPoolRunner,
+    WorkStealingRunner,
+)
+from romaine.sharding import Shard
+from romaine.timings import TimingHistory
+from romaine.watch import watch
+
+
+def _parser():
+    parser = argparse.ArgumentParser(
+        prog='romaine',
+        description='Run Gherkin features with romaine.',
+    )
+    parser.add_argument(
+        'paths', nargs='+', metavar='PATH',
+        help='Feature files, or directories to find them in.')
+    parser.add_argument(
+        '-s', '--steps', action='append', default=[], metavar='MODULE',
+        help='A step module to load, by dotted name. Repeat for more.')
+    parser.add_argument(
+        '--shard', metavar='INDEX/TOTAL',
+        help='Only run one of TOTAL slices of the scenarios, numbered '
+             'from 1.')
+    parser.add_argument(
+        '--balance', action='store_true',
+        help='Balance shards by recorded durations rather than by hash.')
+    parser.add_argument(
+        '--timings', action='store_true',
+        help='Record scenario durations, and start the slowest first.')
+    parser.add_argument(
+        '--cache-results', action='store_true',
+        help='Skip scenarios that passed before, unless their text, step '
+             'definitions or inputs have changed.')
+    parser.add_argument(
+        '--input', action='append', default=[], metavar='FILE',
+        dest='inputs',
+        help='A file every scenario depends on, for --cache-results. '
+             'Repeat for more.')
+    parser.add_argument(
+        '--record-impact', action='store_true',
+        help='Record the source files each scenario runs, to select '
+             'scenarios by with --changed or --changed-since.')
+    changes = parser.add_mutually_exclusive_group()
+    changes.add_argument(
+        '--changed', action='append', metavar='FILE',
+        help='Only run the scenarios a changed file may affect. Repeat '
+             'for more.')
+    changes.add_argument(
+        '--changed-since', metavar='REF',
+        help='Only run the scenarios that files changed since a git '
+             'commit may affect.')
+    failed = parser.add_mutually_exclusive_group()
+    failed.add_argument(
+        '--last-failed', action='store_true',
+        help='Only run the scenarios that failed last time, or all of '
+             'them if none did.')
+    failed.add_argument(
+        '--failed-first', action='store_true',
+        help='Run the scenarios that failed last time before the others.')
+    parser.add_argument(
+        '-x', '--fail-fast', action='store_true',
+        help='Stop after the first failing scenario.')
+    parser.add_argument(
+        '-w', '--watch', action='store_true',
+        help='Run the scenarios, then keep re-running those affected by '
+             'each change to a feature or step module until interrupted.')
+    parallel = parser.add_mutually_exclusive_group()
+    parallel.add_argument(
+        '--processes', type=int, metavar='N',
+        help='Run scenarios in N worker processes.')
+    parallel.add_argument(
+        '--threads', type=int, metavar='N',
+        help='Run scenarios in N threads.')
+    parallel.add_argument(
+        '--work-stealing', type=int, metavar='N',
+        help='Run features on N threads that steal work from each other.')
+    verbosity = parser.add_mutually_exclusive_group()
+    verbosity.add_argument(
+        '-v', '--verbose', action='store_true',
+        help='Log durations and other debugging detail.')
+    verbosity.add_argument(
+        '-q', '--quiet', action='store_true',
+        help='Only log skipped and failing steps, and errors.')
+    return parser
+
+
+def _runner(args):
+    if args.processes:
+        return functools.partial(ProcessPoolRunner, processes=args.processes)
+    if args.threads:
+        return functools.partial(ThreadPoolRunner, threads=args.threads)
+    if args.work_stealing:
+        return functools.partial(WorkStealingRunner,
+                                 workers=args.work_stealing)
+    return None
+
+
+def main(argv=None):
+    """
+        Run features as the romaine command.
+
+        Keyword arguments:
+        argv -- The command line arguments, defaulting to sys.argv's.
+
+        Returns:
+        The exit status: 0 if no step failed, otherwise 1.
+    """
+    parser = _parser()
+    args = parser.parse_args(argv)
+    if args.watch:
+        watch_options = [
+            option
+            for option, value in (
+                ('--shard', args.shard),
+                ('--timings', args.timings),
+                ('--cache-results', args.cache_results),
+                ('--record-impact', args.record_impact),
+                ('--changed', args.changed),
+                ('--changed-since', args.changed_since),
+                ('--last-failed', args.last_failed),
+                ('--failed-first', args.failed_first),
+                ('--fail-fast', args.fail_fast),
+                ('--processes', args.processes),
+                ('--threads', args.threads),
+                ('--work-stealing', args.work_stealing),
+            )
+            if value
+        ]
+        if watch_options:
+            parser.error('{} can\'t be combined with --watch.'.format(
+                ', '.join(watch_options)))
+
+    timings = None
+    if args.timings or args.balance:
+        timings = TimingHistory()
+    shard = None
+    if args.shard:
+        try:
+            shard = Shard.parse(args.shard, timings if args.balance else None)
+        except ValueError as error:
+            parser.error(str(error))
+    elif args.balance:
+        parser.error('--balance only applies with --shard.')
+    changed = args.changed
+    if args.changed_since:
+        try:
+            changed = changed_since(args.changed_since)
+        except (OSError, subprocess.CalledProcessError) as error:
+            parser.error('Could not list changed files: {}'.format(error))
+    runner = _runner(args)
+    if args.record_impact and runner is not None:
+        parser.error('--record-impact only applies without --processes, '
+                     '--threads or --work-stealing.')
+    impact = None
+    if args.record_impact or changed is not None:
+        impact = ImpactMap()
+    results = None
+    if args.cache_results:
+        results = ResultCache(inputs=args.inputs)
+    elif args.inputs:
+        parser.error('--input only applies with --cache-results.')
+
+    # Step modules are found relative to where romaine is run from
+    if os.getcwd() not in sys.path:
+        sys.path.insert(0, os.getcwd())
+
+    logger = RomaineLogger()
+    if args.verbose:
+        level = logging.DEBUG
+    elif args.quiet:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+    logger.log_to(sys.stdout, level)
+
+    failures = FailureCache()
+    scenarios = None
+    if args.last_failed and failures.failed:
+        scenarios = set(failures.failed)
+
+    core = Core()
+    if args.watch:
+        watch(core, args.paths, step_modules=args.steps, logger=logger)
+        return 0
+    core.load_steps(args.steps)
+    statistics = core.run(
+        args.paths,
+        logger,
+        scenarios=scenarios,
+        runner=runner,
+        timings=timings if args.timings else None,
+        shard=shard,
+        failures=failures,
+        failed_first=args.failed_first,
+        fail_fast=args.fail_fast,
+        results=results,
+        impact=impact,
+        changed=changed,
+    )
+    return 1 if statistics['steps']['failed'] else 0
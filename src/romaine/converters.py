@@ -0,0 +1,152 @@
+import datetime
+import decimal
+import re
+
+from romaine import exc
+
+
+# Placeholders in step names look like {name} or {name:type}; doubled
+# braces are literal braces.
+PLACEHOLDER = re.compile(r'{{|}}|{(\w*)(?::(\w+))?}')
+
+# Conversions of this many distinct literals are remembered per converter
+MEMO_SIZE = 4096
+
+
+def _memoize(func, size=MEMO_SIZE):
+    """
+        Wrap a converter so each distinct literal is only converted once.
+        Converters are expected to return immutable values.
+
+        Keyword arguments:
+        func -- The converter to wrap.
+        size -- How many literals to remember before starting afresh.
+
+        Returns:
+        The memoized converter.
+    """
+    cache = {}
+
+    def convert(literal):
+        try:
+            return cache[literal]
+        except KeyError:
+            pass
+        value = func(literal)
+        if len(cache) >= size:
+            cache.clear()
+        cache[literal] = value
+        return value
+
+    convert.__wrapped__ = func
+    return convert
+
+
+def _to_date(literal):
+    return datetime.datetime.strptime(literal, '%Y-%m-%d').date()
+
+
+class ConverterRegistry(object):
+    """
+        Named converters for typed placeholders in step names.
+    """
+
+    def __init__(self):
+        """
+            Initialise a converter registry with the built in types:
+            str, word, int, float, decimal and date (YYYY-MM-DD).
+        """
+        self._converters = {}
+        self.register('str', str, r'.+?', memoize=False)
+        self.register('word', str, r'\S+', memoize=False)
+        self.register('int', int, r'[-+]?\d+')
+        self.register('float', float,
+                      r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+        self.register('decimal', decimal.Decimal, r'[-+]?(?:\d+\.?\d*|\.\d+)')
+        self.register('date', _to_date, r'\d{4}-\d{2}-\d{2}')
+
+    def register(self, name, func, regex=r'.+?', memoize=True):
+        """
+            Add or replace a converter.
+
+            Keyword arguments:
+            name -- The type name used in placeholders, e.g. {count:name}.
+            func -- Callable taking the captured text, returning the value.
+            regex -- Regular expression matching the text to capture. It
+                     must not contain capturing groups.
+            memoize -- Whether to remember conversions of each literal.
+        """
+        if memoize:
+            func = _memoize(func)
+        self._converters[name] = (func, regex)
+
+    def register_choices(self, name, choices):
+        """
+            Add a converter accepting only the keys of a mapping, converting
+            each to its value. An Enum's __members__ can be used directly.
+
+            Keyword arguments:
+            name -- The type name used in placeholders.
+            choices -- Mapping of literal text to converted value.
+        """
+        choices = dict(choices)
+        # Longest first, so that no choice is shadowed by its own prefix
+        literals = sorted(choices, key=len, reverse=True)
+        self.register(
+            name,
+            choices.__getitem__,
+            '|'.join(re.escape(literal) for literal in literals),
+            memoize=False,
+        )
+
+    def get(self, name):
+        """
+            Get a converter and the regular expression for its input.
+
+            Keyword arguments:
+            name -- The type name of the converter.
+
+            Returns:
+            Tuple of (converter, regex).
+        """
+        try:
+            return self._converters[name]
+        except KeyError:
+            raise exc.UnknownConverterError(name)
+
+    def compile(self, step_name):
+        """
+            Compile a step name into a pattern and the converters for each
+            of its placeholders.
+
+            Keyword arguments:
+            step_name -- The step name, possibly containing placeholders.
+
+            Returns:
+            Tuple of (pattern, converters). pattern is None when the name
+            has no placeholders, meaning it must match step text exactly.
+        """
+        fragments = []
+        converters = []
+        position = 0
+        placeholders = list(PLACEHOLDER.finditer(step_name))
+        if not placeholders:
+            return None, ()
+
+        for placeholder in placeholders:
+            literal = step_name[position:placeholder.start()]
+            fragments.append(re.escape(literal))
+            position = placeholder.end()
+            if placeholder.group(0) in ('{{', '}}'):
+                fragments.append(re.escape(placeholder.group(0)[0]))
+                continue
+            converter, regex = self.get(placeholder.group(2) or 'str')
+            converters.append(converter)
+            fragments.append('({})'.format(regex))
+
+        fragments.append(re.escape(step_name[position:]))
+        return re.compile(''.join(fragments) + r'\Z'), tuple(converters)
+
+
+# Converters used by step registries unless they are given their own
+default_converters = ConverterRegistry()
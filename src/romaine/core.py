@@ -1,50 +1,338 @@
-import os
+import functools
+import importlib
+import io
+import sys
+
+from romaine.discovery import iter_features
+from romaine.failures import order_failed_first
+from romaine.features import FeatureIndex
+from romaine.impact import RecordingRunner, relative_path
+from romaine.logs import RomaineLogger
 from romaine.parser import Parser
+from romaine.registry import StepRegistry, registering_into
+from romaine.runner import Runner, prepare_feature
+
+try:
+    from importlib import invalidate_caches, reload
+except ImportError:
+    from imp import reload
+
+    def invalidate_caches():
+        pass
+
+
+def _number_lines(feature, lines):
+    """
+        Add line numbers to the parts of a parsed feature, found by looking
+        for the first raw line of each in document order.
+    """
+    parts = []
+    background = feature['background']
+    if background is not None:
+        parts.append(background)
+        parts.extend(background['steps'])
+    for element in feature['elements']:
+        parts.append(element)
+        parts.extend(element['steps'])
+        parts.extend(element.get('examples', ()))
+
+    position = 0
+    for part in parts:
+        position = lines.index(part['raw'][0], position)
+        part['line'] = position + 1
+        position += 1
+
+
+def _select_shard(features, shard):
+    """
+        Filter prepared features down to the scenarios in a shard, dropping
+        features left without any.
+    """
+    selected = shard.select(
+        element['id']
+        for feature in features
+        for element in feature['elements']
+    )
+    for feature in features:
+        feature['elements'] = [
+            element
+            for element in feature['elements']
+            if element['id'] in selected
+        ]
+        if feature['elements']:
+            yield feature
+
+
+def _skip_passed(features, results, steps, logger):
+    """
+        Drop the elements of prepared features that a result cache has
+        passing results for, counting them as cached, and add the
+        'result_key' of the others.
+    """
+    for feature in features:
+        elements = []
+        cached = []
+        for element in feature['elements']:
+            key = results.key(element, steps)
+            if results.has_passed(element, key):
+                cached.append(element)
+            else:
+                element['result_key'] = key
+                elements.append(element)
+        if cached:
+            logger.cached(cached)
+        feature['elements'] = elements
+        if elements:
+            yield feature
+
+
+def _select_affected(features, impact, changed):
+    """
+        Filter prepared features down to the scenarios an impact map says
+        changed files may affect, dropping features left without any.
+    """
+    changed = set(relative_path(path) for path in changed)
+    for feature in features:
+        feature['elements'] = [
+            element
+            for element in feature['elements']
+            if impact.is_affected(element['id'], feature['path'], changed)
+        ]
+        if feature['elements']:
+            yield feature
 
 
 class Core(object):
     """
         The core of the Romaine, provides BDD test API.
     """
-    # All located features
-    feature_file_paths = set()
+    # The core that receives steps registered outside of any
+    # Core.registering block, i.e. the most recently created one
     instance = None
 
     def __init__(self):
         """
             Initialise Romaine core.
         """
-        self.steps = {}
+        self.steps = StepRegistry()
+        # Names of the step modules loaded, so other processes can load them
+        self.step_modules = []
+        # All located features
+        self.features = FeatureIndex()
         self.Parser = Parser
+        self._parser = None
         Core.instance = self
 
-    def locate_features(self, path):
+    def registering(self):
+        """
+            Context manager directing step registrations made on the current
+            thread to this core's registry, regardless of which core was
+            created last.
+        """
+        return registering_into(self.steps)
+
+    def load_steps(self, module_names):
+        """
+            Import step modules, registering their steps with this core.
+            A module already imported, e.g. by another core, is run again,
+            so that its steps are registered with this core too.
+
+            Keyword arguments:
+            module_names -- Iterable of dotted names of modules to import.
+
+            Returns:
+            List of the imported modules.
+        """
+        modules = []
+        with self.registering():
+            for module_name in module_names:
+                module = sys.modules.get(module_name)
+                if module is None:
+                    module = importlib.import_module(module_name)
+                elif module_name not in self.step_modules:
+                    module = reload(module)
+                modules.append(module)
+                self._loaded(module_name)
+        return modules
+
+    def _loaded(self, module_name):
+        if module_name not in self.step_modules:
+            self.step_modules.append(module_name)
+
+    def reload_steps(self, module_names):
+        """
+            Import step modules again after they have changed, replacing
+            their steps in this core's registry without disturbing steps
+            from other modules.
+
+            Each module is executed into a scratch registry first, so if
+            it fails to import, the steps it had before are kept.
+
+            Keyword arguments:
+            module_names -- Iterable of dotted names of modules to reload.
+                            Modules not imported yet are loaded.
+
+            Returns:
+            List of the reloaded modules.
+        """
+        invalidate_caches()
+        modules = []
+        for module_name in module_names:
+            scratch = StepRegistry(self.steps.converters)
+            with registering_into(scratch):
+                module = sys.modules.get(module_name)
+                if module is None:
+                    module = importlib.import_module(module_name)
+                else:
+                    module = reload(module)
+            self.steps.replace_module(module_name, scratch.values())
+            self._loaded(module_name)
+            modules.append(module)
+        return modules
+
+    def parse_feature(self, path):
+        """
+            Read and parse a feature file.
+
+            Keyword arguments:
+            path -- The path of the feature file.
+
+            Returns:
+            The feature dict, as the 'feature' retrieved by the feature
+            parser's get_feature. The background, each element, example
+            and step also get a 'line' key with its 1-based line number.
+        """
+        if self._parser is None:
+            self._parser = self.Parser()
+        with io.open(path, encoding='utf-8') as feature_file:
+            lines = feature_file.read().splitlines()
+        feature = self._parser.feature.get_feature(lines)['feature']
+        _number_lines(feature, lines)
+        return feature
+
+    def locate_features(self, path, **options):
         """
             Locate any features given a path.
 
             Keyword arguments:
             path -- The path to search for features, recursively.
+            options -- Options for romaine.discovery.FeatureFinder, e.g.
+                       extensions, patterns, ignores or sort.
 
             Returns:
             List of features located in the path given.
         """
-        walked_paths = os.walk(path)
-
-        # Features in this path are stored in an intermediate list before
-        # being added to the class variable so that we can return only the
-        # ones we find on this invocation of locate_features
-        feature_candidates = []
-
-        for walked_path in walked_paths:
-            base_directory, sub_directories, feature_files = walked_path
-            for feature_file in feature_files:
-                feature_candidates.append(
-                    os.path.join(
-                        base_directory,
-                        feature_file
-                    )
-                )
+        feature_candidates = list(iter_features(path, **options))
 
-        self.feature_file_paths.update(feature_candidates)
+        self.features.update(feature_candidates)
 
         return feature_candidates
+
+    def run(self, paths, logger=None, scenarios=None, verbose=True,
+            runner=None, timings=None, shard=None, failures=None,
+            failed_first=False, fail_fast=False, results=None, impact=None,
+            changed=None, **options):
+        """
+            Locate, parse and run features with this core's steps.
+
+            Keyword arguments:
+            paths -- Iterable of feature files and directories to search for
+                     them.
+            logger -- The AbstractRomaineLogger to report to, which must not
+                      have been entered yet. Defaults to a RomaineLogger.
+            scenarios -- Collection of the scenario IDs to run, see
+                         romaine.features.scenario_ids, or None to run all.
+            verbose -- Whether passing steps are logged at INFO rather than
+                       DEBUG level.
+            runner -- Callable taking the core, logger and verbose flag,
+                      and when failing fast a fail_fast keyword, and
+                      returning the runner to use, e.g. a functools.partial
+                      of romaine.parallel.ProcessPoolRunner. Defaults to
+                      romaine.runner.Runner.
+            timings -- A romaine.timings.TimingHistory to estimate durations
+                       from, for runners that schedule longest first, and
+                       to record this run's durations into and save.
+            shard -- A romaine.sharding.Shard to run only the scenarios of,
+                     or None to run them all.
+            failures -- A romaine.failures.FailureCache to record this
+                        run's failed scenarios into and save.
+            failed_first -- Whether to run the scenarios that failed last
+                            time, according to failures, first.
+            fail_fast -- Whether to stop the run after the first failure.
+            results -- A romaine.results.ResultCache to skip the scenarios
+                       that passed before and haven't changed, and to
+                       record this run's results into and save.
+            impact -- A romaine.impact.ImpactMap to record the code each
+                      scenario runs into and save, when no runner is given,
+                      and to select scenarios by when given changed.
+            changed -- Iterable of changed file paths, to run only the
+                       scenarios they may affect according to impact, or
+                       None to run them all.
+            options -- Options for romaine.discovery.FeatureFinder.
+
+            Returns:
+            The logger's statistics for the run.
+
+            Raises:
+            ValueError -- If failed_first is set without failures, or
+                          changed is given without impact.
+        """
+        if failed_first and failures is None:
+            raise ValueError('failed_first needs failures to order by.')
+        if changed is not None and impact is None:
+            raise ValueError('changed needs impact to select scenarios by.')
+        if logger is None:
+            logger = RomaineLogger()
+        if runner is None:
+            runner = Runner
+            if impact is not None:
+                runner = functools.partial(RecordingRunner, impact=impact)
+        features = self._prepare_features(paths, scenarios, timings, options)
+        if changed is not None:
+            features = _select_affected(features, impact, changed)
+        if shard is not None:
+            features = _select_shard(list(features), shard)
+        if failed_first:
+            features = order_failed_first(features, failures.failed)
+        if results is not None:
+            features = _skip_passed(features, results, self.steps, logger)
+        runner_options = {}
+        if fail_fast:
+            runner_options['fail_fast'] = True
+        with logger:
+            runner(self, logger, verbose, **runner_options).run_features(
+                features)
+        if timings is not None:
+            timings.record(logger.statistics['features']['run'])
+            timings.save()
+        if failures is not None:
+            failures.record(logger.statistics['features']['run'])
+            failures.save()
+        if results is not None:
+            results.record(logger.statistics['features']['run'])
+            results.save()
+        if impact is not None:
+            impact.save()
+        return logger.statistics
+
+    def _prepare_features(self, paths, scenarios, timings, options):
+        for path in paths:
+            for feature_path in self.locate_features(path, **options):
+                feature = prepare_feature(
+                    feature_path,
+                    self.parse_feature(feature_path),
+                    scenarios,
+                )
+                if timings is not None:
+                    for element in feature['elements']:
+                        element['estimate'] = timings.estimate(element['id'])
+                if scenarios is None or feature['elements']:
+                    yield feature
+
+    @property
+    def feature_file_paths(self):
+        """
+            Paths of all features located by this core, in the order they
+            were first located.
+        """
+        return self.features.paths()
@@ -0,0 +1,584 @@
+import fnmatch
+import hashlib
+import io
+import os
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+
+from romaine import cache
+
+try:
+    from os import scandir
+except ImportError:
+    from scandir import scandir
+
+# Only files with these extensions are features, unless told otherwise
+DEFAULT_EXTENSIONS = ('.feature',)
+
+# Directories that never contain features worth running
+DEFAULT_IGNORES = (
+    '.git', '.hg', '.svn', '.bzr', 'CVS', '_darcs',
+    'node_modules', '__pycache__', '.tox', '.nox', '.venv', 'venv',
+)
+
+# Name of files listing further patterns to ignore, one per line, in the
+# directory containing the file and every directory below it
+IGNORE_FILE = '.romaineignore'
+
+# Directories modified this recently may still be changing within their
+# mtime's resolution, so their listings are not trusted next time
+MTIME_GRACE_SECONDS = 2
+
+
+def _read_ignore_file(path):
+    """
+        Read the patterns from an ignore file, skipping blank lines and
+        comments.
+    """
+    try:
+        with io.open(path, encoding='utf-8') as ignore_file:
+            lines = ignore_file.read().splitlines()
+    except (IOError, OSError):
+        return ()
+    return tuple(
+        line.strip().rstrip('/')
+        for line in lines
+        if line.strip() and not line.strip().startswith('#')
+    )
+
+
+def _digest_ignores(ignores):
+    """
+        Get a short digest of ignore patterns, to tell whether those a
+        directory inherits have changed.
+    """
+    return hashlib.sha1(
+        '\0'.join(ignores).encode('utf-8')).hexdigest()
+
+
+def _ignored(name, relative_path, ignores):
+    for pattern in ignores:
+        if (
+            fnmatch.fnmatch(name, pattern) or
+            fnmatch.fnmatch(relative_path, pattern)
+        ):
+            return True
+    return False
+
+
+class _Directory(object):
+    """
+        A directory queued for scanning, with the ignore patterns that
+        apply inside it.
+    """
+    __slots__ = ('path', 'relative_path', 'ignores')
+
+    def __init__(self, path, relative_path, ignores):
+        self.path = path
+        self.relative_path = relative_path
+        self.ignores = ignores
+
+
+class _Claims(object):
+    """
+        The (device, inode) of every directory a worker has started to
+        list, shared between the workers of one walk.
+    """
+
+    def __init__(self):
+        self._identities = set()
+        self._lock = threading.Lock()
+
+    def claim(self, identity):
+        """
+            Claim a directory for listing.
+
+            Returns:
+            Whether no worker had claimed it before.
+        """
+        with self._lock:
+            if identity in self._identities:
+                return False
+            self._identities.add(identity)
+            return True
+
+
+class DiscoveryManifest(object):
+    """
+        Persisted record of each directory's mtime and listing, letting
+        later walks skip listing directories that have not changed.
+
+        A directory's mtime changes whenever entries are added, removed or
+        renamed in it, but not when files in it are edited, so an
+        unchanged mtime means an unchanged listing. Listings are filtered
+        by the ignore patterns inherited from the directories above, and
+        by patterns matched against paths relative to the root walked, so
+        a listing is also only reused while those and the directory's
+        relative path are the same.
+
+        A manifest may be used for one walk after another, e.g. by a
+        watcher, each reusing the listings recorded by the last.
+    """
+
+    def __init__(self, path=None, persist=True):
+        """
+            Load a discovery manifest.
+
+            Keyword arguments:
+            path -- The manifest file. Defaults to discovery.json in the
+                    romaine cache directory.
+            persist -- Whether to load and save the manifest file. If not,
+                       listings are only kept in memory, for later walks
+                       with the same manifest.
+        """
+        self.path = path or cache.cache_path('discovery.json')
+        self.persist = persist
+        self._lock = threading.Lock()
+        self._options = None
+        self._previous = {}
+        self._directories = {}
+        self._roots = set()
+        self.stats = {'scanned': 0, 'skipped': 0}
+        self._saved_scans = None
+        self._loaded = cache.load_json(self.path, {}) if persist else {}
+
+    def start(self, root, options):
+        """
+            Prepare for a walk from a root directory with a finder's
+            options. Listings recorded with other options are discarded.
+        """
+        if self._options is None:
+            self._options = options
+            if self._loaded.get('options') == options:
+                self._previous = self._loaded.get('directories', {})
+        elif self._options != options:
+            raise ValueError(
+                'A discovery manifest can only be used with one set of '
+                'finder options.'
+            )
+        self._roots.add(os.path.abspath(root))
+
+    def lookup(self, path, mtime, ignore_mtime, inherited=None,
+               relative_path=''):
+        """
+            Get the recorded listing of a directory if it has not changed.
+
+            Keyword arguments:
+            path -- The absolute directory path.
+            mtime -- The directory's current mtime.
+            ignore_mtime -- The current mtime of its ignore file, or None.
+            inherited -- Digest of the ignore patterns it inherits.
+            relative_path -- Its path relative to the root walked.
+
+            Returns:
+            The record, a dict of features, subdirectories and ignores, or
+            None if the directory must be listed again.
+        """
+        record = self._previous.get(path)
+        if (
+            record is None or
+            record['mtime'] != mtime or
+            record['ignore_mtime'] != ignore_mtime or
+            record.get('inherited') != inherited or
+            record.get('relative_path') != relative_path
+        ):
+            with self._lock:
+                self.stats['scanned'] += 1
+            return None
+
+        with self._lock:
+            self.stats['skipped'] += 1
+            self._directories[path] = record
+        return record
+
+    def record(self, path, mtime, ignore_mtime, features, subdirectories,
+               ignores, inherited=None, relative_path=''):
+        """
+            Record the listing of a directory.
+
+            Keyword arguments:
+            path -- The absolute directory path.
+            mtime -- The directory's mtime before it was listed.
+            ignore_mtime -- The mtime of its ignore file, or None.
+            features -- Names of the features in it.
+            subdirectories -- Names of the subdirectories to descend into.
+            ignores -- Patterns read from its ignore file.
+            inherited -- Digest of the ignore patterns it inherits.
+            relative_path -- Its path relative to the root walked.
+        """
+        if time.time() - mtime < MTIME_GRACE_SECONDS:
+            mtime = None
+        with self._lock:
+            self._directories[path] = {
+                'mtime': mtime,
+                'ignore_mtime': ignore_mtime,
+                'features': features,
+                'subdirectories': subdirectories,
+                'ignores': list(ignores),
+                'inherited': inherited,
+                'relative_path': relative_path,
+            }
+
+    def save(self):
+        """
+            Save the manifest, and start the next walk from its records.
+            Records of directories below the roots walked that were not
+            seen again are dropped.
+
+            The file is only written if a directory was listed since it
+            was last saved, as otherwise nothing has changed.
+        """
+        roots = tuple(
+            root.rstrip(os.sep) + os.sep for root in self._roots
+        )
+        directories = dict(
+            (path, record)
+            for path, record in self._previous.items()
+            if path not in self._roots and not path.startswith(roots)
+        )
+        directories.update(self._directories)
+        self._previous = directories
+        self._directories = {}
+        self._roots = set()
+        if not self.persist or self._saved_scans == self.stats['scanned']:
+            return
+        self._saved_scans = self.stats['scanned']
+        cache.save_json(self.path, {
+            'options': self._options,
+            'directories': directories,
+        })
+
+
+class FeatureFinder(object):
+    """
+        Finds feature files below a directory using scandir, without
+        descending into ignored directories.
+    """
+
+    def __init__(self, extensions=DEFAULT_EXTENSIONS, patterns=None,
+                 ignores=DEFAULT_IGNORES, ignore_file=IGNORE_FILE,
+                 follow_symlinks=True, sort=False, workers=None,
+                 manifest=None):
+        """
+            Initialise a feature finder.
+
+            Keyword arguments:
+            extensions -- File extensions of features, or None for any.
+            patterns -- Glob patterns, at least one of which a feature's
+                        path relative to the search root must match, or
+                        None to accept any path.
+            ignores -- Glob patterns for names or relative paths of files
+                       and directories to skip.
+            ignore_file -- Name of ignore files adding more patterns, or
+                           None to not look for them.
+            follow_symlinks -- Whether to descend into symlinked
+                               directories. Each directory is visited at
+                               most once, so symlink loops are harmless.
+            sort -- Whether to yield features in sorted order, directory by
+                    directory, rather than in the order the filesystem
+                    lists them.
+            workers -- How many threads to list directories with. With
+                       more than one, subdirectories are listed
+                       concurrently as soon as they are found, which
+                       helps on slow or network filesystems. Features are
+                       still yielded in the same order as with one.
+            manifest -- A DiscoveryManifest to reuse the listings of
+                        unchanged directories from. It is saved once a
+                        walk is complete.
+        """
+        self.extensions = tuple(extensions) if extensions else None
+        self.patterns = tuple(patterns) if patterns else None
+        self.ignores = tuple(ignores or ())
+        self.ignore_file = ignore_file
+        self.follow_symlinks = follow_symlinks
+        self.sort = sort
+        self.workers = workers
+        self.manifest = manifest
+
+    def is_feature(self, name, relative_path):
+        """
+            Check whether a file is a feature, given its name and its path
+            relative to the search root.
+        """
+        if self.extensions and not name.endswith(self.extensions):
+            return False
+        if self.patterns is None:
+            return True
+        for pattern in self.patterns:
+            if fnmatch.fnmatch(relative_path, pattern):
+                return True
+        return False
+
+    def scan(self, directory):
+        """
+            List one directory.
+
+            Keyword arguments:
+            directory -- The _Directory to list.
+
+            Returns:
+            Tuple of (identity, features, subdirectories). identity is the
+            (device, inode) of the directory, or None if it has gone since
+            it was queued. features is a list of feature paths and
+            subdirectories a list of _Directory to scan next.
+        """
+        try:
+            stat = os.stat(directory.path)
+        except OSError:
+            return None, [], []
+        identity = (stat.st_dev, stat.st_ino)
+
+        if self.manifest is not None:
+            features, subdirectories = self._scan_with_manifest(
+                directory, stat)
+        else:
+            ignores = directory.ignores
+            if self.ignore_file is not None:
+                ignores = ignores + _read_ignore_file(
+                    os.path.join(directory.path, self.ignore_file))
+            features, subdirectories = self._list(directory, ignores)
+        return identity, features, subdirectories
+
+    def _list(self, directory, ignores):
+        """
+            List a directory's features and subdirectories to descend into.
+        """
+        try:
+            entries = list(scandir(directory.path))
+        except OSError:
+            return [], []
+        if self.sort:
+            entries.sort(key=lambda entry: entry.name)
+
+        features = []
+        subdirectories = []
+        for entry in entries:
+            relative_path = directory.relative_path + entry.name
+            if _ignored(entry.name, relative_path, ignores):
+                continue
+            try:
+                is_directory = entry.is_dir(
+                    follow_symlinks=self.follow_symlinks)
+                is_file = not is_directory and entry.is_file()
+            except OSError:
+                continue
+            if is_directory:
+                subdirectories.append(
+                    _Directory(entry.path, relative_path + '/', ignores))
+            elif is_file and self.is_feature(entry.name, relative_path):
+                features.append(entry.path)
+
+        return features, subdirectories
+
+    def _scan_with_manifest(self, directory, stat):
+        """
+            List a directory unless the manifest has an unchanged listing.
+        """
+        path = os.path.abspath(directory.path)
+        ignore_mtime = None
+        if self.ignore_file is not None:
+            try:
+                ignore_mtime = os.stat(
+                    os.path.join(directory.path, self.ignore_file)
+                ).st_mtime
+            except OSError:
+                pass
+
+        inherited = _digest_ignores(directory.ignores)
+        record = self.manifest.lookup(
+            path, stat.st_mtime, ignore_mtime, inherited,
+            directory.relative_path)
+        if record is not None:
+            ignores = directory.ignores + tuple(record['ignores'])
+            return (
+                [
+                    os.path.join(directory.path, name)
+                    for name in record['features']
+                ],
+                [
+                    _Directory(
+                        os.path.join(directory.path, name),
+                        directory.relative_path + name + '/',
+                        ignores,
+                    )
+                    for name in record['subdirectories']
+                ],
+            )
+
+        own_ignores = ()
+        if ignore_mtime is not None:
+            own_ignores = _read_ignore_file(
+                os.path.join(directory.path, self.ignore_file))
+        features, subdirectories = self._list(
+            directory, directory.ignores + own_ignores)
+        self.manifest.record(
+            path,
+            stat.st_mtime,
+            ignore_mtime,
+            [os.path.basename(feature) for feature in features],
+            [
+                os.path.basename(subdirectory.path)
+                for subdirectory in subdirectories
+            ],
+            own_ignores,
+            inherited,
+            directory.relative_path,
+        )
+        return features, subdirectories
+
+    def find(self, path):
+        """
+            Find features below a path, lazily.
+
+            Keyword arguments:
+            path -- The directory to search. A file is yielded as it is.
+
+            Returns:
+            Generator of feature paths, each directory's features before
+            those of its subdirectories.
+        """
+        if not os.path.isdir(path):
+            if os.path.isfile(path):
+                yield path
+            return
+
+        if self.manifest is not None:
+            self.manifest.start(path, self.options())
+
+        if self.workers and self.workers > 1:
+            walk = self._find_parallel(path)
+        else:
+            walk = self._find_serial(path)
+        for feature in walk:
+            yield feature
+
+        if self.manifest is not None:
+            self.manifest.save()
+
+    def options(self):
+        """
+            Get the options affecting which features are found, as a list
+            suitable for saving as JSON.
+        """
+        return [
+            self.extensions and list(self.extensions),
+            self.patterns and list(self.patterns),
+            list(self.ignores),
+            self.ignore_file,
+            self.follow_symlinks,
+            self.sort,
+        ]
+
+    def _find_serial(self, path):
+        return self._walk(_Directory(path, '', self.ignores), set())
+
+    def _walk(self, directory, visited):
+        """
+            Walk the tree below a directory on this thread, depth first,
+            skipping directories whose identity is in visited and adding
+            those it lists.
+        """
+        pending = [directory]
+        while pending:
+            directory = pending.pop()
+            identity, features, subdirectories = self.scan(directory)
+            if identity is None or identity in visited:
+                continue
+            visited.add(identity)
+
+            for feature in features:
+                yield feature
+            pending.extend(reversed(subdirectories))
+
+    def _scan_tree(self, executor, directory, claims):
+        """
+            List a directory on a worker thread, unless a worker has
+            already claimed it, then queue its subdirectories for listing
+            without waiting for them.
+
+            Keyword arguments:
+            executor -- The executor to queue subdirectories on.
+            directory -- The _Directory to list.
+            claims -- The walk's _Claims, so a directory reached by
+                      several routes through symlinks, including loops,
+                      is listed by one worker however many routes there
+                      are.
+
+            Returns:
+            Tuple of (identity, features, subdirectories) as from scan,
+            except subdirectories are futures of their own _scan_tree.
+            identity is None for a directory that has gone. features is
+            None for a directory another route has claimed, with the
+            _Directory itself in place of subdirectories.
+        """
+        try:
+            stat = os.stat(directory.path)
+        except OSError:
+            return None, [], []
+        identity = (stat.st_dev, stat.st_ino)
+        if not claims.claim(identity):
+            return identity, None, directory
+
+        identity, features, subdirectories = self.scan(directory)
+        if identity is None:
+            return None, [], []
+        return identity, features, [
+            executor.submit(self._scan_tree, executor, subdirectory, claims)
+            for subdirectory in subdirectories
+        ]
+
+    def _find_parallel(self, path):
+        """
+            Find features with a pool of threads listing directories.
+
+            Workers only follow the directories found by the workers
+            before them and never look at shared state, while this thread
+            consumes their results in the same depth first order as the
+            serial walk and decides which directories were already
+            visited, so the results do not depend on thread timing.
+
+            Workers list each directory once, through whichever route
+            reaches it first. Should that not be the route the serial walk
+            takes, this thread walks the directory itself by the serial
+            walk's route, so no directory is listed more than twice.
+        """
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            visited = set()
+            pending = [executor.submit(
+                self._scan_tree,
+                executor,
+                _Directory(path, '', self.ignores),
+                _Claims(),
+            )]
+            while pending:
+                identity, features, subdirectories = pending.pop().result()
+                if identity is None or identity in visited:
+                    continue
+                if features is None:
+                    for feature in self._walk(subdirectories, visited):
+                        yield feature
+                    continue
+                visited.add(identity)
+
+                for feature in features:
+                    yield feature
+                pending.extend(reversed(subdirectories))
+        finally:
+            executor.shutdown(wait=False)
+
+
+def iter_features(path, **options):
+    """
+        Find features below a path, lazily.
+
+        Keyword arguments:
+        path -- The directory to search.
+        options -- Options for FeatureFinder.
+
+        Returns:
+        Generator of feature paths.
+    """
+    return FeatureFinder(**options).find(path)
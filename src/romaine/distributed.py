@@ -0,0 +1,419 @@
+import argparse
+import collections
+import json
+import logging
+import multiprocessing
+import socket
+import threading
+import time
+
+try:
+    import queue
+except ImportError:
+    import Queue as queue
+
+try:
+    import socketserver
+except ImportError:
+    import SocketServer as socketserver
+
+from romaine import exc
+from romaine.core import Core
+from romaine.parallel import merge_feature, run_buffered
+from romaine.runner import DEFAULT_GRACE, Cancellation
+from romaine.timings import longest_first
+
+# Seconds a worker may go without sending a heartbeat or result before its
+# unit of work is handed to another
+DEFAULT_LEASE = 30.0
+
+
+def _send(stream, message):
+    stream.write((json.dumps(message) + '\n').encode('utf-8'))
+    stream.flush()
+
+
+def _receive(stream):
+    """
+        Read one message, or None if the other end has gone away.
+    """
+    try:
+        line = stream.readline()
+    except (IOError, OSError):
+        return None
+    if not line:
+        return None
+    return json.loads(line.decode('utf-8'))
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """
+        Serves units of work to one connected worker.
+    """
+
+    def send(self, message):
+        """
+            Send a message to the worker, from any thread.
+        """
+        with self._lock:
+            _send(self.wfile, message)
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        in_flight = None
+        lease = coordinator.lease
+        self._lock = threading.Lock()
+        # A read timing out is taken as the worker having gone away
+        self.connection.settimeout(lease)
+        self.send({
+            'type': 'welcome',
+            'step_modules': coordinator.core.step_modules,
+            'verbose': coordinator.verbose,
+            'level': coordinator.logger.enabled_level(),
+            'heartbeat': lease / 3.0 if lease is not None else None,
+        })
+        coordinator._connect(self)
+        try:
+            while True:
+                message = _receive(self.rfile)
+                if message is None:
+                    break
+                if message['type'] == 'heartbeat':
+                    continue
+                if message['type'] == 'result':
+                    coordinator._complete(message)
+                    in_flight = None
+                in_flight = coordinator._next_unit()
+                if in_flight is None:
+                    self.send({'type': 'done'})
+                    break
+                self.send({
+                    'type': 'unit',
+                    'unit': in_flight,
+                    'id': coordinator._elements[in_flight]['id'],
+                    'element': coordinator._elements[in_flight],
+                })
+        except (IOError, OSError):
+            pass
+        finally:
+            coordinator._disconnect(self)
+            if in_flight is not None:
+                coordinator._requeue(in_flight)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class Coordinator(object):
+    """
+        Runs features by handing their scenarios out to workers that
+        connect over TCP, possibly from other machines, merging the results
+        feature by feature in serial order, as with romaine.parallel's
+        runners. Scenarios estimated to take longest are handed out first.
+
+        The protocol is one JSON object per line. A worker connects and is
+        sent a welcome with the step modules to load, then asks for work
+        with a next message. Each reply is either a unit, one scenario or
+        scenario outline to run, or done. The worker sends the unit's
+        result back, which also asks for the next unit. While running a
+        unit a worker sends heartbeats. If a worker disconnects, or sends
+        nothing for the lease, while running a unit, the unit is handed to
+        another.
+
+        When failing fast, the first failing result cancels the run:
+        every connected worker is sent cancel, upon which it stops its unit
+        before the next step and sends back the result so far, workers are
+        sent done when they next ask for work, and units still running
+        after the grace period are reported as cancelled.
+
+        Run a worker with:
+
+            python -m romaine.distributed HOST:PORT
+    """
+
+    def __init__(self, core, logger, verbose=True, host='127.0.0.1',
+                 port=0, local_workers=0, timeout=None, fail_fast=False,
+                 grace=DEFAULT_GRACE, lease=DEFAULT_LEASE):
+        """
+            Initialise a coordinator.
+
+            Keyword arguments:
+            core -- The romaine Core whose step modules workers load.
+            logger -- An entered AbstractRomaineLogger to report to.
+            verbose -- Whether passing steps are logged at INFO rather than
+                       DEBUG level.
+            host -- The address to listen on.
+            port -- The port to listen on, 0 for any free port.
+            local_workers -- The number of worker processes to start on
+                             this machine.
+            timeout -- Seconds to wait for a result before giving up, or
+                       None to wait for workers forever.
+            fail_fast -- Whether to cancel the run after the first
+                         scenario that fails.
+            grace -- Seconds to wait for units of work in flight when the
+                     run is cancelled.
+            lease -- Seconds a worker may go without sending a heartbeat or
+                     result before its unit of work is handed to another,
+                     or None to wait for each worker forever.
+        """
+        self.core = core
+        self.logger = logger
+        self.verbose = verbose
+        self.host = host
+        self.port = port
+        self.local_workers = local_workers
+        self.timeout = timeout
+        self.fail_fast = fail_fast
+        self.grace = grace
+        self.lease = lease
+        self.address = None
+
+        self._condition = threading.Condition()
+        self._elements = []
+        self._pending = collections.deque()
+        self._results = {}
+        self._in_flight = set()
+        self._deadline = None
+        self._connections = set()
+
+    def _next_unit(self):
+        """
+            Take a unit of work, waiting while others are in flight.
+
+            Returns:
+            The unit's index, or None once every unit has a result or the
+            run has stopped.
+        """
+        with self._condition:
+            while not self._pending:
+                finished = len(self._results) == len(self._elements)
+                if finished or self._deadline is not None:
+                    return None
+                self._condition.wait()
+            unit = self._pending.popleft()
+            self._in_flight.add(unit)
+            return unit
+
+    def _connect(self, handler):
+        with self._condition:
+            self._connections.add(handler)
+
+    def _disconnect(self, handler):
+        with self._condition:
+            self._connections.discard(handler)
+
+    def _cancel(self):
+        """
+            Hand out no more units of work. Must be called with the
+            condition held.
+
+            Returns:
+            The connections to send cancel to, if this cancelled the run.
+        """
+        if self._deadline is not None:
+            return []
+        self._deadline = time.time() + self.grace
+        self._pending.clear()
+        self._condition.notify_all()
+        return list(self._connections)
+
+    def _send_cancel(self, handlers):
+        """
+            Tell workers to stop the units they are running.
+        """
+        for handler in handlers:
+            try:
+                handler.send({'type': 'cancel'})
+            except (IOError, OSError, ValueError):
+                pass
+
+    def _complete(self, message):
+        cancelled = []
+        with self._condition:
+            self._results[message['unit']] = (
+                message['stats'], message['records'])
+            self._in_flight.discard(message['unit'])
+            if self.fail_fast and message['stats']['failed']:
+                cancelled = self._cancel()
+            self._condition.notify_all()
+        self._send_cancel(cancelled)
+
+    def _requeue(self, unit):
+        with self._condition:
+            self._in_flight.discard(unit)
+            if unit not in self._results and self._deadline is None:
+                self._pending.appendleft(unit)
+            self._condition.notify_all()
+
+    def _wait_for(self, unit):
+        """
+            Wait for a unit's result.
+
+            Returns:
+            The (stats, records) tuple, or None if the run was cancelled
+            before the unit finished.
+        """
+        with self._condition:
+            waited_since = time.time()
+            while unit not in self._results:
+                if self._deadline is not None:
+                    remaining = self._deadline - time.time()
+                    if remaining <= 0 or unit not in self._in_flight:
+                        return None
+                elif self.timeout is not None:
+                    remaining = waited_since + self.timeout - time.time()
+                    if remaining <= 0:
+                        raise exc.WorkerTimeoutError(
+                            self._elements[unit]['id'])
+                else:
+                    remaining = None
+                self._condition.wait(remaining)
+            return self._results[unit]
+
+    def run_features(self, features):
+        """
+            Run features prepared by romaine.runner.prepare_feature on
+            workers.
+
+            Keyword arguments:
+            features -- Iterable of prepared features.
+        """
+        features = list(features)
+        for feature in features:
+            self._elements.extend(feature['elements'])
+        self._pending.extend(longest_first(
+            range(len(self._elements)),
+            lambda unit: [self._elements[unit]],
+        ))
+
+        server = _Server((self.host, self.port), _Handler)
+        server.coordinator = self
+        self.address = server.server_address
+        serving = threading.Thread(target=server.serve_forever)
+        serving.daemon = True
+        serving.start()
+        workers = [
+            multiprocessing.Process(target=run_worker, args=self.address)
+            for _ in range(self.local_workers)
+        ]
+        for worker in workers:
+            worker.start()
+
+        try:
+            unit = 0
+            for feature in features:
+                results = []
+                for element in feature['elements']:
+                    results.append(self._wait_for(unit))
+                    unit += 1
+                merge_feature(self.logger, feature, results)
+        finally:
+            server.shutdown()
+            server.server_close()
+            for worker in workers:
+                if self._deadline is not None:
+                    worker.join(max(0, self._deadline - time.time()))
+                else:
+                    worker.join(self.timeout)
+                if worker.is_alive():
+                    worker.terminate()
+
+
+def _beat(writer, lock, interval, stopped):
+    """
+        Send a heartbeat every interval seconds until stopped.
+    """
+    while not stopped.wait(interval):
+        try:
+            with lock:
+                _send(writer, {'type': 'heartbeat'})
+        except (IOError, OSError, ValueError):
+            return
+
+
+def _read(reader, messages, cancellation):
+    """
+        Queue the messages a worker is sent, acting on cancel at once, then
+        None once the coordinator has gone away.
+    """
+    while True:
+        message = _receive(reader)
+        if message is not None and message['type'] == 'cancel':
+            cancellation.cancel()
+            continue
+        messages.put(message)
+        if message is None:
+            return
+
+
+def run_worker(host, port):
+    """
+        Run units of work from a coordinator until it has no more.
+
+        Keyword arguments:
+        host -- The coordinator's address.
+        port -- The coordinator's port.
+    """
+    connection = socket.create_connection((host, port))
+    lock = threading.Lock()
+    stopped = threading.Event()
+    try:
+        reader = connection.makefile('rb')
+        writer = connection.makefile('wb')
+        welcome = _receive(reader)
+        if welcome is None:
+            return
+        messages = queue.Queue()
+        cancellation = Cancellation()
+        reading = threading.Thread(
+            target=_read, args=(reader, messages, cancellation))
+        reading.daemon = True
+        reading.start()
+        if welcome.get('heartbeat') is not None:
+            beating = threading.Thread(
+                target=_beat,
+                args=(writer, lock, welcome['heartbeat'], stopped),
+            )
+            beating.daemon = True
+            beating.start()
+        core = Core()
+        # Reloaded rather than imported, in case this worker was forked
+        # from a process that already imported them
+        core.reload_steps(welcome['step_modules'])
+
+        with lock:
+            _send(writer, {'type': 'next'})
+        while True:
+            message = messages.get()
+            if message is None or message['type'] == 'done':
+                break
+            (stats, records), = run_buffered(
+                core, welcome['verbose'], [message['element']],
+                cancellation=cancellation,
+                level=welcome.get('level', logging.NOTSET))
+            with lock:
+                _send(writer, {
+                    'type': 'result',
+                    'unit': message['unit'],
+                    'id': message['id'],
+                    'stats': stats,
+                    'records': records,
+                })
+    finally:
+        stopped.set()
+        connection.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Run romaine scenarios for a coordinator.')
+    parser.add_argument('address', help='The coordinator, as HOST:PORT.')
+    args = parser.parse_args(argv)
+    host, _, port = args.address.rpartition(':')
+    run_worker(host, int(port))
+
+
+if __name__ == '__main__':
+    main()
@@ -5,3 +5,24 @@ from unittest import SkipTest  # NOQA
 class UnimplementedStepError(Exception):
     def __init__(self, step):
         self.step = step
+
+
+class RegistryFrozenError(Exception):
+    """
+        A step was registered with a registry that has been frozen.
+    """
+    pass
+
+
+class UnknownConverterError(Exception):
+    """
+        A step name uses a placeholder type with no registered converter.
+    """
+    pass
+
+
+class WorkerTimeoutError(Exception):
+    """
+        No worker reported a result within a distributed run's timeout.
+    """
+    pass
@@ -0,0 +1,73 @@
+from romaine import cache
+
+
+def order_failed_first(features, failed):
+    """
+        Order prepared features so scenarios that failed last time run
+        first, keeping the original order otherwise.
+
+        Features with a scenario that failed come before the others, and
+        within each feature its failed scenarios come before the others.
+        Failed elements are also marked with 'failed_before', which the
+        parallel runners schedule ahead of everything else.
+
+        Keyword arguments:
+        features -- Iterable of prepared features.
+        failed -- Collection of the IDs of scenarios that failed.
+
+        Returns:
+        A new list of the features.
+    """
+    features = list(features)
+    for feature in features:
+        for element in feature['elements']:
+            element['failed_before'] = element['id'] in failed
+        feature['elements'].sort(
+            key=lambda element: not element['failed_before'])
+    features.sort(key=lambda feature: not any(
+        element['failed_before'] for element in feature['elements']))
+    return features
+
+
+class FailureCache(object):
+    """
+        The IDs of scenarios and scenario outlines that failed when they
+        last ran, kept between runs.
+    """
+
+    def __init__(self, path=None):
+        """
+            Load a failure cache.
+
+            Keyword arguments:
+            path -- The cache file. Defaults to failures.json in the
+                    romaine cache directory.
+        """
+        self.path = path or cache.cache_path('failures.json')
+        self.failed = set(cache.load_json(self.path, []))
+
+    def record(self, features):
+        """
+            Record which elements of features failed. Elements that passed
+            are forgotten, and those that didn't run, or were cancelled,
+            are left as they were.
+
+            Keyword arguments:
+            features -- Iterable of prepared features, after the logger has
+                        added stats to them.
+        """
+        for feature in features:
+            for element in feature['elements']:
+                stats = element.get('stats')
+                if stats is None or stats.get('cancelled'):
+                    continue
+                if stats['failed']:
+                    self.failed.add(element['id'])
+                else:
+                    self.failed.discard(element['id'])
+
+    def save(self):
+        """
+            Save the cache.
+        """
+        cache.save_json(self.path, sorted(self.failed))
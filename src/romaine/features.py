@@ -0,0 +1,165 @@
+import hashlib
+import os
+
+from collections import OrderedDict
+
+
+def scenario_ids(path, feature):
+    """
+        Get stable identifiers for the scenarios and scenario outlines of a
+        feature, which survive edits elsewhere in the feature file.
+
+        Keyword arguments:
+        path -- The path of the feature file.
+        feature -- The parsed feature.
+
+        Returns:
+        List of IDs, one per element of the feature, of the form
+        path::description. Repeated descriptions get a #2, #3... suffix.
+    """
+    ids = []
+    seen = {}
+    for element in feature['elements']:
+        description = element['description'].strip()
+        seen[description] = seen.get(description, 0) + 1
+        scenario_id = '{}::{}'.format(path, description)
+        if seen[description] > 1:
+            scenario_id = '{}#{}'.format(scenario_id, seen[description])
+        ids.append(scenario_id)
+    return ids
+
+
+class FeatureRecord(object):
+    """
+        A feature file known to a FeatureIndex, with its size and mtime as
+        of when it was last indexed.
+    """
+    __slots__ = ('path', 'canonical_path', 'size', 'mtime', '_digest')
+
+    def __init__(self, path, canonical_path, stat):
+        """
+            Initialise a feature record.
+
+            Keyword arguments:
+            path -- The path the feature was first found by.
+            canonical_path -- The real, absolute path of the feature.
+            stat -- The result of stat on the feature.
+        """
+        self.path = path
+        self.canonical_path = canonical_path
+        self.size = None
+        self.mtime = None
+        self._digest = None
+        self.update(stat)
+
+    def update(self, stat):
+        """
+            Update the size and mtime from a new stat result, forgetting the
+            content hash if either has changed.
+
+            Returns:
+            True if the feature has changed since it was last indexed.
+        """
+        changed = (stat.st_size, stat.st_mtime) != (self.size, self.mtime)
+        if changed:
+            self.size = stat.st_size
+            self.mtime = stat.st_mtime
+            self._digest = None
+        return changed
+
+    @property
+    def digest(self):
+        """
+            The SHA-1 hex digest of the feature's content, read the first
+            time it is needed after each change.
+        """
+        if self._digest is None:
+            sha1 = hashlib.sha1()
+            with open(self.canonical_path, 'rb') as feature_file:
+                sha1.update(feature_file.read())
+            self._digest = sha1.hexdigest()
+        return self._digest
+
+
+class FeatureIndex(object):
+    """
+        The feature files known to a Core, in the order they were found.
+
+        Features are keyed by their real, absolute path, so one feature
+        reached by a relative path, an absolute path, or through a symlink
+        is only indexed once, under the path it was first found by.
+    """
+
+    def __init__(self):
+        """
+            Initialise an empty feature index.
+        """
+        self._records = OrderedDict()
+
+    @staticmethod
+    def canonicalize(path):
+        """
+            Get the real, absolute form of a path.
+        """
+        return os.path.realpath(path)
+
+    def add(self, path, stat=None):
+        """
+            Add a feature to the index, or refresh it if already indexed.
+
+            Keyword arguments:
+            path -- The path of the feature.
+            stat -- The result of stat on the feature, if already known.
+
+            Returns:
+            The feature's FeatureRecord.
+        """
+        canonical_path = self.canonicalize(path)
+        if stat is None:
+            stat = os.stat(canonical_path)
+        record = self._records.get(canonical_path)
+        if record is None:
+            record = FeatureRecord(path, canonical_path, stat)
+            self._records[canonical_path] = record
+        else:
+            record.update(stat)
+        return record
+
+    def update(self, paths):
+        """
+            Add several features to the index.
+
+            Keyword arguments:
+            paths -- Iterable of feature paths.
+
+            Returns:
+            List of their FeatureRecords.
+        """
+        return [self.add(path) for path in paths]
+
+    def get(self, path):
+        """
+            Get a feature's record, or None if it is not indexed.
+        """
+        return self._records.get(self.canonicalize(path))
+
+    def remove(self, path):
+        """
+            Remove a feature from the index, e.g. when it is deleted.
+        """
+        self._records.pop(self.canonicalize(path), None)
+
+    def paths(self):
+        """
+            Get the paths of the indexed features, in the order found.
+        """
+        return [record.path for record in self._records.values()]
+
+    def __contains__(self, path):
+        return self.canonicalize(path) in self._records
+
+    def __iter__(self):
+        return iter(list(self._records.values()))
+
+    def __len__(self):
+        return len(self._records)
@@ -0,0 +1,247 @@
+import os
+import subprocess
+import sys
+import sysconfig
+
+from romaine import cache
+from romaine.outline import step_texts
+from romaine.runner import Runner
+from romaine.sharding import shard_key
+
+# Directories of installed code, whose files scenarios' records leave out
+_INSTALLED = tuple(set(
+    os.path.join(os.path.abspath(path), '')
+    for path in (
+        sysconfig.get_paths().get(name)
+        for name in ('stdlib', 'platstdlib', 'purelib', 'platlib')
+    )
+    if path
+))
+
+
+def relative_path(path):
+    """
+        Get a path relative to the working directory, with / as the path
+        separator, as the impact map keeps them.
+    """
+    return os.path.relpath(os.path.abspath(path)).replace(os.sep, '/')
+
+
+def changed_since(ref):
+    """
+        Get the files changed since a git commit, including uncommitted
+        changes, relative to the working directory.
+
+        Keyword arguments:
+        ref -- The commit, branch or tag, e.g. origin/main.
+
+        Returns:
+        List of the changed paths.
+
+        Raises:
+        subprocess.CalledProcessError if git fails.
+    """
+    output = subprocess.check_output(
+        ['git', 'diff', '--name-only', '--relative', ref])
+    return output.decode('utf-8').splitlines()
+
+
+class SettraceTracer(object):
+    """
+        Collects the code run on the current thread with sys.settrace,
+        tracing calls but not lines.
+    """
+
+    def __init__(self):
+        self.codes = set()
+        self._previous = None
+
+    def _trace(self, frame, event, arg):
+        if event == 'call':
+            self.codes.add(frame.f_code)
+
+    def start(self):
+        self._previous = sys.gettrace()
+        sys.settrace(self._trace)
+
+    def stop(self):
+        sys.settrace(self._previous)
+
+    def collect(self):
+        """
+            Get the code objects run since the last collect.
+        """
+        codes, self.codes = self.codes, set()
+        return codes
+
+
+class MonitoringTracer(object):
+    """
+        Collects the code run with sys.monitoring, on Python 3.12 and
+        later. Each code object is reported once and then disabled until
+        the next collect, so code run again costs nothing.
+
+        sys.monitoring sees every thread, so only one scenario may run at a
+        time.
+    """
+
+    def __init__(self):
+        self.codes = set()
+        self._tool = None
+
+    def _on_start(self, code, offset):
+        self.codes.add(code)
+        return sys.monitoring.DISABLE
+
+    def start(self):
+        monitoring = sys.monitoring
+        for tool in range(monitoring.PROFILER_ID, monitoring.OPTIMIZER_ID):
+            if monitoring.get_tool(tool) is None:
+                break
+        else:
+            raise RuntimeError('Every sys.monitoring tool ID is in use.')
+        monitoring.use_tool_id(tool, 'romaine')
+        monitoring.register_callback(
+            tool, monitoring.events.PY_START, self._on_start)
+        monitoring.set_events(tool, monitoring.events.PY_START)
+        self._tool = tool
+
+    def stop(self):
+        monitoring = sys.monitoring
+        monitoring.set_events(self._tool, monitoring.events.NO_EVENTS)
+        monitoring.register_callback(
+            self._tool, monitoring.events.PY_START, None)
+        monitoring.free_tool_id(self._tool)
+        self._tool = None
+
+    def collect(self):
+        """
+            Get the code objects run since the last collect.
+        """
+        codes, self.codes = self.codes, set()
+        sys.monitoring.restart_events()
+        return codes
+
+
+def make_tracer():
+    """
+        Get a MonitoringTracer where sys.monitoring is available, otherwise
+        a SettraceTracer.
+    """
+    if hasattr(sys, 'monitoring'):
+        return MonitoringTracer()
+    return SettraceTracer()
+
+
+class ImpactMap(object):
+    """
+        The source files, and functions in them, that each scenario or
+        scenario outline ran when it was last recorded, to select the
+        scenarios a change affects.
+    """
+
+    def __init__(self, path=None):
+        """
+            Load an impact map.
+
+            Keyword arguments:
+            path -- The map file. Defaults to impact.json in the romaine
+                    cache directory.
+        """
+        self.path = path or cache.cache_path('impact.json')
+        # The functions each scenario ran, by file, by scenario shard_key
+        self.scenarios = cache.load_json(self.path, {})
+
+    def record(self, scenario_id, codes):
+        """
+            Record the code a scenario ran, leaving out installed code such
+            as the standard library.
+
+            Keyword arguments:
+            scenario_id -- The scenario's ID, see
+                           romaine.features.scenario_ids.
+            codes -- Iterable of the code objects it ran.
+        """
+        functions = {}
+        for code in codes:
+            filename = code.co_filename
+            if filename.startswith('<') or filename.startswith(_INSTALLED):
+                continue
+            functions.setdefault(relative_path(filename), set()).add(
+                getattr(code, 'co_qualname', code.co_name))
+        self.scenarios[shard_key(scenario_id)] = dict(
+            (path, sorted(names)) for path, names in functions.items())
+
+    def forget(self, scenario_id):
+        """
+            Drop a scenario's record, so every change affects it until it
+            is recorded again.
+        """
+        self.scenarios.pop(shard_key(scenario_id), None)
+
+    def is_affected(self, scenario_id, feature_path, changed):
+        """
+            Whether a change may affect a scenario: it has no record, its
+            feature file changed, or it ran a file that changed.
+
+            Keyword arguments:
+            scenario_id -- The scenario's ID.
+            feature_path -- The path of its feature file.
+            changed -- Set of the changed paths, see relative_path.
+        """
+        files = self.scenarios.get(shard_key(scenario_id))
+        if files is None or relative_path(feature_path) in changed:
+            return True
+        return any(path in changed for path in files)
+
+    def save(self):
+        """
+            Save the map.
+        """
+        cache.save_json(self.path, self.scenarios)
+
+
+class RecordingRunner(Runner):
+    """
+        Runs features serially, as Runner does, recording the code each
+        scenario and scenario outline runs into an ImpactMap.
+
+        Those with undefined steps are forgotten rather than recorded, as
+        the code defining the steps may be added in any file.
+    """
+
+    def __init__(self, core, logger, verbose=True, fail_fast=False,
+                 cancellation=None, impact=None, tracer=None):
+        """
+            Initialise a recording runner.
+
+            Keyword arguments:
+            impact -- The ImpactMap to record into.
+            tracer -- The tracer to collect code run with. Defaults to
+                      make_tracer's.
+            Others as for Runner.
+        """
+        super(RecordingRunner, self).__init__(
+            core, logger, verbose, fail_fast, cancellation)
+        self.impact = impact
+        self.tracer = tracer or make_tracer()
+
+    def run_features(self, features):
+        self.tracer.start()
+        try:
+            super(RecordingRunner, self).run_features(features)
+        finally:
+            self.tracer.stop()
+
+    def run_element(self, element):
+        self.tracer.collect()
+        super(RecordingRunner, self).run_element(element)
+        codes = self.tracer.collect()
+        stats = element.get('stats')
+        if stats is None or stats.get('cancelled'):
+            return
+        find = self.core.steps.find
+        if any(find(text) is None for text in step_texts(element)):
+            self.impact.forget(element['id'])
+        else:
+            self.impact.record(element['id'], codes)
@@ -1,39 +1,17 @@
 import datetime
 import logging
+import traceback
 
 from abc import ABCMeta, abstractmethod
 from contextlib import contextmanager
 
 from romaine import exc
+from romaine import stubs
+from romaine.runner import fill_step_with_example_row
 
 
 def test_step_to_stub(step):
-
-    step_chars = set(step["text"])
-
-    step_slug = "{type}_{text}".format(**step).lower()
-    for char in step_chars:
-        if not char.isalnum():
-            step_slug = step_slug.replace(char, "_")
-
-    return "\n".join([
-        "@{type}({text!r})".format(**step),
-        "def {step_slug}():".format(step_slug=step_slug),
-        "    raise NotImplementedError"
-    ])
-
-
-# TODO - This should be in the runner, but that is not built yet
-def fill_step_with_example_row(step, row):
-    step_text = step['text']
-
-    for key, value in row.items():
-        step_text = step_text.replace("<{key}>".format(key=key), value)
-
-    step = step.copy()
-    step['text'] = step_text
-
-    return step
+    return stubs.step_to_stub(step)
 
 
 class AbstractRomaineLogger(object):
@@ -49,6 +27,7 @@ class AbstractRomaineLogger(object):
         self._feature = None
         self._scenario_outline = None
         self._scenario_outline_example = None
+        self._stubbed = None
         self.statistics = None
 
     def __enter__(self):
@@ -61,6 +40,8 @@ class AbstractRomaineLogger(object):
             "scenarios": {
                 "total": 0,
                 "passed": 0,
+                "cancelled": 0,
+                "cached": 0,
             },
             "steps": {
                 "total": 0,
@@ -70,6 +51,7 @@ class AbstractRomaineLogger(object):
             },
             "duration": None,
         }
+        self._stubbed = set()
         self._timing = self._duration(self.statistics)
         self._timing.__enter__()
         return self
@@ -88,23 +70,64 @@ class AbstractRomaineLogger(object):
         self._timing.__exit__(None, None, None)
 
         if exc_val is not None:
-            if isinstance(exc_val, exc.SkipTest):
-                handle = True
-            else:
-                self.alert(self.ERROR, exc_info=(exc_type, exc_val, exc_tb))
-
-            if isinstance(exc_val, exc.UnimplementedStepError):
-                stub = test_step_to_stub(exc_val.step)
-                self.alert(self.INFO, stub)
-                handle = True
-            elif isinstance(exc_val, AssertionError):
-                handle = True
+            handle = self.handle_exception(exc_type, exc_val, exc_tb)
 
         self._log_stats()
 
         if handle:
             return True
 
+    def handle_exception(self, exc_type, exc_val, exc_tb):
+        """
+        Log an exception raised while running a test, suggesting a stub if
+        it is for an unimplemented step.
+
+        Returns:
+        Whether the exception is one that should not abort the test run.
+        """
+        handle = False
+        if isinstance(exc_val, exc.SkipTest):
+            handle = True
+        else:
+            self.alert(self.ERROR, exc_info=(exc_type, exc_val, exc_tb))
+
+        if isinstance(exc_val, exc.UnimplementedStepError):
+            self._alert_stub(exc_val.step)
+            handle = True
+        elif isinstance(exc_val, AssertionError):
+            handle = True
+        return handle
+
+    def _alert_stub(self, step):
+        """
+        Suggest a stub for an unimplemented step, unless one has already
+        been suggested for the same text during this run.
+        """
+        text = stubs.normalize_text(step["text"])
+        if text not in self._stubbed:
+            self._stubbed.add(text)
+            self.alert(self.INFO, test_step_to_stub(step))
+
+    def cancelled(self, elements):
+        """
+        Count scenarios and scenario outlines of a feature that was
+        cancelled before any of them ran, so the feature is not logged.
+        """
+        self.statistics["scenarios"]["cancelled"] += len(elements)
+
+    def cached(self, elements):
+        """
+        Count scenarios and scenario outlines skipped because they passed
+        before and nothing they depend on has changed.
+        """
+        self.statistics["scenarios"]["cached"] += len(elements)
+        for element in elements:
+            self.alert(
+                self.DEBUG,
+                "Scenario '{}' is cached".format(
+                    element["description"].strip())
+            )
+
     def _log_stats(self):
         if "features" in self.statistics:
             feature = self.statistics["features"]
@@ -133,6 +156,14 @@ class AbstractRomaineLogger(object):
                     passed,
                 )
             )
+            for outcome in ("cached", "cancelled"):
+                count = scenarios.get(outcome, 0)
+                if count:
+                    word = "scenario" if count == 1 else "scenarios"
+                    self.alert(
+                        self.INFO,
+                        "{} {} {}".format(count, word, outcome)
+                    )
         if "steps" in self.statistics:
             steps = self.statistics["steps"]
             word = "step" if total is 1 else "steps"
@@ -188,7 +219,8 @@ class AbstractRomaineLogger(object):
             "duration": None,
         }
 
-        step_text = "{type} {text}".format(**step)
+        # Steps are the innermost loop of a run, so their text is only
+        # formatted when it is going to be logged
         try:
             with self._duration(step["stats"]):
                 yield
@@ -197,26 +229,33 @@ class AbstractRomaineLogger(object):
             step["stats"]["skipped"] = True
             raise
         except AssertionError:
-            self.alert(self.ERROR, step_text)
+            self.alert(self.ERROR, "{type} {text}".format(**step))
             step["stats"]["failed"] = True
             raise
         except:
             step["stats"]["failed"] = True
             raise
         else:
-            self.alert(self.INFO if verbose else self.DEBUG, step_text)
+            level = self.INFO if verbose else self.DEBUG
+            if self.is_enabled_for(level):
+                self.alert(level, "{type} {text}".format(**step))
             step["stats"]["passed"] = True
         finally:
-            self.alert(
-                self.DEBUG,
-                "Step {!r} executed in {} seconds".format(
-                    step_text, step["stats"]["duration"]
+            if self.is_enabled_for(self.DEBUG):
+                self.alert(
+                    self.DEBUG,
+                    "Step {!r} executed in {} seconds".format(
+                        "{type} {text}".format(**step),
+                        step["stats"]["duration"]
+                    )
                 )
-            )
 
     @staticmethod
-    def _collect_scenario_stats(scenario, steps):
-        stats = scenario["stats"]
+    def _count_steps(stats, steps):
+        """
+        Add the outcomes of steps to a scenario's or scenario outline's
+        step counts.
+        """
         for step in steps:
             stats["total_steps"] += 1
             step_stats = step.get("stats")
@@ -229,6 +268,11 @@ class AbstractRomaineLogger(object):
             elif step_stats["skipped"]:
                 stats["skipped_steps"] += 1
 
+    @classmethod
+    def _collect_scenario_stats(cls, scenario, steps):
+        stats = scenario["stats"]
+        cls._count_steps(stats, steps)
+
         if stats["failed_steps"]:
             stats["failed"] = True
         elif stats["passed_steps"]:
@@ -263,12 +307,6 @@ class AbstractRomaineLogger(object):
                 )
             )
 
-    def _scenario_outline_steps(self):
-        for example in self._scenario_outline["examples"]:
-            for run in example.get("runs", ()):
-                for step in run:
-                    yield step
-
     @contextmanager
     def in_scenario_outline(self, scenario_outline):
         scenario_outline["stats"] = {
@@ -289,8 +327,8 @@ class AbstractRomaineLogger(object):
         except exc.SkipTest:
             pass
         finally:
-            self._collect_scenario_stats(scenario_outline,
-                                         self._scenario_outline_steps())
+            # Each example row's steps were counted as the row finished
+            self._collect_scenario_stats(scenario_outline, ())
             self._scenario_outline = None
             self.alert(
                 self.DEBUG,
@@ -303,7 +341,6 @@ class AbstractRomaineLogger(object):
     @contextmanager
     def in_scenario_outline_example(self, scenario_outline_example):
         self._scenario_outline_example = scenario_outline_example
-        self._scenario_outline_example["runs"] = []
 
         headings = scenario_outline_example['table'][0]
         heading_row = "|".join(headings)
@@ -314,6 +351,14 @@ class AbstractRomaineLogger(object):
             "    |{heading_row}|"
                 .format(heading_row=heading_row, **scenario_outline_example)
         )
+        unknown = scenario_outline_example.get("unknown_placeholders", ())
+        for step, name in unknown:
+            self.alert(
+                self.WARNING,
+                "{} {} (line {}) uses <{}>, which is not a column of the "
+                "Examples table, so it is left as it is".format(
+                    step["type"], step["text"], step.get("line"), name)
+            )
         try:
             yield
         finally:
@@ -321,13 +366,19 @@ class AbstractRomaineLogger(object):
 
     @contextmanager
     def in_scenario_outline_example_row(self, example, index):
+        """
+        Fill the outline's steps from one example row to run them. Their
+        outcomes are counted into the outline's stats as the row finishes,
+        so the steps can be released after.
+        """
         row_string = example["table"][index + 1]
         row_dict = example["hashes"][index]
+        steps = self._scenario_outline["steps"]
+        templates = example.get("templates") or [None] * len(steps)
         run = [
-            fill_step_with_example_row(step, row_dict)
-            for step in self._scenario_outline["steps"]
+            fill_step_with_example_row(step, row_dict, template)
+            for step, template in zip(steps, templates)
         ]
-        self._scenario_outline_example["runs"].append(run)
         self.alert(self.INFO, "    |{}|".format("|".join(row_string)))
         try:
             yield run
@@ -337,11 +388,28 @@ class AbstractRomaineLogger(object):
         except AssertionError:
             self.alert(self.ERROR,
                        "    |{}|".format("|".join(row_string)))
+        finally:
+            self._count_steps(self._scenario_outline["stats"], run)
 
     @abstractmethod
     def alert(self, level, body='', exc_info=False):
         pass
 
+    def is_enabled_for(self, level):
+        """
+        Whether alerts at a level would be logged, so messages that are
+        costly to build can be skipped. Assumes they would by default.
+        """
+        return True
+
+    def enabled_level(self):
+        """
+        Get the lowest level alerts are logged at, so loggers buffering
+        alerts for this one can leave out the rest. Assumes every level
+        by default.
+        """
+        return logging.NOTSET
+
     @contextmanager
     def in_feature(self, feature):
         self.statistics["features"]["run"].append(feature)
@@ -353,6 +421,7 @@ class AbstractRomaineLogger(object):
             "total_steps": 0,
             "passed_scenarios": 0,
             "failed_scenarios": 0,
+            "cancelled_scenarios": 0,
             "total_scenarios": 0,
             "passed": False,
             "failed": False,
@@ -394,6 +463,11 @@ class AbstractRomaineLogger(object):
             ):
                 stats[key] += scenario_stats.get(key, 0)
 
+            if scenario_stats.get("cancelled"):
+                stats["cancelled_scenarios"] += 1
+                self.statistics["scenarios"]["cancelled"] += 1
+                continue
+
             self.statistics["scenarios"]["total"] += 1
 
             if scenario_stats.get("passed"):
@@ -409,7 +483,7 @@ class AbstractRomaineLogger(object):
 
         if stats["failed_scenarios"]:
             stats["failed"] = True
-        elif stats["passed_scenarios"]:
+        elif stats["passed_scenarios"] and not stats["cancelled_scenarios"]:
             stats["passed"] = True
             self.statistics["features"]["passed"] += 1
 
@@ -427,9 +501,85 @@ class RomaineLogger(AbstractRomaineLogger):
             self.ERROR: self._stdlib_logger.error,
         }
 
+    def is_enabled_for(self, level):
+        return self._stdlib_logger.isEnabledFor(level)
+
+    def enabled_level(self):
+        return self._stdlib_logger.getEffectiveLevel()
+
+    def log_to(self, stream, level=logging.INFO):
+        """
+        Write alerts at or above a level to a stream, e.g. sys.stdout.
+        """
+        handler = logging.StreamHandler(stream)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        self._stdlib_logger.addHandler(handler)
+        self._stdlib_logger.setLevel(level)
+
     def alert(self, level, body='', exc_info=False):
 
         if level not in self._levels:
             raise NotImplementedError
 
         self._levels[level](body, exc_info=exc_info)
+
+
+class BufferingRomaineLogger(AbstractRomaineLogger):
+    """
+    Records alerts instead of logging them, so output produced somewhere
+    else, e.g. in another process or thread, can be replayed into another
+    logger in one piece.
+
+    Records are plain tuples and exceptions are recorded as formatted
+    tracebacks, so they can be pickled. Alerts below the level of the
+    logger they will be replayed into are neither formatted nor recorded.
+    """
+
+    def __init__(self, level=logging.NOTSET):
+        """
+        Initialise a buffering logger.
+
+        Keyword arguments:
+        level -- The enabled_level of the logger the records will be
+                 replayed into.
+        """
+        super(BufferingRomaineLogger, self).__init__()
+        self.level = level
+        self.records = []
+
+    def is_enabled_for(self, level):
+        return level >= self.level
+
+    def alert(self, level, body='', exc_info=False):
+        if level < self.level:
+            return
+        if exc_info:
+            formatted = "".join(traceback.format_exception(*exc_info))
+            body = "{}\n{}".format(body, formatted) if body else formatted
+        self.records.append(("alert", (level, body)))
+
+    def _alert_stub(self, step):
+        # Left to the logger replayed into, which knows what has already
+        # been stubbed during the whole run
+        self.records.append(("stub", (step,)))
+
+    def replay(self, logger):
+        """
+        Alert another logger with the recorded alerts, in order.
+        """
+        replay_records(self.records, logger)
+
+
+def replay_records(records, logger):
+    """
+    Alert a logger with alerts recorded by a BufferingRomaineLogger.
+
+    Keyword arguments:
+    records -- The BufferingRomaineLogger's records.
+    logger -- The logger to replay them into.
+    """
+    for kind, args in records:
+        if kind == "stub":
+            logger._alert_stub(*args)
+        else:
+            logger.alert(*args)
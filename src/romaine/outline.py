@@ -0,0 +1,106 @@
+import re
+
+# Text that reads as an outline placeholder: <name>, with no space just
+# inside the brackets, so comparisons such as "a < b and c > d" aren't
+_PLACEHOLDER = re.compile(r'<([^<>\s](?:[^<>]*[^<>\s])?)>')
+
+
+def example_hashes(example):
+    """
+        Get the rows of a parsed Examples table as dicts.
+
+        Keyword arguments:
+        example -- An example as retrieved by the section parser's
+                   get_example.
+
+        Returns:
+        List of dicts, one per row below the heading, mapping each
+        heading to the row's value. Surrounding space is removed from
+        headings and values.
+    """
+    table = example['table']
+    headings = [heading.strip() for heading in table[0]]
+    return [
+        dict(zip(headings, [value.strip() for value in row]))
+        for row in table[1:]
+    ]
+
+
+def compile_template(text, headings):
+    """
+        Split outline step text into its literal text and the placeholders
+        filled from each example row, so rows are filled with one join.
+
+        Keyword arguments:
+        text -- The step text.
+        headings -- Collection of the Examples table's headings.
+
+        Returns:
+        Tuple of the template, a list alternating literal text and
+        headings, starting and ending with literal text, for
+        fill_template, and a list of the placeholders that aren't
+        headings. Those, such as the <b> of some markup, are kept in the
+        template as literal text.
+    """
+    parts = _PLACEHOLDER.split(text)
+    template = [parts[0]]
+    unknown = []
+    for name, literal in zip(parts[1::2], parts[2::2]):
+        if name in headings:
+            template.extend([name, literal])
+        else:
+            template[-1] += '<{}>{}'.format(name, literal)
+            unknown.append(name)
+    return template, unknown
+
+
+def example_templates(steps, example):
+    """
+        Compile the templates of an outline's steps for one of its
+        examples.
+
+        Keyword arguments:
+        steps -- The outline's steps, including any background's.
+        example -- The example, as for example_hashes.
+
+        Returns:
+        Tuple of a list of templates, one per step, see compile_template,
+        and a list of (step, name) tuples for each placeholder that isn't
+        a column of the example.
+    """
+    headings = set(heading.strip() for heading in example['table'][0])
+    templates = []
+    unknown = []
+    for step in steps:
+        template, names = compile_template(step['text'], headings)
+        templates.append(template)
+        unknown.extend((step, name) for name in names)
+    return templates, unknown
+
+
+def fill_template(template, row):
+    """
+        Get the text of an outline step for one example row.
+
+        Keyword arguments:
+        template -- The step's template, see compile_template.
+        row -- The row, as a dict from example_hashes.
+    """
+    parts = list(template)
+    parts[1::2] = [row[name] for name in template[1::2]]
+    return ''.join(parts)
+
+
+def step_texts(element):
+    """
+        Get the text of every step a prepared scenario or scenario outline
+        runs, filling outline steps from each example row.
+    """
+    if element['type'] != 'scenario outline':
+        return [step['text'] for step in element['steps']]
+    return [
+        fill_template(template, row)
+        for example in element['examples']
+        for row in example['hashes']
+        for template in example['templates']
+    ]
@@ -0,0 +1,650 @@
+import collections
+import logging
+import multiprocessing
+import threading
+import time
+
+from abc import ABCMeta, abstractmethod
+from concurrent.futures import (
+    CancelledError,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    TimeoutError,
+    wait,
+)
+
+from romaine.core import Core
+from romaine.logs import BufferingRomaineLogger, replay_records
+from romaine.runner import (
+    DEFAULT_GRACE,
+    POLL_INTERVAL,
+    Cancellation,
+    Runner,
+    cancelled_stats,
+)
+from romaine.timings import estimate_of, longest_first
+
+# How work is split between workers
+FEATURE = 'feature'
+SCENARIO = 'scenario'
+
+# The core of each worker process, with the step modules it has loaded
+_worker = {}
+
+# The cancellation shared by each worker process with its run
+_worker_cancellation = None
+
+
+def _init_worker(event):
+    global _worker_cancellation
+    _worker_cancellation = Cancellation(event)
+
+
+def _worker_core(step_modules):
+    """
+        Get this worker process's core, loading the step modules into it
+        the first time they are asked for.
+    """
+    core = _worker.get(step_modules)
+    if core is None:
+        core = _worker[step_modules] = Core()
+        # Reloaded rather than imported, as a forked worker has the
+        # modules already imported, with their steps in the parent's core
+        core.reload_steps(step_modules)
+    return core
+
+
+def run_elements(step_modules, verbose, elements, fail_fast=False,
+                 level=logging.NOTSET):
+    """
+        Run prepared scenarios and scenario outlines, each with its own
+        buffering logger.
+
+        Keyword arguments:
+        step_modules -- Tuple of the names of the step modules to run with.
+        verbose -- Whether passing steps are logged at INFO level.
+        elements -- List of prepared elements, see
+                    romaine.runner.prepare_feature.
+        fail_fast -- Whether a failure cancels the run, through the
+                     cancellation the worker process was started with.
+        level -- The lowest level of alerts to record, see
+                 romaine.logs.BufferingRomaineLogger.
+
+        Returns:
+        List of (stats, records) tuples, one per element, with the stats
+        the logger collected and the records of its alerts.
+    """
+    return run_buffered(_worker_core(step_modules), verbose, elements,
+                        fail_fast, _worker_cancellation, level)
+
+
+def run_buffered(core, verbose, elements, fail_fast=False,
+                 cancellation=None, level=logging.NOTSET):
+    """
+        Run prepared elements with a core's steps, as run_elements does,
+        stopping at a romaine.runner.Cancellation if given one.
+    """
+    results = []
+    for element in elements:
+        logger = BufferingRomaineLogger(level)
+        Runner(core, logger, verbose, fail_fast, cancellation).run_element(
+            element)
+        results.append((element['stats'], logger.records))
+    return results
+
+
+def merge_feature(logger, feature, results):
+    """
+        Log a feature whose elements were run elsewhere as if it had been
+        run here, collecting its statistics into the logger's. A feature
+        whose elements were all cancelled is only counted as cancelled.
+
+        Keyword arguments:
+        logger -- The entered logger to merge into.
+        feature -- The prepared feature.
+        results -- List of (stats, records) tuples, one per element, as
+                   returned by run_elements, or None for elements given up
+                   on after the run was cancelled.
+    """
+    results = [
+        result if result is not None else (cancelled_stats(), [])
+        for result in results
+    ]
+    if all(stats.get('cancelled') for stats, records in results):
+        logger.cancelled(feature['elements'])
+        return
+    for element, (stats, records) in zip(feature['elements'], results):
+        element['stats'] = stats
+    with logger.in_feature(feature):
+        for stats, records in results:
+            replay_records(records, logger)
+
+
+def _process_pool(processes, cancellation):
+    """
+        Get a process pool executor whose workers share a cancellation.
+    """
+    return ProcessPoolExecutor(processes, initializer=_init_worker,
+                               initargs=(cancellation.event,))
+
+
+def _terminate(executor):
+    """
+        Shut a process pool executor down, terminating its worker processes
+        rather than waiting for them.
+    """
+    # ProcessPoolExecutor has no public way to stop work that has started
+    processes = list((getattr(executor, '_processes', None) or {}).values())
+    executor.shutdown(wait=False)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+
+
+class PoolRunner(object):
+    """
+        Base for runners that run units of work, each one scenario or one
+        feature, in a pool of workers, recording what each would log.
+
+        Results are merged back feature by feature, in the order a serial
+        run would take, so the log and statistics match a serial run's,
+        except for durations. A feature's duration is the time taken to
+        merge it.
+
+        Workers share a romaine.runner.Cancellation, which a failure
+        cancels when failing fast. Once the run is cancelled, units not yet
+        started are dropped, and those running stop before their next step.
+        Units still running after the grace period are given up on and
+        reported as cancelled.
+    """
+    __metaclass__ = ABCMeta
+
+    def __init__(self, core, logger, verbose=True, workers=None,
+                 granularity=SCENARIO, fail_fast=False, grace=DEFAULT_GRACE):
+        """
+            Initialise a pool runner.
+
+            Keyword arguments:
+            core -- The romaine Core with the steps to run.
+            logger -- An entered AbstractRomaineLogger to report to.
+            verbose -- Whether passing steps are logged at INFO rather than
+                       DEBUG level.
+            workers -- The number of workers. Defaults to the executor's
+                       default.
+            granularity -- FEATURE to send each feature to a worker in one
+                           piece, or SCENARIO to spread its scenarios and
+                           scenario outlines between workers.
+            fail_fast -- Whether to cancel the run after the first
+                         scenario, or outline example row, that fails.
+            grace -- Seconds to wait for units of work running when the
+                     run is cancelled.
+        """
+        if granularity not in (FEATURE, SCENARIO):
+            raise ValueError(granularity)
+        self.core = core
+        self.logger = logger
+        self.verbose = verbose
+        # Alerts below this level are left out in the workers
+        self.level = logger.enabled_level()
+        self.workers = workers
+        self.granularity = granularity
+        self.fail_fast = fail_fast
+        self.grace = grace
+        self.cancellation = None
+        self._futures = []
+        self._deadline = None
+
+    def _cancellation(self):
+        """
+            Get a romaine.runner.Cancellation to share with the workers.
+        """
+        return Cancellation()
+
+    @abstractmethod
+    def _executor(self):
+        """
+            Get a concurrent.futures executor to run units of work in.
+        """
+
+    @abstractmethod
+    def _submit(self, executor, elements):
+        """
+            Submit prepared elements to be run as one unit of work.
+
+            Returns:
+            A future of a list of (stats, records) tuples per element.
+        """
+
+    def _abandon(self, executor):
+        """
+            Shut the executor down without waiting for units of work still
+            running after the run was cancelled.
+        """
+        executor.shutdown(wait=False)
+
+    def _units(self, feature):
+        """
+            Split a feature's elements into units of work.
+
+            Returns:
+            List of lists of element indexes.
+        """
+        indexes = list(range(len(feature['elements'])))
+        if self.granularity == FEATURE:
+            return [indexes] if indexes else []
+        return [[index] for index in indexes]
+
+    def run_features(self, features):
+        """
+            Run features prepared by romaine.runner.prepare_feature. Units
+            of work estimated to take longest are submitted first, see
+            Core.run's timings.
+
+            Keyword arguments:
+            features -- Iterable of prepared features.
+        """
+        self.cancellation = self._cancellation()
+        submitted = [
+            (feature, [
+                (unit, [feature['elements'][index] for index in unit])
+                for unit in self._units(feature)
+            ])
+            for feature in features
+        ]
+        executor = self._executor()
+        try:
+            futures = {}
+            for unit, elements in longest_first(
+                [unit for feature, units in submitted for unit in units],
+                lambda unit: unit[1],
+            ):
+                futures[id(elements)] = self._submit(executor, elements)
+            self._futures = list(futures.values())
+            for feature, units in submitted:
+                self._merge(feature, [
+                    (unit, futures[id(elements)])
+                    for unit, elements in units
+                ])
+        finally:
+            if self._deadline is None:
+                executor.shutdown()
+            else:
+                self._abandon(executor)
+
+    def _merge(self, feature, units):
+        """
+            Wait for a feature's units of work, then merge their results.
+        """
+        results = [None] * len(feature['elements'])
+        for unit, future in units:
+            unit_results = self._result(future)
+            if unit_results is not None:
+                for index, result in zip(unit, unit_results):
+                    results[index] = result
+        merge_feature(self.logger, feature, results)
+
+    def _result(self, future):
+        """
+            Wait for a unit of work's results, unless the run is cancelled
+            and the unit doesn't finish within the grace period.
+
+            Returns:
+            The list of (stats, records) tuples, or None if the unit was
+            dropped or given up on.
+        """
+        while not self.cancellation.cancelled:
+            done, running = wait([future], POLL_INTERVAL)
+            if done:
+                return future.result()
+        if self._deadline is None:
+            self._deadline = time.time() + self.grace
+            self._drop_pending()
+        try:
+            return future.result(max(0, self._deadline - time.time()))
+        except (CancelledError, TimeoutError):
+            return None
+
+    def _drop_pending(self):
+        """
+            Cancel the units of work that haven't started.
+        """
+        for future in self._futures:
+            future.cancel()
+
+
+class ProcessPoolRunner(PoolRunner):
+    """
+        Runs features across a pool of worker processes, for suites whose
+        steps are CPU bound.
+
+        Each worker imports the core's step modules once. Only steps from
+        modules loaded with Core.load_steps are available to workers.
+        Worker processes still running after the grace period of a
+        cancelled run are terminated.
+    """
+
+    def __init__(self, core, logger, verbose=True, processes=None,
+                 granularity=SCENARIO, fail_fast=False, grace=DEFAULT_GRACE):
+        """
+            Initialise a process pool runner.
+
+            Keyword arguments:
+            processes -- The number of worker processes. Defaults to the
+                         number of CPUs.
+            Others as for PoolRunner.
+        """
+        super(ProcessPoolRunner, self).__init__(
+            core, logger, verbose, processes, granularity, fail_fast, grace)
+        self.step_modules = tuple(core.step_modules)
+
+    def _cancellation(self):
+        return Cancellation(multiprocessing.Event())
+
+    def _executor(self):
+        return _process_pool(self.workers, self.cancellation)
+
+    def _submit(self, executor, elements):
+        return executor.submit(run_elements, self.step_modules,
+                               self.verbose, elements, self.fail_fast,
+                               self.level)
+
+    def _abandon(self, executor):
+        _terminate(executor)
+
+
+class ThreadPoolRunner(PoolRunner):
+    """
+        Runs features across a pool of threads sharing the core's steps,
+        for suites whose steps mostly wait on I/O.
+
+        Each scenario, and each outline example row, gets its own
+        romaine.runner.scenario_context, so steps can keep their state
+        there rather than in globals shared between threads.
+
+        Threads can't be interrupted, so those still running after the
+        grace period of a cancelled run are left to stop at the end of
+        their step.
+    """
+
+    def __init__(self, core, logger, verbose=True, threads=None,
+                 granularity=SCENARIO, fail_fast=False, grace=DEFAULT_GRACE):
+        """
+            Initialise a thread pool runner.
+
+            Keyword arguments:
+            threads -- The number of threads. Defaults to
+                       ThreadPoolExecutor's default.
+            Others as for PoolRunner.
+        """
+        super(ThreadPoolRunner, self).__init__(
+            core, logger, verbose, threads, granularity, fail_fast, grace)
+
+    def _executor(self):
+        return ThreadPoolExecutor(self.workers)
+
+    def _submit(self, executor, elements):
+        return executor.submit(run_buffered, self.core, self.verbose,
+                               elements, self.fail_fast, self.cancellation,
+                               self.level)
+
+
+class WorkStealingScheduler(object):
+    """
+        Hands units of work out to a fixed set of workers.
+
+        Each worker has a deque of its own, which it takes units from the
+        front of. A worker whose deque is empty steals from the back of the
+        fullest other deque: the units of the last feature in it, up to
+        half the deque, so thieves take work the victim would get to last.
+        A feature with more units than that is split between the victim
+        and the thief.
+    """
+
+    def __init__(self, workers):
+        """
+            Initialise a scheduler with empty deques.
+
+            Keyword arguments:
+            workers -- The number of workers.
+        """
+        self._deques = [collections.deque() for _ in range(workers)]
+        self._locks = [threading.Lock() for _ in range(workers)]
+        self._steals_lock = threading.Lock()
+        self.steals = 0
+
+    def push(self, worker, feature, unit):
+        """
+            Add a unit of work to the back of a worker's deque.
+
+            Keyword arguments:
+            worker -- The index of the worker.
+            feature -- Something identifying the unit's feature.
+            unit -- The unit of work.
+        """
+        with self._locks[worker]:
+            self._deques[worker].append((feature, unit))
+
+    def take(self, worker):
+        """
+            Take the next unit of work for a worker, stealing if its own
+            deque is empty.
+
+            Keyword arguments:
+            worker -- The index of the worker.
+
+            Returns:
+            The unit of work, or None once every deque is empty.
+        """
+        own = self._deques[worker]
+        with self._locks[worker]:
+            if own:
+                return own.popleft()[1]
+
+        while True:
+            others = [
+                index
+                for index, deque in enumerate(self._deques)
+                if index != worker and deque
+            ]
+            if not others:
+                return None
+            victim = max(others, key=lambda index: len(self._deques[index]))
+            with self._locks[victim]:
+                stolen = self._steal_from(self._deques[victim])
+            if stolen:
+                break
+
+        with self._steals_lock:
+            self.steals += 1
+        with self._locks[worker]:
+            own.extend(stolen[1:])
+        return stolen[0][1]
+
+    def clear(self):
+        """
+            Drop every unit of work not yet taken.
+        """
+        for deque, lock in zip(self._deques, self._locks):
+            with lock:
+                deque.clear()
+
+    @staticmethod
+    def _steal_from(deque):
+        """
+            Pop the units of the last feature in a deque, up to half of it.
+            Must be called with the deque's lock held.
+
+            Returns:
+            List of the (feature, unit) tuples in their original order.
+        """
+        if not deque:
+            return []
+        feature = deque[-1][0]
+        limit = max(1, len(deque) // 2)
+        stolen = []
+        while deque and len(stolen) < limit and deque[-1][0] == feature:
+            stolen.append(deque.pop())
+        stolen.reverse()
+        return stolen
+
+
+class WorkStealingRunner(PoolRunner):
+    """
+        Runs features on a fixed set of workers that balance their load by
+        work stealing, for suites whose scenario durations are uneven and
+        not known in advance.
+
+        Whole features are first dealt out to the least loaded worker,
+        longest first, by their estimated durations or, without a timing
+        history, their number of scenarios. Each worker is a thread, which
+        with processes set runs its units in a worker process of its own.
+    """
+
+    def __init__(self, core, logger, verbose=True, workers=4,
+                 processes=False, granularity=SCENARIO, fail_fast=False,
+                 grace=DEFAULT_GRACE):
+        """
+            Initialise a work stealing runner.
+
+            Keyword arguments:
+            workers -- The number of workers.
+            processes -- Whether each worker runs its units in a process
+                         of its own, loading the core's step modules once.
+            Others as for PoolRunner.
+        """
+        super(WorkStealingRunner, self).__init__(
+            core, logger, verbose, workers, granularity, fail_fast, grace)
+        self.processes = processes
+        self.step_modules = tuple(core.step_modules)
+        self.scheduler = None
+        self._executors = []
+
+    def _cancellation(self):
+        if self.processes:
+            return Cancellation(multiprocessing.Event())
+        return Cancellation()
+
+    def _drop_pending(self):
+        self.scheduler.clear()
+        super(WorkStealingRunner, self)._drop_pending()
+
+    def _executor(self):
+        """
+            Get a worker's own process pool, or None if units run on the
+            worker's thread.
+        """
+        if not self.processes:
+            return None
+        executor = _process_pool(1, self.cancellation)
+        self._executors.append(executor)
+        return executor
+
+    def _submit(self, executor, elements):
+        if executor is not None:
+            return executor.submit(run_elements, self.step_modules,
+                                   self.verbose, elements, self.fail_fast,
+                                   self.level)
+        future = Future()
+        future.set_result(run_buffered(
+            self.core,
+            self.verbose,
+            elements,
+            self.fail_fast,
+            self.cancellation,
+            self.level,
+        ))
+        return future
+
+    def _deal(self, submitted):
+        """
+            Deal each feature's units out to the least loaded worker.
+        """
+        def load_of(units):
+            elements = [
+                element for unit, elements, future in units
+                for element in elements
+            ]
+            return estimate_of(elements) or len(elements)
+
+        loads = [0] * self.workers
+        for feature, units in sorted(
+            submitted,
+            key=lambda feature_units: load_of(feature_units[1]),
+            reverse=True,
+        ):
+            worker = loads.index(min(loads))
+            loads[worker] += load_of(units)
+            for unit, elements, future in units:
+                self.scheduler.push(worker, id(feature), (elements, future))
+
+    def _work(self, worker):
+        """
+            Run units of work until there are none left to take or steal.
+        """
+        executor = self._executor()
+        try:
+            while True:
+                taken = self.scheduler.take(worker)
+                if taken is None:
+                    return
+                elements, future = taken
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    result = self._submit(executor, elements).result()
+                except Exception as error:
+                    future.set_exception(error)
+                except BaseException as error:
+                    # Not left pending, or the merge would wait forever
+                    future.set_exception(error)
+                    raise
+                else:
+                    future.set_result(result)
+        finally:
+            if executor is not None and self._deadline is None:
+                executor.shutdown()
+
+    def run_features(self, features):
+        """
+            Run features prepared by romaine.runner.prepare_feature.
+
+            Keyword arguments:
+            features -- Iterable of prepared features.
+        """
+        self.cancellation = self._cancellation()
+        submitted = [
+            (feature, [
+                (
+                    unit,
+                    [feature['elements'][index] for index in unit],
+                    Future(),
+                )
+                for unit in self._units(feature)
+            ])
+            for feature in features
+        ]
+        self._futures = [
+            future
+            for feature, units in submitted
+            for unit, elements, future in units
+        ]
+        self.scheduler = WorkStealingScheduler(self.workers)
+        self._deal(submitted)
+        threads = [
+            threading.Thread(target=self._work, args=(worker,))
+            for worker in range(self.workers)
+        ]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for feature, units in submitted:
+            self._merge(feature, [
+                (unit, future) for unit, elements, future in units
+            ])
+        if self._deadline is None:
+            for thread in threads:
+                thread.join()
+        else:
+            for executor in self._executors:
+                _terminate(executor)
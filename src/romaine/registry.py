@@ -0,0 +1,239 @@
+import threading
+
+from contextlib import contextmanager
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+from romaine import exc
+from romaine.converters import default_converters
+
+# Resolutions of this many distinct step texts are remembered per registry
+RESOLUTION_CACHE_SIZE = 4096
+
+
+# Registries that Step decorators should write to, per thread
+_active = threading.local()
+
+
+class StepRegistry(Mapping):
+    """
+        Step definitions known to one run, keyed by step name.
+
+        Registration is serialised by a lock and replaces the underlying
+        dict rather than mutating it, so readers never need the lock: they
+        always see a complete snapshot. Registrations made inside a
+        batching block are added together when it ends, so loading a
+        module copies the dict once rather than once per step. Once
+        frozen, the registry rejects further registrations and can be
+        shared freely between threads.
+
+        Steps are compiled as they are registered, so resolving step text
+        only has to match patterns and apply the precompiled converters.
+    """
+
+    def __init__(self, converters=None):
+        """
+            Initialise an empty, unfrozen step registry.
+
+            Keyword arguments:
+            converters -- ConverterRegistry for placeholder types in step
+                          names. Defaults to romaine.converters'
+                          default_converters.
+        """
+        # Registered steps by name, the steps with placeholders, and cached
+        # resolutions, always replaced together so readers see one snapshot
+        self._state = ({}, (), {})
+        self._lock = threading.Lock()
+        # Registrations waiting for the end of a batching block, per thread
+        self._batching = threading.local()
+        self.converters = converters or default_converters
+        self.frozen = False
+
+    def register(self, step):
+        """
+            Add a step definition to the registry.
+
+            Keyword arguments:
+            step -- The Step to add, keyed by its name.
+        """
+        step.compile(self.converters)
+        if self.frozen:
+            raise exc.RegistryFrozenError(step.name)
+        pending = getattr(self._batching, 'pending', None)
+        if pending is not None:
+            pending.append(step)
+        else:
+            self._add([step])
+
+    def _add(self, new_steps):
+        with self._lock:
+            if self.frozen:
+                raise exc.RegistryFrozenError(new_steps[0].name)
+            steps = dict(self._state[0])
+            for step in new_steps:
+                steps[step.name] = step
+            self._set_steps(steps)
+
+    @contextmanager
+    def batching(self):
+        """
+            Hold registrations made on this thread until the block ends,
+            then add them all at once. Blocks may nest; the outermost one
+            adds the steps.
+        """
+        batching = self._batching
+        if getattr(batching, 'pending', None) is not None:
+            yield self
+            return
+        batching.pending = []
+        try:
+            yield self
+        finally:
+            pending, batching.pending = batching.pending, None
+            if pending:
+                self._add(pending)
+
+    def replace_module(self, module_name, steps):
+        """
+            Replace every step defined in a module in one go, e.g. after
+            the module has been reloaded. Steps the module no longer
+            defines are dropped.
+
+            Keyword arguments:
+            module_name -- The dotted name of the module.
+            steps -- Iterable of the module's new Steps.
+        """
+        steps = list(steps)
+        for step in steps:
+            step.compile(self.converters)
+        with self._lock:
+            if self.frozen:
+                raise exc.RegistryFrozenError(module_name)
+            replaced = dict(
+                (name, step)
+                for name, step in self._state[0].items()
+                if getattr(step.func, '__module__', None) != module_name
+            )
+            for step in steps:
+                replaced[step.name] = step
+            self._set_steps(replaced)
+
+    def _set_steps(self, steps):
+        """
+            Replace the registered steps, discarding cached resolutions.
+            Must be called with the lock held.
+        """
+        patterned = tuple(
+            step for step in steps.values() if step.pattern is not None
+        )
+        self._state = (steps, patterned, {})
+
+    def resolve(self, text):
+        """
+            Find the step definition for some step text.
+
+            Keyword arguments:
+            text -- The step text, without its Given/When/Then keyword.
+
+            Returns:
+            Tuple of (step, arguments), or None if no step matches. Exact
+            names take precedence over names with placeholders.
+        """
+        step, captures = self._lookup(text)
+        if step is None:
+            return None
+        return step, step.convert(captures)
+
+    def find(self, text):
+        """
+            Find the step definition for some step text without converting
+            its arguments.
+
+            Keyword arguments:
+            text -- The step text, without its Given/When/Then keyword.
+
+            Returns:
+            The matching Step, or None.
+        """
+        return self._lookup(text)[0]
+
+    def _lookup(self, text):
+        text = text.strip()
+        steps, patterned, resolved = self._state
+        try:
+            return resolved[text]
+        except KeyError:
+            pass
+        step, captures = self._match(steps, patterned, text)
+        if len(resolved) >= RESOLUTION_CACHE_SIZE:
+            resolved.clear()
+        resolved[text] = (step, captures)
+        return step, captures
+
+    @staticmethod
+    def _match(steps, patterned, text):
+        step = steps.get(text)
+        if step is not None and step.pattern is None:
+            return step, ()
+        for step in patterned:
+            captures = step.match(text)
+            if captures is not None:
+                return step, captures
+        return None, None
+
+    def freeze(self):
+        """
+            Stop accepting registrations.
+
+            Returns:
+            The registry, so a run can freeze and use it in one expression.
+        """
+        with self._lock:
+            self.frozen = True
+        return self
+
+    def __getitem__(self, name):
+        return self._state[0][name]
+
+    def __iter__(self):
+        return iter(self._state[0])
+
+    def __len__(self):
+        return len(self._state[0])
+
+
+def active_registry():
+    """
+        Get the registry that steps are currently being registered into.
+
+        Returns:
+        The innermost registry activated on this thread with
+        registering_into, or None if there is none.
+    """
+    stack = getattr(_active, 'stack', None)
+    if stack:
+        return stack[-1]
+    return None
+
+
+@contextmanager
+def registering_into(registry):
+    """
+        Direct step registrations made on this thread to the given registry,
+        adding them together when the block ends.
+
+        Keyword arguments:
+        registry -- The StepRegistry that decorated steps should be added to.
+    """
+    stack = getattr(_active, 'stack', None)
+    if stack is None:
+        stack = _active.stack = []
+    stack.append(registry)
+    try:
+        with registry.batching():
+            yield registry
+    finally:
+        stack.pop()
@@ -0,0 +1,166 @@
+import hashlib
+import inspect
+import json
+
+from romaine import cache
+from romaine.outline import step_texts
+
+
+def _span(element):
+    """
+        Get the text of a prepared scenario or scenario outline, with its
+        background's steps, tags, tables and doc strings.
+    """
+    parts = [element.get('tags'), element['raw']]
+    for step in element['steps']:
+        parts.extend([step['raw'], step.get('multiline_arg')])
+    for example in element.get('examples', ()):
+        parts.append(example['raw'])
+    return json.dumps(parts, sort_keys=True)
+
+
+def _describe(func):
+    """
+        Describe a function whose source can't be read. Builtins, such as
+        int or the __getitem__ of a mapping of choices, are described the
+        same way in every process.
+    """
+    func = getattr(func, '__wrapped__', func)
+    code = getattr(func, '__code__', None)
+    if code is not None:
+        return repr(code)
+    name = getattr(func, '__qualname__', None) or getattr(
+        func, '__name__', None)
+    if name is None:
+        return repr(func)
+    owner = getattr(func, '__self__', None)
+    if owner is not None and not inspect.ismodule(owner):
+        name += ' of ' + repr(owner)
+    module = getattr(func, '__module__', None)
+    return name if module is None else '{}.{}'.format(module, name)
+
+
+class ResultCache(object):
+    """
+        The scenarios and scenario outlines that passed, with a key for
+        what each depended on, so they can be skipped while none of it has
+        changed.
+
+        A key is a hash of the element's text, including its background's
+        steps, the source of every step definition its steps resolve to and
+        of the converters of their placeholders, and the contents of the
+        declared input files. Other code that step definitions call isn't
+        part of the key, so declare it as an input.
+    """
+
+    def __init__(self, path=None, inputs=()):
+        """
+            Load a result cache.
+
+            Keyword arguments:
+            path -- The cache file. Defaults to results.json in the romaine
+                    cache directory.
+            inputs -- Iterable of paths of files every scenario depends on,
+                      e.g. test data or helper modules.
+        """
+        self.path = path or cache.cache_path('results.json')
+        # The key each scenario passed with, by scenario ID
+        self.passed = cache.load_json(self.path, {})
+        self.inputs = list(inputs)
+        self._inputs_digest = None
+        # Sources by function, and by step definition
+        self._sources = {}
+        self._step_sources = {}
+
+    def _digest_inputs(self):
+        if self._inputs_digest is None:
+            digest = hashlib.sha256()
+            for path in sorted(self.inputs):
+                digest.update(path.encode('utf-8') + b'\0')
+                try:
+                    with open(path, 'rb') as input_file:
+                        digest.update(input_file.read())
+                except (IOError, OSError):
+                    digest.update(b'<missing>')
+                digest.update(b'\0')
+            self._inputs_digest = digest.hexdigest()
+        return self._inputs_digest
+
+    def _func_source(self, func):
+        """
+            Get the source of a function, or of the one it wraps, falling
+            back to its byte code or, for builtins, its name.
+        """
+        source = self._sources.get(func)
+        if source is None:
+            try:
+                source = inspect.getsource(getattr(func, '__wrapped__', func))
+            except (IOError, OSError, TypeError):
+                source = _describe(func)
+            self._sources[func] = source
+        return source
+
+    def _source(self, step):
+        """
+            Get the source of a step definition, with its pattern and the
+            source of each converter it applies.
+        """
+        source = self._step_sources.get(step)
+        if source is None:
+            pattern = step.pattern.pattern if step.pattern else step.name
+            parts = [step.name, pattern, self._func_source(step.func)]
+            parts.extend(
+                self._func_source(convert) for convert in step.converters)
+            source = '\0'.join(parts)
+            self._step_sources[step] = source
+        return source
+
+    def key(self, element, steps):
+        """
+            Get the key of a prepared scenario or scenario outline.
+
+            Keyword arguments:
+            element -- The prepared element.
+            steps -- The StepRegistry its steps resolve in.
+        """
+        digest = hashlib.sha256()
+        digest.update(self._digest_inputs().encode('utf-8'))
+        digest.update(_span(element).encode('utf-8'))
+        for text in step_texts(element):
+            step = steps.find(text)
+            source = '<undefined>' if step is None else self._source(step)
+            digest.update(b'\0' + source.encode('utf-8'))
+        return digest.hexdigest()
+
+    def has_passed(self, element, key):
+        """
+            Whether an element passed the last time it ran with a key.
+        """
+        return self.passed.get(element['id']) == key
+
+    def record(self, features):
+        """
+            Record the keys of the elements of features that passed without
+            skipping any steps, and forget those that didn't.
+
+            Keyword arguments:
+            features -- Iterable of prepared features, after the logger has
+                        added stats to them and Core.run their
+                        'result_key's.
+        """
+        for feature in features:
+            for element in feature['elements']:
+                stats = element.get('stats')
+                if stats is None or stats.get('cancelled'):
+                    continue
+                passed = stats['passed'] and not stats['skipped_steps']
+                if passed and 'result_key' in element:
+                    self.passed[element['id']] = element['result_key']
+                else:
+                    self.passed.pop(element['id'], None)
+
+    def save(self):
+        """
+            Save the cache.
+        """
+        cache.save_json(self.path, self.passed)
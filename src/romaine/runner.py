@@ -0,0 +1,702 @@
+import collections
+import sys
+import threading
+
+from contextlib import contextmanager
+
+from romaine import exc
+from romaine.features import scenario_ids
+from romaine.outline import (
+    compile_template,
+    example_hashes,
+    example_templates,
+    fill_template,
+)
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+try:
+    from contextvars import ContextVar
+except ImportError:
+    ContextVar = None
+
+
+class _LocalVar(object):
+    """
+        Stand-in for a ContextVar on Pythons without contextvars, holding
+        a value per thread.
+    """
+
+    def __init__(self):
+        self._local = threading.local()
+
+    def get(self):
+        return getattr(self._local, 'value', None)
+
+    def set(self, value):
+        previous = self.get()
+        self._local.value = value
+        return previous
+
+    def reset(self, previous):
+        self._local.value = previous
+
+
+# The context of the running scenario, separate for each thread and each
+# asyncio task
+if ContextVar is not None:
+    _running = ContextVar('romaine_scenario_context', default=None)
+else:
+    _running = _LocalVar()
+
+# The contexts of the rows a step defined with batch=True is called for
+if ContextVar is not None:
+    _rows = ContextVar('romaine_row_contexts', default=None)
+else:
+    _rows = _LocalVar()
+
+
+class ScenarioContext(object):
+    """
+        Somewhere for steps to keep state for the scenario, or outline
+        example row, being run. Set any attributes on it.
+
+        Its async def steps all run on one event loop, so tasks, queues
+        and locks one step makes can be used by the next.
+    """
+    # The event loop its async def steps run on, made for the first one
+    _event_loop = None
+
+
+def close_scenario_loop(context):
+    """
+        Close the event loop of a scenario's async def steps, if it has
+        one, cancelling any tasks they left running.
+    """
+    loop = context._event_loop
+    if loop is None:
+        return
+    context._event_loop = None
+    try:
+        all_tasks = getattr(asyncio, 'all_tasks', None) or \
+            asyncio.Task.all_tasks
+        tasks = [task for task in all_tasks(loop) if not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            loop.run_until_complete(
+                asyncio.gather(*tasks, return_exceptions=True))
+        loop.run_until_complete(loop.shutdown_asyncgens())
+    finally:
+        loop.close()
+
+
+def scenario_context():
+    """
+        Get the context of the running scenario.
+
+        Returns:
+        The ScenarioContext, or None outside of a run.
+    """
+    return _running.get()
+
+
+def row_contexts():
+    """
+        Get the contexts of the outline example rows a step defined with
+        batch=True is called for, in the order of its argument tuples.
+
+        Returns:
+        List of ScenarioContexts: outside of a batch call, the running
+        scenario's alone, or none outside of a run.
+    """
+    contexts = _rows.get()
+    if contexts is not None:
+        return list(contexts)
+    context = _running.get()
+    return [context] if context is not None else []
+
+
+@contextmanager
+def running_scenario(context=None):
+    """
+        Give the code run inside a ScenarioContext, a fresh one unless
+        given one. A fresh one's event loop is closed at the end; closing
+        that of one given is left to the caller, see close_scenario_loop.
+    """
+    fresh = context is None
+    if fresh:
+        context = ScenarioContext()
+    token = _running.set(context)
+    try:
+        yield
+    finally:
+        _running.reset(token)
+        if fresh:
+            close_scenario_loop(context)
+
+
+def run_coroutine(coroutine):
+    """
+        Run a coroutine, such as a call of an async def step, to completion
+        on the running scenario's event loop, or a new one outside of a
+        scenario.
+
+        Returns:
+        The coroutine's result.
+    """
+    context = scenario_context()
+    if context is not None:
+        if context._event_loop is None:
+            context._event_loop = asyncio.new_event_loop()
+        return context._event_loop.run_until_complete(coroutine)
+    run = getattr(asyncio, 'run', None)
+    if run is not None:
+        return run(coroutine)
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+# Seconds runners wait for work in flight to stop once a run is cancelled,
+# before giving up on it
+DEFAULT_GRACE = 10.0
+
+# Seconds between checks for cancellation while waiting on work
+POLL_INTERVAL = 0.05
+
+# The most outline example rows run together when a step is defined with
+# batch=True
+BATCH_SIZE = 1000
+
+
+class Cancellation(object):
+    """
+        A signal to runners sharing it to stop: to start no more scenarios,
+        and to stop those running before their next step.
+    """
+
+    def __init__(self, event=None):
+        """
+            Initialise a cancellation.
+
+            Keyword arguments:
+            event -- The event to signal through, e.g. a
+                     multiprocessing.Event to share with worker processes.
+                     Defaults to a new threading.Event.
+        """
+        self.event = event if event is not None else threading.Event()
+
+    def cancel(self):
+        """
+            Tell every runner sharing this to stop.
+        """
+        self.event.set()
+
+    @property
+    def cancelled(self):
+        return self.event.is_set()
+
+
+def cancelled_stats():
+    """
+        Get the stats of a scenario or scenario outline cancelled before it
+        started. Those cancelled part way through have their usual stats,
+        with 'cancelled' set too.
+    """
+    return {
+        'passed_steps': 0,
+        'failed_steps': 0,
+        'skipped_steps': 0,
+        'total_steps': 0,
+        'passed': False,
+        'failed': False,
+        'cancelled': True,
+        'duration': None,
+    }
+
+
+def batch_outcomes(results, rows):
+    """
+        Get the outcome of each row from what a step defined with
+        batch=True returned.
+
+        Keyword arguments:
+        results -- What the step returned, see romaine.steps.Step.
+        rows -- The number of rows the step was called with.
+
+        Returns:
+        List of the exception each row failed or was skipped with, or None
+        for rows that passed.
+
+        Raises:
+        ValueError if results doesn't have an outcome for every row.
+    """
+    if results is None:
+        return [None] * rows
+    outcomes = [
+        result if isinstance(result, BaseException) else None
+        for result in results
+    ]
+    if len(outcomes) != rows:
+        raise ValueError(
+            'A batch step returned {} outcomes for {} rows.'.format(
+                len(outcomes), rows))
+    return outcomes
+
+
+def _failed(outcomes):
+    """
+        Whether a row's step outcomes include a failure, rather than only
+        passes and skips.
+    """
+    return any(
+        outcome is not None and not isinstance(outcome, exc.SkipTest)
+        for outcome in outcomes
+    )
+
+
+def _outcome(definition, arguments):
+    """
+        Call a step definition for one row of arguments.
+
+        Returns:
+        The exception the step raised, or None if it passed.
+    """
+    try:
+        if definition.batch:
+            result = definition.func([arguments])
+        else:
+            result = definition.func(*arguments)
+        if definition.is_async:
+            result = run_coroutine(result)
+        if definition.batch:
+            return batch_outcomes(result, 1)[0]
+    except Exception as error:
+        return error
+    return None
+
+
+def fill_step_with_example_row(step, row, template=None):
+    """
+        Get a copy of an outline step, filled from an example row.
+
+        Keyword arguments:
+        step -- The step.
+        row -- The row, as a dict from example_hashes.
+        template -- The step's compiled template, see
+                    romaine.outline.compile_template. Compiled from the
+                    step if not given.
+    """
+    if template is None:
+        template, unknown = compile_template(step['text'], row)
+    step = step.copy()
+    step['text'] = fill_template(template, row)
+    return step
+
+
+def prepare_feature(path, feature, scenarios=None):
+    """
+        Get a copy of a parsed feature to run, so the stats the logger adds
+        don't leak into the parsed feature, which may be reused.
+
+        Each scenario and scenario outline gets the background's steps
+        before its own, and each example gets the 'hashes' the logger fills
+        outline steps from, the 'templates' of the steps to fill, and the
+        'unknown_placeholders' the logger warns of, as (step, name) tuples
+        for text such as <name> with no column of that name.
+
+        Keyword arguments:
+        path -- The path of the feature file.
+        feature -- The parsed feature.
+        scenarios -- Collection of scenario IDs to run, see
+                     romaine.features.scenario_ids, or None to run all.
+
+        Returns:
+        The feature dict to run.
+    """
+    background = feature['background']
+    background_steps = background['steps'] if background else []
+    elements = []
+    for scenario_id, element in zip(scenario_ids(path, feature),
+                                    feature['elements']):
+        if scenarios is not None and scenario_id not in scenarios:
+            continue
+        element = dict(element)
+        element['id'] = scenario_id
+        element['steps'] = [
+            dict(step) for step in background_steps + element['steps']
+        ]
+        if element['type'] == 'scenario outline':
+            examples = []
+            for example in element.get('examples', ()):
+                templates, unknown = example_templates(
+                    element['steps'], example)
+                examples.append(dict(
+                    example,
+                    hashes=example_hashes(example),
+                    templates=templates,
+                    unknown_placeholders=unknown,
+                ))
+            element['examples'] = examples
+        elements.append(element)
+    feature = dict(feature)
+    feature['path'] = path
+    feature['elements'] = elements
+    return feature
+
+
+class Runner(object):
+    """
+        Runs parsed features through a logger's contexts.
+
+        A failing or erroring scenario, or outline example row, stops at
+        the failing step and the run moves on to the next one, unless the
+        runner fails fast.
+
+        Once the run is cancelled, the scenario running stops before its
+        next step, and those not yet started are reported as cancelled.
+    """
+
+    def __init__(self, core, logger, verbose=True, fail_fast=False,
+                 cancellation=None):
+        """
+            Initialise a runner.
+
+            Keyword arguments:
+            core -- The romaine Core with the step definitions to run.
+            logger -- An entered AbstractRomaineLogger to report to.
+            verbose -- Whether passing steps are logged at INFO rather than
+                       DEBUG level.
+            fail_fast -- Whether to cancel the run after the first
+                         scenario, or outline example row, that fails.
+            cancellation -- The Cancellation to stop at, shared with other
+                            runners. Defaults to a new one.
+        """
+        self.core = core
+        self.logger = logger
+        self.verbose = verbose
+        self.fail_fast = fail_fast
+        if cancellation is None:
+            cancellation = Cancellation()
+        self.cancellation = cancellation
+
+    def run_features(self, features):
+        """
+            Run features prepared by prepare_feature, in order.
+
+            Keyword arguments:
+            features -- Iterable of prepared features.
+        """
+        for feature in features:
+            if self.cancellation.cancelled:
+                self.logger.cancelled(feature['elements'])
+            else:
+                self.run_feature(feature)
+
+    def run_feature(self, feature):
+        """
+            Run a feature prepared by prepare_feature.
+        """
+        with self.logger.in_feature(feature):
+            for element in feature['elements']:
+                self.run_element(element)
+
+    def run_element(self, element):
+        """
+            Run a prepared scenario or scenario outline.
+        """
+        if self.cancellation.cancelled:
+            element['stats'] = cancelled_stats()
+        elif element['type'] == 'scenario outline':
+            self.run_scenario_outline(element)
+        else:
+            self.run_scenario(element)
+
+    def run_scenario(self, scenario):
+        """
+            Run a prepared scenario, logging anything it raises.
+        """
+        finished = True
+        try:
+            with self.logger.in_scenario(scenario), running_scenario():
+                finished = self.run_steps(scenario['steps'])
+        except Exception:
+            self.logger.handle_exception(*sys.exc_info())
+        if not finished:
+            scenario['stats']['cancelled'] = True
+        self._check(scenario['steps'])
+
+    def run_scenario_outline(self, outline):
+        """
+            Run every example row of a prepared scenario outline.
+        """
+        logger = self.logger
+        finished = True
+        with logger.in_scenario_outline(outline):
+            for example in outline['examples']:
+                with logger.in_scenario_outline_example(example):
+                    finished = self.run_example(outline, example)
+                if not finished:
+                    break
+        # A row that failed, failing fast, cancels the rest, but the
+        # outline is reported as failed rather than cancelled
+        if not finished and not outline['stats']['failed']:
+            outline['stats']['cancelled'] = True
+
+    def run_example(self, outline, example):
+        """
+            Run every row of a prepared example, in chunks of BATCH_SIZE
+            rows if one of the outline's steps is defined with batch=True.
+
+            Returns:
+            False if the run was cancelled before every row finished,
+            otherwise True.
+        """
+        rows = len(example['hashes'])
+        if not self._is_batched(outline, example):
+            for index in range(rows):
+                if not self.run_example_row(example, index):
+                    return False
+            return True
+        for start in range(0, rows, BATCH_SIZE):
+            indexes = range(start, min(start + BATCH_SIZE, rows))
+            if not self.run_example_chunk(outline, example, indexes):
+                return False
+        return True
+
+    def _is_batched(self, outline, example):
+        """
+            Whether any of an outline's steps, filled from an example's
+            first row, is defined with batch=True.
+        """
+        if not example['hashes']:
+            return False
+        row = example['hashes'][0]
+        find = self.core.steps.find
+        for template in example['templates']:
+            definition = find(fill_template(template, row))
+            if definition is not None and definition.batch:
+                return True
+        return False
+
+    def run_example_chunk(self, outline, example, indexes):
+        """
+            Run some rows of a prepared example together: each row runs its
+            steps, row after row, up to one defined with batch=True, which
+            is then called once for every row that reached it, and so on.
+            Other steps run with the row's own scenario_context. The rows
+            are then logged one by one, as if each had run alone, except
+            that their steps take no time.
+
+            When failing fast, the rows after the first that fails are left
+            out, as if the run had been cancelled before them.
+
+            Keyword arguments:
+            outline -- The prepared scenario outline.
+            example -- One of its examples.
+            indexes -- The indexes of the rows to run.
+
+            Returns:
+            False if the run was cancelled before the rows finished,
+            otherwise True.
+        """
+        if self.cancellation.cancelled:
+            return False
+        outcomes, finished = self._run_chunk(outline, example, indexes)
+        verbose = self.verbose
+        for index in indexes:
+            if index not in outcomes:
+                continue
+            steps = ()
+            try:
+                with self.logger.in_scenario_outline_example_row(
+                    example, index
+                ) as steps:
+                    for step, outcome in zip(steps, outcomes[index]):
+                        with self.logger.in_step(step, verbose):
+                            if outcome is not None:
+                                raise outcome
+            except Exception:
+                self.logger.handle_exception(*sys.exc_info())
+            self._check(steps)
+        return finished
+
+    def _run_chunk(self, outline, example, indexes):
+        """
+            Run the steps of some rows of a prepared example, as
+            run_example_chunk does, without logging them.
+
+            Returns:
+            Tuple of a dict of the outcome of each step run for each row to
+            log, by row index, and whether the rows finished before the run
+            was cancelled.
+        """
+        rows = example['hashes']
+        templates = example['templates']
+        steps = outline['steps']
+        contexts = dict((index, ScenarioContext()) for index in indexes)
+        outcomes = dict((index, []) for index in indexes)
+        resolve = self.core.steps.resolve
+
+        def cancelled():
+            return dict(
+                (index, row) for index, row in outcomes.items() if row
+            ), False
+
+        running = list(indexes)
+        try:
+            while running:
+                batches = collections.OrderedDict()
+                for index in running:
+                    row = outcomes[index]
+                    while len(row) < len(steps):
+                        if self.cancellation.cancelled:
+                            return cancelled()
+                        step = steps[len(row)]
+                        text = fill_template(templates[len(row)], rows[index])
+                        resolved = resolve(text)
+                        if resolved is None:
+                            row.append(exc.UnimplementedStepError(
+                                dict(step, text=text)))
+                            break
+                        definition, arguments = resolved
+                        if definition.batch:
+                            batches.setdefault(definition, []).append(
+                                (index, arguments))
+                            break
+                        with running_scenario(contexts[index]):
+                            row.append(_outcome(definition, arguments))
+                        if row[-1] is not None:
+                            break
+                    if self.fail_fast and _failed(row):
+                        break
+                for definition, batch in batches.items():
+                    if self.cancellation.cancelled:
+                        return cancelled()
+                    batch_results = self._run_batch(
+                        definition, batch, contexts)
+                    for (index, arguments), outcome in zip(
+                        batch, batch_results
+                    ):
+                        outcomes[index].append(outcome)
+                running = [
+                    index for index in running
+                    if len(outcomes[index]) < len(steps)
+                    and (not outcomes[index] or outcomes[index][-1] is None)
+                ]
+                if self.fail_fast:
+                    failed = [
+                        index for index in indexes
+                        if index in outcomes and _failed(outcomes[index])
+                    ]
+                    if failed:
+                        first = min(failed)
+                        for index in indexes:
+                            if index > first:
+                                outcomes.pop(index, None)
+                        running = [
+                            index for index in running if index < first
+                        ]
+            return outcomes, len(outcomes) == len(indexes)
+        finally:
+            for context in contexts.values():
+                close_scenario_loop(context)
+
+    def _run_batch(self, definition, batch, contexts):
+        """
+            Call a step defined with batch=True once for some rows, with
+            row_contexts giving their contexts.
+
+            Keyword arguments:
+            definition -- The step definition.
+            batch -- List of (row index, arguments) tuples.
+            contexts -- Dict of the rows' ScenarioContexts, by row index.
+
+            Returns:
+            List of the outcome of each row, see batch_outcomes.
+        """
+        token = _rows.set([contexts[index] for index, arguments in batch])
+        try:
+            with running_scenario():
+                result = definition.func(
+                    [arguments for index, arguments in batch])
+                if definition.is_async:
+                    result = run_coroutine(result)
+            return batch_outcomes(result, len(batch))
+        except Exception as error:
+            return [error] * len(batch)
+        finally:
+            _rows.reset(token)
+
+    def run_example_row(self, example, index):
+        """
+            Run one row of a prepared example, logging anything it raises.
+
+            Returns:
+            False if the run was cancelled before the row finished,
+            otherwise True.
+        """
+        if self.cancellation.cancelled:
+            return False
+        finished = True
+        steps = ()
+        try:
+            with self.logger.in_scenario_outline_example_row(
+                example, index
+            ) as steps, running_scenario():
+                finished = self.run_steps(steps)
+        except Exception:
+            self.logger.handle_exception(*sys.exc_info())
+        self._check(steps)
+        return finished
+
+    def _check(self, steps):
+        """
+            Cancel the run if it fails fast and one of the steps just run
+            failed.
+        """
+        if self.fail_fast and any(
+            step.get('stats', {}).get('failed') for step in steps
+        ):
+            self.cancellation.cancel()
+
+    def run_steps(self, steps):
+        """
+            Run steps in order, linking each to its definition as it comes
+            to run.
+
+            Returns:
+            False if the run was cancelled before every step had run,
+            otherwise True.
+
+            Raises:
+            UnimplementedStepError for a step with no definition, and
+            whatever a step definition raises.
+        """
+        in_step = self.logger.in_step
+        resolve = self.core.steps.resolve
+        verbose = self.verbose
+        cancellation = self.cancellation
+        for step in steps:
+            if cancellation.cancelled:
+                return False
+            resolved = resolve(step['text'])
+            with in_step(step, verbose):
+                if resolved is None:
+                    raise exc.UnimplementedStepError(step)
+                definition, arguments = resolved
+                if definition.batch:
+                    outcome = _outcome(definition, arguments)
+                    if outcome is not None:
+                        raise outcome
+                    continue
+                result = definition.func(*arguments)
+                if definition.is_async:
+                    run_coroutine(result)
+        return True
@@ -0,0 +1,104 @@
+import hashlib
+import os
+
+
+def shard_key(scenario_id):
+    """
+        Get the part of a scenario ID that stays the same on every machine
+        and however its path was given, i.e. with its path normalized,
+        relative to the working directory and with / as the path separator.
+    """
+    path, separator, description = scenario_id.partition('::')
+    if os.path.isabs(path):
+        path = os.path.relpath(path)
+    path = os.path.normpath(path)
+    return path.replace(os.sep, '/') + separator + description
+
+
+def stable_hash(scenario_id):
+    """
+        Get a hash of a scenario ID that is the same in every process and
+        on every machine, unlike hash().
+    """
+    digest = hashlib.md5(shard_key(scenario_id).encode('utf-8')).hexdigest()
+    return int(digest, 16)
+
+
+class Shard(object):
+    """
+        One of several slices of a run, e.g. for one of several CI jobs.
+
+        Every shard works out which scenarios are its own from the scenario
+        IDs alone, so shards need no coordination and together run each
+        scenario exactly once.
+    """
+
+    def __init__(self, index, total, timings=None):
+        """
+            Initialise a shard.
+
+            Keyword arguments:
+            index -- The shard's number, from 1 to total.
+            total -- The number of shards.
+            timings -- A romaine.timings.TimingHistory to balance shards'
+                       durations by, or None to assign scenarios by hash.
+                       Every shard must use the same history.
+        """
+        if not 1 <= index <= total:
+            raise ValueError(
+                'Shard {} is not between 1 and {}.'.format(index, total))
+        self.index = index
+        self.total = total
+        self.timings = timings
+
+    @classmethod
+    def parse(cls, text, timings=None):
+        """
+            Get a shard from text of the form INDEX/TOTAL, e.g. 2/20.
+        """
+        index, separator, total = text.partition('/')
+        try:
+            return cls(int(index), int(total), timings)
+        except ValueError:
+            raise ValueError(
+                'Shard {!r} is not of the form INDEX/TOTAL.'.format(text))
+
+    def select(self, scenario_ids):
+        """
+            Get the scenarios in this shard.
+
+            Without a timing history, a scenario's shard depends only on
+            its own ID. With one, scenarios are dealt out longest first to
+            the shard with the least estimated time so far, so a scenario's
+            shard depends on the whole corpus.
+
+            Keyword arguments:
+            scenario_ids -- Iterable of the IDs of every scenario in the
+                            run, see romaine.features.scenario_ids.
+
+            Returns:
+            Set of the IDs in this shard.
+        """
+        shard = self.index - 1
+        if self.timings is None:
+            return set(
+                scenario_id
+                for scenario_id in scenario_ids
+                if stable_hash(scenario_id) % self.total == shard
+            )
+
+        estimated = sorted(
+            set(scenario_ids),
+            key=lambda scenario_id: (
+                -self.timings.estimate(scenario_id),
+                stable_hash(scenario_id),
+            ),
+        )
+        loads = [0.0] * self.total
+        selected = set()
+        for scenario_id in estimated:
+            least = loads.index(min(loads))
+            loads[least] += self.timings.estimate(scenario_id)
+            if least == shard:
+                selected.add(scenario_id)
+        return selected
@@ -1,10 +1,26 @@
+import inspect
+
 from romaine.core import Core
+from romaine.registry import active_registry
 
 
 class Step(object):
     prefix = None
 
-    def __init__(self, name):
+    def __init__(self, name, batch=False):
+        """
+            Initialise a step definition, to decorate its function with.
+
+            Keyword arguments:
+            name -- The step text, with any placeholders.
+            batch -- Whether the function runs many outline example rows
+                     at once. It is called with a list of argument tuples,
+                     one per row, and returns None if every row passed,
+                     or a list with an outcome per row: the exception the
+                     row failed or was skipped with, or anything else if
+                     it passed. romaine.runner.row_contexts gives each
+                     row's scenario_context. See romaine.runner.BATCH_SIZE.
+        """
         self._raw_name = name
 
         if self.prefix is not None:
@@ -13,10 +29,66 @@ class Step(object):
                 name = name[len(prefix):]
         self.name = name.strip()
         self.func = None
+        # Whether func is an async def function, returning a coroutine
+        self.is_async = False
+        self.batch = batch
+        # Set by the registry the step is added to, see compile
+        self.pattern = None
+        self.converters = ()
+
+    def compile(self, converters):
+        """
+            Compile the step name into a pattern and argument converters.
+
+            Keyword arguments:
+            converters -- The ConverterRegistry to look placeholder types up
+                          in.
+        """
+        self.pattern, self.converters = converters.compile(self.name)
+
+    def match(self, text):
+        """
+            Match step text against this step's pattern.
+
+            Keyword arguments:
+            text -- The step text, without its Given/When/Then keyword.
+
+            Returns:
+            Tuple of captured strings, or None if the text does not match.
+        """
+        if self.pattern is None:
+            return () if text == self.name else None
+        match = self.pattern.match(text)
+        if match is None:
+            return None
+        return match.groups()
+
+    def convert(self, captures):
+        """
+            Convert captured strings into the step function's arguments.
+
+            Keyword arguments:
+            captures -- Tuple of strings as returned by match.
+
+            Returns:
+            Tuple of converted arguments.
+        """
+        if not captures:
+            return ()
+        return tuple([
+            convert(capture)
+            for convert, capture in zip(self.converters, captures)
+        ])
 
     def __call__(self, func):
         self.func = func
-        Core.instance.steps[self.name] = self
+        iscoroutinefunction = getattr(inspect, 'iscoroutinefunction', None)
+        self.is_async = bool(
+            iscoroutinefunction and iscoroutinefunction(func))
+        registry = active_registry()
+        if registry is None:
+            registry = Core.instance.steps
+        registry.register(self)
         return func
 
 
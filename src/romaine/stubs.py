@@ -0,0 +1,232 @@
+import io
+import re
+
+from romaine.outline import example_hashes
+
+# Outline placeholders, e.g. <name>
+OUTLINE_PLACEHOLDER = re.compile(r'<([^<>]+)>')
+
+# Step types with a decorator of their own in romaine.steps; other types
+# (And, But) take the type of the step before them
+DECORATED_TYPES = ('Given', 'When', 'Then')
+
+
+def normalize_text(text):
+    """
+        Normalize step text for comparison as StepRegistry.resolve does:
+        surrounding space is removed. Space inside the text is kept, as
+        step definitions match it exactly.
+    """
+    return text.strip()
+
+
+def slugify(text):
+    """
+        Turn text into a lowercase identifier in a single pass, replacing
+        each character that is not alphanumeric with an underscore.
+    """
+    return ''.join([
+        char if char.isalnum() else '_'
+        for char in text.lower()
+    ])
+
+
+def _stub_pattern(text):
+    """
+        Get the step name of a stub for step text, with braces escaped and
+        outline <placeholders> as {placeholder}s, along with the stub
+        function's arguments and the text its name is made from.
+    """
+    # Each occurrence of a placeholder is captured, so it gets an argument
+    # of its own, numbered from the second occurrence on
+    names = []
+    arguments = []
+    for placeholder in OUTLINE_PLACEHOLDER.findall(text):
+        slug = slugify(placeholder)
+        name = slug
+        number = 1
+        while name in names:
+            number += 1
+            name = '{}_{}'.format(slug, number)
+        names.append(name)
+        arguments.append('_' + name if name[0].isdigit() else name)
+    names = iter(names)
+    name_text = OUTLINE_PLACEHOLDER.sub(r'\1', text)
+    pattern = OUTLINE_PLACEHOLDER.sub(
+        lambda placeholder: '{' + next(names) + '}',
+        text.replace('{', '{{').replace('}', '}}'),
+    )
+    return pattern, arguments, name_text
+
+
+def step_to_stub(step, name=None):
+    """
+        Get the source of a stub step definition for a step.
+
+        Braces in the text are escaped, so the stub matches them literally,
+        and outline <placeholders> become {placeholder} arguments.
+
+        Keyword arguments:
+        step -- Step dict with type and text.
+        name -- The stub function's name. Defaults to a slug of the step's
+                type and text.
+
+        Returns:
+        The stub definition source, without trailing newline.
+    """
+    pattern, arguments, name_text = _stub_pattern(
+        normalize_text(step['text']))
+    if name is None:
+        name = slugify('{}_{}'.format(step['type'], name_text))
+    return '\n'.join([
+        '@{}({!r})'.format(step['type'], pattern),
+        'def {name}({arguments}):'.format(
+            name=name,
+            arguments=', '.join(arguments),
+        ),
+        '    raise NotImplementedError',
+    ])
+
+
+def _scenario_steps(feature):
+    """
+        Get the steps of each scenario and scenario outline in a feature,
+        with the background steps first, along with the example rows of
+        outlines (None for scenarios).
+    """
+    background = feature['background']
+    background_steps = background['steps'] if background else []
+    for element in feature['elements']:
+        rows = None
+        if element['type'] == 'scenario outline':
+            rows = [
+                row
+                for example in element.get('examples', ())
+                for row in example_hashes(example)
+            ]
+        yield background_steps + element['steps'], rows
+
+
+def _is_defined(registry, text, rows):
+    if not rows or not OUTLINE_PLACEHOLDER.search(text):
+        return registry.find(text) is not None
+    for row in rows:
+        filled = OUTLINE_PLACEHOLDER.sub(
+            lambda placeholder: row.get(placeholder.group(1),
+                                        placeholder.group(0)),
+            text,
+        )
+        if registry.find(filled) is None:
+            return False
+    return True
+
+
+def undefined_steps(registry, features):
+    """
+        Find the distinct steps in a corpus that have no step definition.
+
+        Keyword arguments:
+        registry -- The StepRegistry to look definitions up in.
+        features -- Iterable of parsed features.
+
+        Returns:
+        List of step dicts with type and normalized text, in order of
+        first use. And and But steps take the type of the step before
+        them. Outline steps are undefined if any example row leaves them
+        undefined, and are returned with their <placeholders>.
+    """
+    seen = set()
+    undefined = []
+    for feature in features:
+        for steps, rows in _scenario_steps(feature):
+            step_type = 'Given'
+            for step in steps:
+                if step['type'] in DECORATED_TYPES:
+                    step_type = step['type']
+                text = normalize_text(step['text'])
+                if text in seen:
+                    continue
+                seen.add(text)
+                if not _is_defined(registry, text, rows):
+                    undefined.append({'type': step_type, 'text': text})
+    return undefined
+
+
+def generate_stubs(steps):
+    """
+        Get stub definitions for steps, one per distinct normalized text.
+
+        Outline <placeholders> become {placeholder} arguments of the stub.
+        Function names that would collide get a numeric suffix.
+
+        Keyword arguments:
+        steps -- Iterable of step dicts with type and text.
+
+        Returns:
+        List of stub definition sources.
+    """
+    seen_texts = set()
+    seen_names = set()
+    stubs = []
+    for step in steps:
+        text = normalize_text(step['text'])
+        if text in seen_texts:
+            continue
+        seen_texts.add(text)
+
+        name_text = _stub_pattern(text)[2]
+        base_name = slugify('{}_{}'.format(step['type'], name_text))
+        name = base_name
+        suffix = 1
+        while name in seen_names:
+            suffix += 1
+            name = '{}_{}'.format(base_name, suffix)
+        seen_names.add(name)
+
+        stubs.append(step_to_stub({'type': step['type'], 'text': text}, name))
+    return stubs
+
+
+def stub_module(steps):
+    """
+        Get the source of a steps module with stubs for the given steps.
+
+        Keyword arguments:
+        steps -- Iterable of step dicts with type and text.
+
+        Returns:
+        The module source.
+    """
+    steps = list(steps)
+    step_types = [
+        step_type
+        for step_type in DECORATED_TYPES + ('And',)
+        if any(step['type'] == step_type for step in steps)
+    ]
+    parts = []
+    if step_types:
+        parts.append('from romaine.steps import {}'.format(
+            ', '.join(step_types)))
+    parts.extend(generate_stubs(steps))
+    return '\n\n\n'.join(parts) + '\n'
+
+
+def write_stub_module(core, feature_paths, module_path):
+    """
+        Write one steps module stubbing every undefined step in a corpus.
+
+        Keyword arguments:
+        core -- The romaine Core with the steps defined so far.
+        feature_paths -- Paths of the feature files in the corpus.
+        module_path -- Where to write the module.
+
+        Returns:
+        The number of stubs written.
+    """
+    steps = undefined_steps(
+        core.steps,
+        (core.parse_feature(path) for path in feature_paths),
+    )
+    with io.open(module_path, 'w', encoding='utf-8') as module_file:
+        module_file.write(stub_module(steps))
+    return len(steps)
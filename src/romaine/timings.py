@@ -0,0 +1,108 @@
+from romaine import cache
+from romaine.sharding import shard_key
+
+# Estimated seconds for a scenario when no scenario has a recorded duration
+DEFAULT_ESTIMATE = 1.0
+
+
+def estimate_of(elements):
+    """
+        Get the estimated seconds to run some prepared elements, as set by
+        Core.run when given a TimingHistory.
+    """
+    return sum(element.get('estimate', 0.0) for element in elements)
+
+
+def _priority_of(elements):
+    return (
+        any(element.get('failed_before') for element in elements),
+        estimate_of(elements),
+    )
+
+
+def longest_first(units, elements_of):
+    """
+        Order units of work so those expected to take longest come first,
+        keeping the original order of units with equal estimates. Units
+        with an element marked 'failed_before', see
+        romaine.failures.order_failed_first, come before all others.
+
+        Keyword arguments:
+        units -- List of units of work.
+        elements_of -- Callable returning the prepared elements of a unit.
+
+        Returns:
+        A new list of the units.
+    """
+    return sorted(
+        units,
+        key=lambda unit: _priority_of(elements_of(unit)),
+        reverse=True,
+    )
+
+
+class TimingHistory(object):
+    """
+        Durations of scenarios and scenario outlines from earlier runs,
+        keyed by the shard_key of their scenario IDs, to estimate how long
+        they will take, however their features' paths are given.
+    """
+
+    def __init__(self, path=None):
+        """
+            Load a timing history.
+
+            Keyword arguments:
+            path -- The history file. Defaults to timings.json in the
+                    romaine cache directory.
+        """
+        self.path = path or cache.cache_path('timings.json')
+        self.durations = dict(
+            (shard_key(scenario_id), duration)
+            for scenario_id, duration
+            in cache.load_json(self.path, {}).items()
+        )
+        known = sorted(self.durations.values())
+        if known:
+            # The median, so one very slow scenario doesn't make every new
+            # scenario look slow
+            self.default = known[len(known) // 2]
+        else:
+            self.default = DEFAULT_ESTIMATE
+
+    def estimate(self, scenario_id):
+        """
+            Get the estimated seconds to run a scenario.
+
+            Keyword arguments:
+            scenario_id -- The scenario's ID, see
+                           romaine.features.scenario_ids.
+
+            Returns:
+            Its last recorded duration, or the median of those recorded
+            for other scenarios if it has none.
+        """
+        return self.durations.get(shard_key(scenario_id), self.default)
+
+    def record(self, features):
+        """
+            Record the durations of the elements of features that have run.
+
+            Keyword arguments:
+            features -- Iterable of prepared features, after the logger has
+                        added stats to them.
+        """
+        for feature in features:
+            for element in feature['elements']:
+                stats = element.get('stats')
+                if stats is None or stats.get('cancelled'):
+                    continue
+                if stats['duration'] is not None:
+                    self.durations[shard_key(element['id'])] = \
+                        stats['duration']
+
+    def save(self):
+        """
+            Save the history.
+        """
+        cache.save_json(self.path, self.durations)
@@ -0,0 +1,220 @@
+from collections import Counter
+
+from romaine.features import scenario_ids
+from romaine.outline import example_hashes, example_templates, fill_template
+
+
+def _element_usages(path, scenario_id, element, background_steps):
+    """
+        Get usages of steps by one scenario or scenario outline, including
+        the feature's background steps, which run before it.
+    """
+    scenario = element['description'].strip()
+    steps = background_steps + element['steps']
+    if element['type'] == 'scenario outline':
+        # The template and rows of each example, for each step
+        filling = [[] for step in steps]
+        for example in element.get('examples', ()):
+            rows = example_hashes(example)
+            templates, unknown = example_templates(steps, example)
+            for step_filling, template in zip(filling, templates):
+                step_filling.append((template, rows))
+    else:
+        filling = None
+
+    usages = []
+    for position, step in enumerate(steps):
+        if filling is None:
+            texts = Counter([step['text'].strip()])
+        else:
+            texts = Counter(
+                fill_template(template, row).strip()
+                for template, rows in filling[position]
+                for row in rows
+            )
+        for text, runs in texts.items():
+            usages.append({
+                'path': path,
+                'scenario': scenario,
+                'scenario_id': scenario_id,
+                'line': step.get('line'),
+                'type': step['type'],
+                'text': text,
+                'runs': runs,
+            })
+    return usages
+
+
+class StepUsageIndex(object):
+    """
+        Index of where each step definition is used across a corpus of
+        features, kept up to date one feature file at a time.
+
+        Step texts are resolved once per distinct text, so reports are
+        answered from the index without re-parsing or re-matching.
+    """
+
+    def __init__(self, core):
+        """
+            Initialise an empty usage index.
+
+            Keyword arguments:
+            core -- The romaine Core whose steps resolve step texts and
+                    which parses feature files.
+        """
+        self.core = core
+        # Usages of steps in each indexed feature file
+        self._usages = {}
+        # How many times each step text runs across the corpus
+        self._runs = Counter()
+        # How many usages of each step text there are across the corpus
+        self._uses = Counter()
+        # The step definition of each step text, None if undefined
+        self._definitions = {}
+
+    def update(self, path, feature=None):
+        """
+            Index a feature file, replacing anything indexed for it before.
+
+            Keyword arguments:
+            path -- The path of the feature file.
+            feature -- The parsed feature. Parsed with the core if omitted.
+        """
+        if feature is None:
+            feature = self.core.parse_feature(path)
+
+        self.remove(path)
+
+        background = feature['background']
+        background_steps = background['steps'] if background else []
+        usages = []
+        for scenario_id, element in zip(scenario_ids(path, feature),
+                                        feature['elements']):
+            usages.extend(_element_usages(
+                path, scenario_id, element, background_steps))
+
+        self._usages[path] = usages
+        for usage in usages:
+            self._add(usage['text'], usage['runs'], 1)
+
+    def remove(self, path):
+        """
+            Drop a feature file from the index, e.g. when it is deleted.
+
+            Keyword arguments:
+            path -- The path of the feature file.
+        """
+        for usage in self._usages.pop(path, ()):
+            self._add(usage['text'], -usage['runs'], -1)
+
+    def _add(self, text, runs, uses):
+        self._runs[text] += runs
+        self._uses[text] += uses
+        if self._uses[text] <= 0:
+            del self._runs[text]
+            del self._uses[text]
+            self._definitions.pop(text, None)
+        elif text not in self._definitions:
+            self._definitions[text] = self.core.steps.find(text)
+
+    def relink(self):
+        """
+            Resolve every indexed step text again, after the core's steps
+            have changed.
+        """
+        find = self.core.steps.find
+        self._definitions = dict(
+            (text, find(text)) for text in self._uses
+        )
+
+    def definition_of(self, text):
+        """
+            Get the step definition used by some indexed step text.
+
+            Keyword arguments:
+            text -- The step text, without its Given/When/Then keyword.
+
+            Returns:
+            The Step, or None if the text is undefined or not indexed.
+        """
+        return self._definitions.get(text.strip())
+
+    def usages_of(self, step):
+        """
+            Get every use of a step definition in the corpus.
+
+            Keyword arguments:
+            step -- The Step to look for, or None for uses of undefined
+                    step texts.
+
+            Returns:
+            List of usage dicts, ordered by path and line, containing:
+                path - The feature file path.
+                scenario - The description of the scenario or outline.
+                scenario_id - Its ID, see romaine.features.scenario_ids.
+                line - The line number of the step in the feature file.
+                type - The step type, e.g. Given.
+                text - The step text, with outline placeholders filled.
+                runs - How many times this usage runs.
+        """
+        definitions = self._definitions
+        return [
+            usage
+            for path in sorted(self._usages)
+            for usage in self._usages[path]
+            if definitions.get(usage['text']) is step
+        ]
+
+    def _definition_runs(self):
+        runs = Counter()
+        for text, step in self._definitions.items():
+            if step is not None:
+                runs[step] += self._runs[text]
+        return runs
+
+    def unused_definitions(self):
+        """
+            Get step definitions that no indexed step text uses.
+
+            Returns:
+            List of Steps, sorted by name.
+        """
+        used = set(self._definitions.values())
+        return sorted(
+            (step for step in self.core.steps.values() if step not in used),
+            key=lambda step: step.name,
+        )
+
+    def hot_steps(self, limit=None):
+        """
+            Get the step definitions that run most often.
+
+            Keyword arguments:
+            limit -- The maximum number of steps to return, or None for all.
+
+            Returns:
+            List of (step, runs) tuples, most runs first. Each background
+            step runs once per scenario and each outline step once per
+            example row.
+        """
+        runs = self._definition_runs()
+        return sorted(
+            runs.items(),
+            key=lambda item: (-item[1], item[0].name),
+        )[:limit]
+
+    def undefined_steps(self):
+        """
+            Get step texts with no step definition.
+
+            Returns:
+            List of (text, uses) tuples, most used first.
+        """
+        return sorted(
+            (
+                (text, self._uses[text])
+                for text, step in self._definitions.items()
+                if step is None
+            ),
+            key=lambda item: (-item[1], item[0]),
+        )
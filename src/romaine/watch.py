@@ -0,0 +1,389 @@
+import inspect
+import os
+import sys
+import time
+
+from romaine.discovery import DiscoveryManifest, FeatureFinder
+from romaine.features import scenario_ids
+from romaine.parser.exceptions import (
+    FeatureTrailingDataError,
+    MalformedTableError,
+    UnclosedPythonishString,
+)
+from romaine.usage import StepUsageIndex
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+# Errors meaning a feature file can't be parsed as it is, e.g. because it
+# is only partly saved
+FEATURE_ERRORS = (
+    IOError,
+    OSError,
+    ValueError,
+    FeatureTrailingDataError,
+    MalformedTableError,
+    UnclosedPythonishString,
+)
+
+
+def _file_state(path):
+    """
+        Get the (mtime, size) of a file, or None if it does not exist.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return (stat.st_mtime, stat.st_size)
+
+
+def _steps_signature(steps):
+    return tuple(
+        (step['type'], step['text'].strip(), repr(step['multiline_arg']))
+        for step in steps
+    )
+
+
+def _element_signature(element):
+    """
+        Get what determines how a scenario or outline runs, leaving out
+        comments, whitespace and its position in the file.
+    """
+    return (
+        element['type'],
+        tuple(element['tags']),
+        _steps_signature(element['steps']),
+        tuple(
+            repr(example['table'])
+            for example in element.get('examples', ())
+        ),
+    )
+
+
+class Watcher(object):
+    """
+        Watches feature files and step modules for changes, working out
+        which scenarios each change affects.
+
+        Changes are found by comparing (mtime, size) snapshots. Features
+        are located with a DiscoveryManifest kept between polls, so only
+        directories whose mtime changed are listed again. Where the
+        optional inotify_simple package is available, the watcher sleeps
+        until something changes in a watched directory instead of waking
+        up every interval.
+    """
+
+    def __init__(self, core, roots, step_modules=(), interval=0.5,
+                 use_inotify=True, **finder_options):
+        """
+            Initialise a watcher.
+
+            Keyword arguments:
+            core -- The romaine Core to load steps into and parse with.
+            roots -- Paths to locate features in.
+            step_modules -- Dotted names of the step modules to watch.
+            interval -- Seconds between polls. With inotify, the longest
+                        time a change in an unwatched directory (e.g. a new
+                        subdirectory) can go unnoticed is ten intervals.
+            use_inotify -- Whether to use inotify if it is available.
+            finder_options -- Options for romaine.discovery.FeatureFinder.
+                              The manifest defaults to one kept in memory.
+        """
+        self.core = core
+        self.roots = list(roots)
+        self.step_modules = list(step_modules)
+        self.interval = interval
+        self.finder_options = dict(finder_options)
+        self.finder_options.setdefault(
+            'manifest', DiscoveryManifest(persist=False))
+        self._finder = FeatureFinder(**self.finder_options)
+        self.usage = StepUsageIndex(core)
+
+        self._features = {}
+        self._modules = {}
+        self._signatures = {}
+        self._inotify = None
+        self._watched = {}
+        if use_inotify and inotify_simple is not None:
+            self._inotify = inotify_simple.INotify()
+
+    def _locate(self):
+        paths = []
+        for root in self.roots:
+            paths.extend(self._finder.find(root))
+        return paths
+
+    def _module_file(self, module_name):
+        """
+            Get the source file of a loaded module, or None if it has none,
+            e.g. a built-in or namespace package.
+        """
+        module = sys.modules.get(module_name)
+        if module is None:
+            return None
+        try:
+            source = inspect.getsourcefile(module)
+        except TypeError:
+            source = None
+        return source or getattr(module, '__file__', None)
+
+    def _module_states(self):
+        """
+            Get the (mtime, size) of each step module's file, leaving out
+            modules with no file.
+        """
+        states = {}
+        for name in self.step_modules:
+            path = self._module_file(name)
+            if path is not None:
+                states[name] = _file_state(path)
+        return states
+
+    def _parse(self, path):
+        """
+            Parse a feature and record its scenarios' signatures.
+
+            Returns:
+            Dict of each scenario ID to its signature, or None if the
+            feature could not be parsed.
+        """
+        try:
+            feature = self.core.parse_feature(path)
+        except FEATURE_ERRORS:
+            return None
+        background = feature['background']
+        background = background and _steps_signature(background['steps'])
+        self.usage.update(path, feature)
+        return dict(
+            (scenario_id, (background, _element_signature(element)))
+            for scenario_id, element in zip(scenario_ids(path, feature),
+                                            feature['elements'])
+        )
+
+    def start(self):
+        """
+            Load the step modules and take the first snapshot of every
+            feature and step module.
+
+            Returns:
+            List of the IDs of every scenario found.
+        """
+        self.core.load_steps(self.step_modules)
+        self._modules = self._module_states()
+        scenarios = []
+        for path in self._locate():
+            self._features[path] = _file_state(path)
+            signatures = self._parse(path) or {}
+            self._signatures[path] = signatures
+            scenarios.extend(sorted(signatures))
+        self._watch_directories()
+        return scenarios
+
+    def poll(self):
+        """
+            Check for changes since the last snapshot, reloading any
+            changed step modules.
+
+            Returns:
+            None if nothing changed, otherwise a dict containing:
+                features - Paths of new or changed features.
+                removed - Paths of deleted features.
+                modules - Names of changed step modules.
+                errors - Paths of features that could not be parsed and
+                         names of step modules that could not be reloaded.
+                scenarios - Sorted IDs of the scenarios affected.
+        """
+        changes = {
+            'features': [],
+            'removed': [],
+            'modules': [],
+            'errors': [],
+            'scenarios': set(),
+        }
+
+        located = self._locate()
+        for path in located:
+            state = _file_state(path)
+            if state == self._features.get(path):
+                continue
+            self._features[path] = state
+            changes['features'].append(path)
+
+            signatures = self._parse(path)
+            if signatures is None:
+                changes['errors'].append(path)
+                continue
+            previous = self._signatures.get(path, {})
+            changes['scenarios'].update(
+                scenario_id
+                for scenario_id, signature in signatures.items()
+                if previous.get(scenario_id) != signature
+            )
+            self._signatures[path] = signatures
+
+        for path in set(self._features) - set(located):
+            del self._features[path]
+            self._signatures.pop(path, None)
+            self.usage.remove(path)
+            changes['removed'].append(path)
+
+        for name, state in self._module_states().items():
+            if state != self._modules.get(name):
+                self._modules[name] = state
+                changes['modules'].append(name)
+        if changes['modules']:
+            changes['scenarios'].update(self._reload(changes))
+
+        if not any(changes.values()):
+            return None
+        changes['scenarios'] = sorted(changes['scenarios'])
+        self._watch_directories()
+        return changes
+
+    def _reload(self, changes):
+        """
+            Reload changed step modules, relinking the usage index to their
+            new steps. Modules that fail to import keep their old steps and
+            are added to the changes' errors.
+
+            Returns:
+            Set of the IDs of scenarios using steps the modules defined
+            before or after reloading, or steps the reload defined.
+        """
+        affected = self._affected_by_modules(changes['modules'])
+        undefined = self._undefined_usages()
+        for name in changes['modules']:
+            try:
+                self.core.reload_steps([name])
+            except Exception:
+                changes['errors'].append(name)
+        self.usage.relink()
+        affected.update(self._affected_by_modules(changes['modules']))
+        affected.update(
+            scenario_id
+            for scenario_id, text in undefined - self._undefined_usages()
+        )
+        return affected
+
+    def _undefined_usages(self):
+        return set(
+            (usage['scenario_id'], usage['text'])
+            for usage in self.usage.usages_of(None)
+        )
+
+    def _affected_by_modules(self, module_names):
+        """
+            Get the IDs of scenarios using steps defined in some modules.
+        """
+        affected = set()
+        module_names = set(module_names)
+        for step in self.core.steps.values():
+            if getattr(step.func, '__module__', None) in module_names:
+                affected.update(
+                    usage['scenario_id']
+                    for usage in self.usage.usages_of(step)
+                )
+        return affected
+
+    def _watch_directories(self):
+        """
+            Watch the directories of the roots, features and step modules
+            with inotify, if it is in use.
+        """
+        if self._inotify is None:
+            return
+        flags = inotify_simple.flags
+        mask = (
+            flags.CREATE | flags.DELETE | flags.MODIFY | flags.CLOSE_WRITE |
+            flags.MOVED_FROM | flags.MOVED_TO | flags.ATTRIB
+        )
+        directories = set(
+            root for root in self.roots if os.path.isdir(root)
+        )
+        directories.update(os.path.dirname(path) or '.'
+                           for path in self._features)
+        directories.update(
+            os.path.dirname(self._module_file(name))
+            for name in self.step_modules
+            if self._module_file(name)
+        )
+        for directory in directories - set(self._watched):
+            try:
+                self._watched[directory] = self._inotify.add_watch(
+                    directory, mask)
+            except OSError:
+                pass
+
+    def wait(self):
+        """
+            Wait until something may have changed.
+        """
+        if self._inotify is None:
+            time.sleep(self.interval)
+            return
+        if self._inotify.read(timeout=int(self.interval * 10000)):
+            # Let a burst of events from one save settle
+            time.sleep(self.interval / 10.0)
+            self._inotify.read(timeout=0)
+
+    def watch(self, on_change, cycles=None):
+        """
+            Poll for changes until interrupted, calling back on each one.
+
+            Keyword arguments:
+            on_change -- Called with the changes dict from poll.
+            cycles -- Stop after this many polls, or None to run forever.
+        """
+        polls = 0
+        while cycles is None or polls < cycles:
+            self.wait()
+            polls += 1
+            changes = self.poll()
+            if changes is not None:
+                on_change(changes)
+
+
+def _scenario_paths(scenarios):
+    """
+        Get the feature paths in some scenario IDs, in order.
+    """
+    paths = []
+    for scenario_id in scenarios:
+        path = scenario_id.split('::', 1)[0]
+        if path not in paths:
+            paths.append(path)
+    return paths
+
+
+def watch(core, roots, on_change=None, step_modules=(), logger=None,
+          **options):
+    """
+        Watch features and step modules until interrupted, re-running the
+        scenarios affected by each change.
+
+        Keyword arguments:
+        core -- The romaine Core to load steps into and parse with.
+        roots -- Paths to locate features in.
+        on_change -- Called with the changes dict from Watcher.poll instead
+                     of running anything.
+        step_modules -- Dotted names of the step modules to watch.
+        logger -- The AbstractRomaineLogger to report runs to. Defaults to
+                  a RomaineLogger, as for Core.run.
+        options -- Other options for Watcher.
+    """
+    watcher = Watcher(core, roots, step_modules, **options)
+    scenarios = watcher.start()
+    if on_change is None:
+        def on_change(changes):
+            if changes['scenarios']:
+                core.run(_scenario_paths(changes['scenarios']), logger,
+                         scenarios=changes['scenarios'])
+
+        core.run(_scenario_paths(scenarios), logger, scenarios=scenarios)
+    try:
+        watcher.watch(on_change)
+    except KeyboardInterrupt:
+        pass
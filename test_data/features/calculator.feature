@@ -0,0 +1,24 @@
+Feature: Calculator
+  In order to avoid silly mistakes
+  As a maths idiot
+  I want to be told the results of sums
+
+  Background:
+    Given I have a calculator
+
+  Scenario: Add two numbers
+    Given I have entered 50 into the calculator
+    And I have entered 70 into the calculator
+    When I press add
+    Then the result should be 120 on the screen
+
+  Scenario Outline: Subtract two numbers
+    Given I have entered <first> into the calculator
+    And I have entered <second> into the calculator
+    When I press subtract
+    Then the result should be <result> on the screen
+
+  Examples:
+| first | second | result |
+| 10| 5  | 5      |
+| 7 | 9  | -2     |
@@ -0,0 +1,42 @@
+import asyncio
+
+from romaine.runner import scenario_context
+from romaine.steps import Given, When, Then
+
+# 'start' and 'finish' of each wait, in order, to tell whether they overlap
+waits = []
+
+
+@Given('I start counting')
+async def start_counting():
+    scenario_context().count = 0
+
+
+@When('I wait then count {number:int}')
+async def wait_then_count(number):
+    waits.append('start')
+    await asyncio.sleep(0.05)
+    waits.append('finish')
+    scenario_context().count += number
+
+
+@Then('the count is {total:int}')
+def check_count(total):
+    assert scenario_context().count == total
+
+
+@Given('I wait for an item')
+async def wait_for_item():
+    context = scenario_context()
+    context.queue = asyncio.Queue()
+    context.waiting = asyncio.ensure_future(context.queue.get())
+
+
+@When('I put {item:int} in the queue')
+async def put_item(item):
+    await scenario_context().queue.put(item)
+
+
+@Then('I receive {item:int}')
+async def receive_item(item):
+    assert await scenario_context().waiting == item
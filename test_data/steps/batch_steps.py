@@ -0,0 +1,40 @@
+from romaine.runner import row_contexts, scenario_context
+from romaine.steps import Given, Then
+
+calls = []
+# The start of each row a batch call was for, by call
+starts = []
+remembered = None
+
+
+@Given('I start with {start:int}')
+def start_with(start):
+    scenario_context().start = start
+
+
+@Given('I still have {start:int}')
+def still_have(start):
+    assert scenario_context().start == start
+
+
+@Given('I remember {number:int}')
+def remember(number):
+    global remembered
+    remembered = number
+
+
+@Given('I recall {number:int}')
+def recall(number):
+    assert remembered == number
+
+
+@Then('{a:int} plus {b:int} is {total:int}', batch=True)
+def check_sums(rows):
+    calls.append(len(rows))
+    starts.append([
+        getattr(context, 'start', None) for context in row_contexts()])
+    return [
+        None if a + b == total else AssertionError(
+            '{} + {} is not {}'.format(a, b, total))
+        for a, b, total in rows
+    ]
@@ -0,0 +1,28 @@
+from romaine.steps import Given, When, Then
+
+calculator = []
+
+
+@Given('I have a calculator')
+def a_calculator():
+    del calculator[:]
+
+
+@Given('I have entered {number:int} into the calculator')
+def enter_number(number):
+    calculator.append(number)
+
+
+@When('I press add')
+def press_add():
+    calculator[:] = [sum(calculator)]
+
+
+@When('I press clear')
+def press_clear():
+    del calculator[:]
+
+
+@Then('the result should be {total:int} on the screen')
+def check_result(total):
+    assert calculator == [total], calculator
@@ -0,0 +1,25 @@
+import time
+
+from romaine.runner import scenario_context
+from romaine.steps import Given, When, Then
+
+# 'start' and 'finish' of each wait, in order, to tell whether they overlap
+waits = []
+
+
+@Given('I start counting')
+def start_counting():
+    scenario_context().count = 0
+
+
+@When('I wait then count {number:int}')
+def wait_then_count(number):
+    waits.append('start')
+    time.sleep(0.05)
+    waits.append('finish')
+    scenario_context().count += number
+
+
+@Then('the count is {total:int}')
+def check_count(total):
+    assert scenario_context().count == total
@@ -0,0 +1,10 @@
+import os
+
+from romaine.steps import Given
+
+
+@Given('a worker that dies unless {marker} exists')
+def die_unless_marked(marker):
+    if not os.path.exists(marker):
+        open(marker, 'w').close()
+        os._exit(1)
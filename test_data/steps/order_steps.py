@@ -0,0 +1,25 @@
+import time
+
+from romaine.steps import Given
+
+ran = []
+
+
+@Given('I am scenario {name:word}')
+def record_scenario(name):
+    ran.append(name)
+
+
+@Given('I fail')
+def fail():
+    assert False, 'Failed on purpose'
+
+
+@Given('I pause')
+def pause():
+    time.sleep(0.1)
+
+
+@Given('I hang')
+def hang():
+    time.sleep(30)
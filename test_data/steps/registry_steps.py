@@ -0,0 +1,11 @@
+from romaine.steps import Given, Then
+
+
+@Given('a registry step')
+def registry_step_1():
+    pass
+
+
+@Then('another registry step')
+def registry_step_2():
+    pass
@@ -1,6 +1,9 @@
 import json
+import logging
+import logging.handlers
 import os
 import sys
+import time
 
 # Allow the tests to work from a tests subdir, then import the test target
 test_path = os.path.dirname(__file__)
@@ -13,8 +16,15 @@ PARSER_TEST_DATA_DIR = os.path.join(
     'parser',
 )
 
+FEATURES_DIR = os.path.join(
+    os.path.split(test_path)[0],
+    'test_data',
+    'features',
+)
+
 # Module to be tested
 import romaine
+from romaine import logs
 
 
 # Utility for getting an initialised parser.
@@ -41,3 +51,70 @@ def get_parser_output(target):
     with open(output_path) as output_handle:
         data = json.load(output_handle)
     return data
+
+
+def write_file(path, content):
+    """
+        Write a file, making sure its mtime moves on from any earlier
+        version on filesystems with coarse timestamps.
+    """
+    previous = os.stat(path).st_mtime if os.path.exists(path) else 0
+    with open(path, 'w') as written:
+        written.write(content)
+    later = max(time.time(), previous + 1)
+    os.utime(path, (later, later))
+
+
+class BufferingLogger(logs.RomaineLogger):
+    """
+        A RomaineLogger keeping its log records for inspection.
+    """
+
+    def __init__(self, level=logging.NOTSET):
+        super(BufferingLogger, self).__init__()
+        handler = logging.handlers.BufferingHandler(float('inf'))
+        self._stdlib_logger.addHandler(handler)
+        self._stdlib_logger.setLevel(level)
+        self.records = handler.buffer
+
+    def messages(self, level):
+        return [
+            record.getMessage()
+            for record in self.records
+            if record.levelno == level
+        ]
+
+
+def peak_concurrency(events):
+    """
+        Get the most things running at once from the 'start' and 'finish'
+        of each, in the order they happened.
+    """
+    running = peak = 0
+    for event in events:
+        running += 1 if event == 'start' else -1
+        peak = max(peak, running)
+    return peak
+
+
+def comparable(statistics):
+    """
+        Get run statistics without the parts that vary between runs.
+    """
+    return {
+        'features': {
+            'total': statistics['features']['total'],
+            'passed': statistics['features']['passed'],
+        },
+        'scenarios': statistics['scenarios'],
+        'steps': statistics['steps'],
+    }
+
+
+COUNTING_SCENARIO = """
+  Scenario: Counting {number}
+    Given I start counting
+    When I wait then count {number}
+    And I wait then count 1
+    Then the count is {total}
+"""
@@ -0,0 +1,99 @@
+from tests import common
+from unittest import TestCase, skipIf
+import functools
+import logging
+import os
+import shutil
+import sys
+import tempfile
+
+from romaine.core import Core
+
+if sys.version_info >= (3, 5):
+    from romaine.aio import AsyncRunner
+
+
+@skipIf(sys.version_info < (3, 5), 'async def needs Python 3.5')
+class TestAsyncRunner(TestCase):
+    """
+        Test running async def steps, concurrently on one event loop.
+    """
+
+    def setUp(self):
+        self.core = Core()
+        self.steps = self.core.load_steps(['test_data.steps.async_steps'])[0]
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        common.write_file(
+            os.path.join(self.root, 'counting.feature'),
+            'Feature: Counting\n' + ''.join(
+                common.COUNTING_SCENARIO.format(number=number,
+                                                total=number + 1)
+                for number in range(8)
+            ),
+        )
+
+    def test_async_steps_run_serially(self):
+        # When I run async def steps with the serial runner
+        statistics = self.core.run([self.root], common.BufferingLogger())
+
+        # Then they are awaited
+        self.assertTrue(self.core.steps['I start counting'].is_async)
+        self.assertFalse(self.core.steps['the count is {total:int}'].is_async)
+        self.assertEqual(statistics['scenarios'],
+                         {'total': 8, 'passed': 8, 'cancelled': 0,
+                          'cached': 0})
+
+    def test_steps_share_an_event_loop(self):
+        # Given a scenario whose steps use a queue and task an earlier
+        # step made
+        common.write_file(
+            os.path.join(self.root, 'counting.feature'),
+            'Feature: Queueing\n'
+            '  Scenario: Queueing\n'
+            '    Given I wait for an item\n'
+            '    When I put 3 in the queue\n'
+            '    Then I receive 3\n',
+        )
+
+        # When I run it with the serial runner
+        statistics = self.core.run([self.root], common.BufferingLogger())
+
+        # Then its steps all ran on one event loop
+        self.assertEqual(statistics['scenarios'],
+                         {'total': 1, 'passed': 1, 'cancelled': 0,
+                          'cached': 0})
+
+    def test_concurrent_scenarios(self):
+        # Given I have run the scenarios serially
+        serial_logger = common.BufferingLogger()
+        serial = self.core.run([self.root], serial_logger)
+        del self.steps.waits[:]
+
+        # When I run them on one event loop
+        logger = common.BufferingLogger()
+        statistics = self.core.run(
+            [self.root],
+            logger,
+            runner=functools.partial(AsyncRunner, concurrency=8),
+        )
+
+        # Then every scenario kept its own count
+        self.assertEqual(common.comparable(statistics),
+                         common.comparable(serial))
+        # And the log matches the serial run's
+        self.assertEqual(logger.messages(logging.INFO),
+                         serial_logger.messages(logging.INFO))
+        # And the waits overlapped
+        self.assertGreater(common.peak_concurrency(self.steps.waits), 1)
+
+    def test_concurrency_limit(self):
+        # When I run the scenarios one at a time on the event loop
+        self.core.run(
+            [self.root],
+            common.BufferingLogger(),
+            runner=functools.partial(AsyncRunner, concurrency=1),
+        )
+
+        # Then the waits did not overlap
+        self.assertEqual(common.peak_concurrency(self.steps.waits), 1)
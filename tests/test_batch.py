@@ -0,0 +1,123 @@
+from tests import common
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+from romaine import runner
+from romaine.core import Core
+
+OUTLINE_FEATURE = """Feature: Sums
+  Scenario Outline: Adding
+    Given I start with <a>
+    Then <a> plus <b> is <total>
+    And I still have <a>
+
+  Examples:
+| a | b | total |
+| 1 | 2 | 3     |
+| 2 | 2 | 5     |
+| 3 | 4 | 7     |
+"""
+
+REMEMBERING_FEATURE = """Feature: Remembering
+  Scenario Outline: Remembering
+    Given I remember <a>
+    And I recall <a>
+    Then <a> plus <b> is <total>
+
+  Examples:
+| a | b | total |
+| 1 | 2 | 3     |
+| 2 | 2 | 4     |
+"""
+
+SCENARIO_FEATURE = """Feature: Sum
+  Scenario: Adding
+    Then 1 plus 1 is 3
+"""
+
+
+class TestBatch(TestCase):
+    """
+        Test running outline example rows through steps defined with
+        batch=True.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.outline = os.path.join(self.root, 'outline.feature')
+        common.write_file(self.outline, OUTLINE_FEATURE)
+        self.core = Core()
+        self.steps = self.core.load_steps(['test_data.steps.batch_steps'])[0]
+
+    def test_rows_run_in_one_call(self):
+        # When I run the outline
+        logger = common.BufferingLogger()
+        statistics = self.core.run([self.outline], logger)
+
+        # Then the batch step is called once for every row
+        self.assertEqual(self.steps.calls, [3])
+        # And only the second row fails, skipping its last step
+        self.assertEqual(statistics['steps'], {
+            'total': 9, 'passed': 7, 'failed': 1, 'skipped': 0})
+        self.assertEqual(
+            logger.messages(logger.ERROR)[0], 'Then 2 plus 2 is 5')
+        self.assertEqual(statistics['scenarios']['passed'], 0)
+
+    def test_rows_run_their_steps_in_turn(self):
+        # Given an outline whose steps share module state
+        path = os.path.join(self.root, 'remembering.feature')
+        common.write_file(path, REMEMBERING_FEATURE)
+
+        # When I run it
+        statistics = self.core.run([path], common.BufferingLogger())
+
+        # Then each row runs its steps before the next row starts
+        self.assertEqual(statistics['scenarios']['passed'], 1)
+        self.assertEqual(self.steps.calls, [2])
+
+    def test_row_contexts(self):
+        # When I run the outline
+        self.core.run([self.outline], common.BufferingLogger())
+
+        # Then the batch step sees each row's context
+        self.assertEqual(self.steps.starts, [[1, 2, 3]])
+
+    def test_fail_fast(self):
+        # When I run the outline, failing fast
+        logger = common.BufferingLogger()
+        statistics = self.core.run([self.outline], logger, fail_fast=True)
+
+        # Then the rows after the failing one are left out
+        self.assertEqual(statistics['steps'], {
+            'total': 6, 'passed': 4, 'failed': 1, 'skipped': 0})
+        self.assertNotIn('Given I start with 3', logger.messages(logger.INFO))
+        # And the outline is reported as failed
+        self.assertEqual(statistics['scenarios'], {
+            'total': 1, 'passed': 0, 'cancelled': 0, 'cached': 0})
+
+    def test_chunks(self):
+        # Given at most two rows run together
+        original = runner.BATCH_SIZE
+        runner.BATCH_SIZE = 2
+        self.addCleanup(setattr, runner, 'BATCH_SIZE', original)
+
+        # When I run the outline
+        self.core.run([self.outline], common.BufferingLogger())
+
+        # Then the rows are split between calls
+        self.assertEqual(self.steps.calls, [2, 1])
+
+    def test_scenario(self):
+        # Given a plain scenario using the batch step
+        path = os.path.join(self.root, 'scenario.feature')
+        common.write_file(path, SCENARIO_FEATURE)
+
+        # When I run it
+        statistics = self.core.run([path], common.BufferingLogger())
+
+        # Then the step is called with its one row, and fails
+        self.assertEqual(self.steps.calls, [1])
+        self.assertEqual(statistics['steps']['failed'], 1)
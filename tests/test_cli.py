@@ -0,0 +1,150 @@
+from tests import common
+from unittest import TestCase
+import io
+import os
+import re
+import shutil
+import sys
+import tempfile
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from romaine import cache, cli, watch
+
+CALCULATOR_FEATURE = os.path.join(common.FEATURES_DIR, 'calculator.feature')
+
+
+class TestCommandLine(TestCase):
+    """
+        Test the romaine command.
+    """
+
+    def setUp(self):
+        # Keep the command's cache out of the working directory
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        patcher = mock.patch.object(cache, 'CACHE_DIR', root)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def run_command(self, *argv):
+        stdout = sys.stdout
+        if str is bytes:
+            sys.stdout = output = io.BytesIO()
+        else:
+            sys.stdout = output = io.StringIO()
+        try:
+            status = cli.main(list(argv))
+        finally:
+            sys.stdout = stdout
+        return status, output.getvalue()
+
+    def test_shards(self):
+        # When I run each of two shards of the calculator feature
+        results = [
+            self.run_command(
+                CALCULATOR_FEATURE,
+                '--steps', 'test_data.steps.calculator_steps',
+                '--shard', shard,
+            )
+            for shard in ('1/2', '2/2')
+        ]
+
+        # Then between them they run each scenario once
+        counts = [
+            [int(count) for count in re.search(
+                r'(\d+) scenarios? \((\d+) passed', output).groups()]
+            for status, output in results
+        ]
+        self.assertEqual([sum(column) for column in zip(*counts)], [2, 1])
+        # And only a shard with the failing scenario fails
+        for (status, output), (total, passed) in zip(results, counts):
+            self.assertEqual(status, int(passed < total))
+
+    def test_failing_run(self):
+        # When I run the whole calculator feature in two threads
+        status, output = self.run_command(
+            CALCULATOR_FEATURE,
+            '-s', 'test_data.steps.calculator_steps',
+            '--threads', '2',
+            '--quiet',
+        )
+
+        # Then the run fails
+        self.assertEqual(status, 1)
+        # And only errors are logged
+        self.assertNotIn('Given I have a calculator', output)
+        self.assertIn('UnimplementedStepError', output)
+
+    def test_last_failed(self):
+        # Given the scenario outline failed last time
+        self.run_command(
+            CALCULATOR_FEATURE, '-s', 'test_data.steps.calculator_steps')
+
+        # When I run only the last failures
+        status, output = self.run_command(
+            CALCULATOR_FEATURE,
+            '-s', 'test_data.steps.calculator_steps',
+            '--last-failed',
+        )
+
+        # Then only the outline runs
+        self.assertEqual(status, 1)
+        self.assertIn('1 scenario (0 passed)', output)
+        self.assertNotIn('Add two numbers', output)
+
+    def test_fail_fast_then_last_failed(self):
+        # Given the scenario outline failed last time, failing fast
+        status, output = self.run_command(
+            CALCULATOR_FEATURE, '-s', 'test_data.steps.calculator_steps',
+            '-x')
+        self.assertEqual(status, 1)
+        self.assertIn('2 scenarios (1 passed)', output)
+
+        # When I run only the last failures
+        status, output = self.run_command(
+            CALCULATOR_FEATURE,
+            '-s', 'test_data.steps.calculator_steps',
+            '--last-failed',
+        )
+
+        # Then only the outline runs
+        self.assertIn('1 scenario (0 passed)', output)
+        self.assertNotIn('Add two numbers', output)
+
+    def test_bad_shard(self):
+        # When I give a shard out of range
+        # Then I am told how to use the command
+        with self.assertRaises(SystemExit):
+            self.run_command(CALCULATOR_FEATURE, '--shard', '3/2')
+
+    def test_record_impact_in_parallel(self):
+        # When I record impact with threads, which it can't trace
+        # Then I am told how to use the command
+        with self.assertRaises(SystemExit):
+            self.run_command(CALCULATOR_FEATURE, '--record-impact',
+                             '--threads', '2')
+
+    def test_watch(self):
+        # When I watch the calculator feature, and interrupt the watch
+        with mock.patch.object(watch.Watcher, 'watch',
+                               side_effect=KeyboardInterrupt):
+            status, output = self.run_command(
+                CALCULATOR_FEATURE,
+                '-s', 'test_data.steps.calculator_steps',
+                '--watch',
+            )
+
+        # Then the scenarios run first, logged as usual
+        self.assertEqual(status, 0)
+        self.assertIn('Add two numbers', output)
+        self.assertIn('2 scenarios (1 passed)', output)
+
+    def test_watch_in_parallel(self):
+        # When I watch with threads, which re-runs don't use
+        # Then I am told how to use the command
+        with self.assertRaises(SystemExit):
+            self.run_command(CALCULATOR_FEATURE, '--watch', '--threads', '2')
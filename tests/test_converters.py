@@ -0,0 +1,122 @@
+from tests import common  # noqa
+from unittest import TestCase
+import datetime
+import decimal
+
+from romaine import exc
+from romaine.converters import ConverterRegistry
+from romaine.registry import StepRegistry, registering_into
+from romaine.steps import Given, When
+
+
+class TestConverters(TestCase):
+
+    def setUp(self):
+        self.registry = StepRegistry(converters=ConverterRegistry())
+
+    def register(self, step_type, name):
+        calls = []
+        with registering_into(self.registry):
+            step_type(name)(lambda *args: calls.append(args))
+        return self.registry[name]
+
+    def test_typed_arguments(self):
+        # Given I have a step with typed placeholders
+        step = self.register(
+            Given,
+            'I order {count:int} {item:word} at {price:decimal} '
+            'on {day:date} weighing {weight:float}',
+        )
+
+        # When I resolve step text matching it
+        resolved = self.registry.resolve(
+            'I order 3 apples at 0.30 on 2015-06-01 weighing 1.5e2 '
+        )
+
+        # Then I get the step and its converted arguments
+        self.assertEqual(resolved, (step, (
+            3,
+            'apples',
+            decimal.Decimal('0.30'),
+            datetime.date(2015, 6, 1),
+            150.0,
+        )))
+
+    def test_converters_compiled_on_registration(self):
+        # When I register a step with placeholders
+        step = self.register(When, 'I add {amount:int} to {name}')
+
+        # Then it has one converter per placeholder
+        self.assertEqual(len(step.converters), 2)
+        self.assertIsNotNone(step.pattern)
+
+        # And a step without placeholders has none
+        literal = self.register(When, 'I press add')
+        self.assertEqual(literal.converters, ())
+        self.assertIsNone(literal.pattern)
+
+    def test_exact_name_preferred(self):
+        # Given I have an exact step and a step with a placeholder
+        self.register(Given, 'I have {count:int} apples')
+        exact = self.register(Given, 'I have 1 apples')
+
+        # When I resolve text matching both
+        # Then the exact step is used
+        self.assertEqual(self.registry.resolve('I have 1 apples'),
+                         (exact, ()))
+
+    def test_no_match(self):
+        # Given I have a step expecting a number
+        self.register(Given, 'I have {count:int} apples')
+
+        # When I resolve text with a word instead
+        # Then no step is found
+        self.assertIsNone(self.registry.resolve('I have many apples'))
+
+    def test_literal_braces(self):
+        # Given I have a step with escaped braces
+        step = self.register(Given, 'a {{literal}} and {value:int}')
+
+        # When I resolve text with single braces
+        # Then the step matches
+        self.assertEqual(self.registry.resolve('a {literal} and 5'),
+                         (step, (5,)))
+
+    def test_choices(self):
+        # Given I have a colour converter
+        self.registry.converters.register_choices(
+            'colour', {'red': 1, 'dark red': 2},
+        )
+        step = self.register(Given, 'a {shade:colour} apple')
+
+        # When I resolve text using each colour
+        # Then each is converted
+        self.assertEqual(self.registry.resolve('a red apple'), (step, (1,)))
+        self.assertEqual(self.registry.resolve('a dark red apple'),
+                         (step, (2,)))
+        # And other colours do not match
+        self.assertIsNone(self.registry.resolve('a green apple'))
+
+    def test_conversion_memoized(self):
+        # Given I have a converter that counts its calls
+        calls = []
+
+        def to_number(literal):
+            calls.append(literal)
+            return int(literal)
+
+        self.registry.converters.register('number', to_number, r'\d+')
+        step = self.register(Given, 'the number {value:number}')
+
+        # When I resolve the same literal many times
+        for _ in range(10):
+            self.assertEqual(step.convert(('42',)), (42,))
+
+        # Then it is converted once
+        self.assertEqual(calls, ['42'])
+
+    def test_unknown_converter(self):
+        # When I register a step with an unknown placeholder type
+        # Then I see an UnknownConverterError
+        with self.assertRaises(exc.UnknownConverterError):
+            self.register(Given, 'a {thing:unknown}')
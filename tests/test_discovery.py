@@ -0,0 +1,271 @@
+from tests import common  # noqa
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+import time
+
+from romaine.discovery import DiscoveryManifest, FeatureFinder, iter_features
+
+
+class TestFeatureDiscovery(TestCase):
+    """
+        Test filtered feature discovery.
+    """
+    files = (
+        'a.feature',
+        'b.txt',
+        'sub/c.feature',
+        'sub/deeper/d.feature',
+        'node_modules/pkg/e.feature',
+        '.git/objects/f.feature',
+        'skipped/g.feature',
+        'sub/scratch_h.feature',
+    )
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for name in self.files:
+            path = os.path.join(self.root, name)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'a'):
+                pass
+        with open(os.path.join(self.root, '.romaineignore'), 'w') as ignore:
+            ignore.write('# Not ready yet\nskipped/\n\n')
+        with open(os.path.join(self.root, 'sub', '.romaineignore'),
+                  'w') as ignore:
+            ignore.write('scratch_*\n')
+
+    def relative(self, paths):
+        return [os.path.relpath(path, self.root) for path in paths]
+
+    def test_default_filters(self):
+        # When I find features with the default options
+        results = iter_features(self.root, sort=True)
+
+        # Then I get a generator
+        self.assertTrue(hasattr(results, 'send'))
+        # And I see only features outside ignored directories, in order
+        self.assertEqual(
+            self.relative(results),
+            ['a.feature', 'sub/c.feature', 'sub/deeper/d.feature'],
+        )
+
+    def test_patterns_and_extensions(self):
+        # When I find .txt files matching a pattern
+        results = iter_features(
+            self.root, extensions=['.txt', '.feature'],
+            patterns=['b*', 'sub/deeper/*'],
+        )
+
+        # Then I see the matching files
+        self.assertEqual(sorted(self.relative(results)),
+                         ['b.txt', 'sub/deeper/d.feature'])
+
+    def test_no_ignores(self):
+        # When I find features with no ignores at all
+        results = iter_features(self.root, ignores=(), ignore_file=None)
+
+        # Then I see every feature
+        self.assertEqual(len(list(results)), 7)
+
+    def test_symlink_loop(self):
+        # Given I have a symlink to a directory above it
+        os.symlink(self.root, os.path.join(self.root, 'sub', 'loop'))
+
+        # When I find features
+        results = self.relative(iter_features(self.root, sort=True))
+
+        # Then each feature is found once
+        self.assertEqual(
+            results,
+            ['a.feature', 'sub/c.feature', 'sub/deeper/d.feature'],
+        )
+
+    def test_single_file(self):
+        # When I find features in a feature file
+        path = os.path.join(self.root, 'a.feature')
+        # Then I see just that file
+        self.assertEqual(list(iter_features(path)), [path])
+        # And a missing path has no features
+        self.assertEqual(list(iter_features(path + '.missing')), [])
+
+    def test_parallel_matches_serial(self):
+        # Given I have a wider tree with a symlink loop and a second link
+        for number in range(20):
+            path = os.path.join(self.root, 'wide', str(number), 'deep')
+            os.makedirs(path)
+            with open(os.path.join(path, 'w.feature'), 'a'):
+                pass
+        os.symlink(self.root, os.path.join(self.root, 'sub', 'loop'))
+        os.symlink(os.path.join(self.root, 'sub'),
+                   os.path.join(self.root, 'wide', 'also_sub'))
+
+        # When I find features with one thread and with several
+        serial = list(iter_features(self.root, sort=True))
+        parallel = [
+            list(iter_features(self.root, sort=True, workers=8))
+            for _ in range(5)
+        ]
+
+        # Then each run with several threads gives the serial results
+        self.assertEqual(len(serial), 23)
+        for results in parallel:
+            self.assertEqual(results, serial)
+
+    def test_symlink_diamonds_listed_once(self):
+        # Given I have a chain of directories, each linking to the next
+        # twice, so there are 2 ** 10 routes to the last
+        for level in range(10):
+            path = os.path.join(self.root, 'chain', str(level))
+            os.makedirs(path)
+            with open(os.path.join(path, 'x.feature'), 'a'):
+                pass
+        for level in range(9):
+            path = os.path.join(self.root, 'chain', str(level))
+            following = os.path.join(self.root, 'chain', str(level + 1))
+            os.symlink(following, os.path.join(path, 'left'))
+            os.symlink(following, os.path.join(path, 'right'))
+        listed = []
+
+        class CountingFinder(FeatureFinder):
+            def scan(self, directory):
+                listed.append(directory.path)
+                return FeatureFinder.scan(self, directory)
+
+        # When I find features with several threads
+        finder = CountingFinder(sort=True, workers=8)
+        results = list(finder.find(self.root))
+
+        # Then each directory is listed at most twice
+        self.assertLess(len(listed), 2 * 16)
+        # And I see the serial results
+        self.assertEqual(results, list(iter_features(self.root, sort=True)))
+
+
+class TestDiscoveryManifest(TestCase):
+    """
+        Test reuse of directory listings between walks.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for name in ('a.feature', 'sub/b.feature', 'sub/deeper/c.feature'):
+            path = os.path.join(self.root, name)
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'a'):
+                pass
+        # Make every directory look like it was last changed a while ago
+        past = time.time() - 60
+        for directory, _, _ in os.walk(self.root):
+            os.utime(directory, (past, past))
+
+        manifest_directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, manifest_directory)
+        self.manifest_path = os.path.join(manifest_directory, 'manifest.json')
+
+    def find(self, **options):
+        manifest = DiscoveryManifest(self.manifest_path)
+        results = list(iter_features(
+            self.root, sort=True, manifest=manifest, **options))
+        return [os.path.relpath(path, self.root) for path in results], \
+            manifest.stats
+
+    def test_unchanged_directories_skipped(self):
+        # Given I have found features once with a manifest
+        first, stats = self.find()
+        self.assertEqual(stats, {'scanned': 3, 'skipped': 0})
+
+        # When I find features again
+        second, stats = self.find()
+
+        # Then no directory is listed again
+        self.assertEqual(stats, {'scanned': 0, 'skipped': 3})
+        # And I see the same features
+        self.assertEqual(second, first)
+
+    def test_changed_directory_rescanned(self):
+        # Given I have found features once with a manifest
+        self.find()
+
+        # When I add a feature to a directory and find features again
+        with open(os.path.join(self.root, 'sub', 'new.feature'), 'a'):
+            pass
+        results, stats = self.find(workers=4)
+
+        # Then only that directory is listed again
+        self.assertEqual(stats, {'scanned': 1, 'skipped': 2})
+        # And I see the new feature
+        self.assertEqual(results, [
+            'a.feature',
+            'sub/b.feature',
+            'sub/new.feature',
+            'sub/deeper/c.feature',
+        ])
+
+    def test_parent_ignore_file_changed(self):
+        # Given I have found features once with a manifest
+        with open(os.path.join(self.root, 'sub', 'b.wip.feature'), 'a'):
+            pass
+        past = time.time() - 60
+        os.utime(os.path.join(self.root, 'sub'), (past, past))
+        self.find()
+
+        # When only the root's ignore file changes
+        with open(os.path.join(self.root, '.romaineignore'), 'w') as ignore:
+            ignore.write('*.wip.feature\n')
+        results, stats = self.find()
+
+        # Then the directories inheriting it are listed again
+        self.assertEqual(stats, {'scanned': 3, 'skipped': 0})
+        # And I see what a walk without the manifest finds
+        self.assertEqual(results, [
+            os.path.relpath(path, self.root)
+            for path in iter_features(self.root, sort=True)
+        ])
+        self.assertNotIn('sub/b.wip.feature', results)
+
+    def test_recently_changed_directory_not_trusted(self):
+        # Given I have found features just after changing a directory
+        with open(os.path.join(self.root, 'sub', 'new.feature'), 'a'):
+            pass
+        manifest = DiscoveryManifest(self.manifest_path)
+        list(iter_features(self.root, sort=True, manifest=manifest))
+
+        # When I find features again
+        results, stats = self.find()
+
+        # Then that directory is listed again
+        self.assertEqual(stats, {'scanned': 1, 'skipped': 2})
+
+    def test_other_options_ignore_manifest(self):
+        # Given I have found features once with a manifest
+        self.find()
+
+        # When I find features with different options
+        results, stats = self.find(patterns=['sub/*'])
+
+        # Then every directory is listed again
+        self.assertEqual(stats, {'scanned': 3, 'skipped': 0})
+        self.assertEqual(results, ['sub/b.feature', 'sub/deeper/c.feature'])
+
+    def test_subdirectory_walked_as_root(self):
+        # Given I have found features from the root with a manifest
+        self.find(patterns=['sub/*'])
+
+        # When I find features from a subdirectory with the same manifest
+        subdirectory = os.path.join(self.root, 'sub')
+        manifest = DiscoveryManifest(self.manifest_path)
+        results = list(iter_features(
+            subdirectory, sort=True, manifest=manifest, patterns=['sub/*']))
+
+        # Then its directories are listed again
+        self.assertEqual(manifest.stats, {'scanned': 2, 'skipped': 0})
+        # And I see what a walk without the manifest finds
+        self.assertEqual(results, list(iter_features(
+            subdirectory, sort=True, patterns=['sub/*'])))
+        self.assertEqual(results, [])
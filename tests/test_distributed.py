@@ -0,0 +1,163 @@
+from tests import common
+from unittest import TestCase
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+
+from romaine import exc
+from romaine.core import Core
+from romaine.distributed import Coordinator, run_worker
+
+CALCULATOR_FEATURE = os.path.join(common.FEATURES_DIR, 'calculator.feature')
+
+FAILING_FEATURE = """Feature: Failing
+  Scenario: A
+    Given I am scenario A
+
+  Scenario: B
+    Given I am scenario B
+    And I fail
+"""
+
+SLOW_FEATURE = """Feature: Slow
+  Scenario: Slow
+""" + "    Given I pause\n" * 20
+
+DYING_FEATURE = """Feature: Dying workers
+  Scenario: Dies
+    Given a worker that dies unless {marker} exists
+
+  Scenario: Survives
+    Given a worker that dies unless {marker} exists
+"""
+
+
+class TestDistributedRun(TestCase):
+    """
+        Test running scenarios on local worker processes.
+    """
+
+    def setUp(self):
+        self.core = Core()
+        self.core.load_steps([
+            'test_data.steps.calculator_steps',
+            'test_data.steps.dying_steps',
+            'test_data.steps.order_steps',
+        ])
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+
+    def run_distributed(self, paths, logger, workers):
+        return self.core.run(paths, logger, runner=functools.partial(
+            Coordinator, local_workers=workers, timeout=30))
+
+    def test_distributed_run(self):
+        # Given I have run a feature serially
+        serial_logger = common.BufferingLogger()
+        serial = self.core.run([CALCULATOR_FEATURE], serial_logger)
+
+        # When I run it on two workers
+        logger = common.BufferingLogger()
+        statistics = self.run_distributed([CALCULATOR_FEATURE], logger, 2)
+
+        # Then the statistics and log match the serial run's
+        self.assertEqual(common.comparable(statistics),
+                         common.comparable(serial))
+        self.assertEqual(logger.messages(logging.INFO),
+                         serial_logger.messages(logging.INFO))
+
+    def test_dead_worker(self):
+        # Given I have a scenario that kills the first worker to run it
+        marker = os.path.join(self.root, 'died')
+        common.write_file(os.path.join(self.root, 'dying.feature'),
+                          DYING_FEATURE.format(marker=marker))
+
+        # When I run it on two workers
+        statistics = self.run_distributed(
+            [self.root], common.BufferingLogger(), 2)
+
+        # Then the work of the dead worker is done by the other
+        self.assertTrue(os.path.exists(marker))
+        self.assertEqual(statistics['scenarios'],
+                         {'total': 2, 'passed': 2, 'cancelled': 0,
+                          'cached': 0})
+
+    def test_cancel_remote_scenarios(self):
+        # Given a slow scenario and a failing feature
+        slow = os.path.join(self.root, 'slow.feature')
+        failing = os.path.join(self.root, 'failing.feature')
+        common.write_file(slow, SLOW_FEATURE)
+        common.write_file(failing, FAILING_FEATURE)
+
+        # When I run them on two workers, failing fast
+        statistics = self.core.run(
+            [slow, failing],
+            common.BufferingLogger(),
+            runner=functools.partial(Coordinator, local_workers=2,
+                                     timeout=30),
+            fail_fast=True,
+        )
+
+        # Then the slow scenario is stopped, so only the failing feature is
+        # reported
+        self.assertEqual(statistics['scenarios']['total'], 2)
+        self.assertEqual(statistics['scenarios']['cancelled'], 1)
+
+    def test_silent_worker(self):
+        # Given I have run a feature serially
+        serial = self.core.run([CALCULATOR_FEATURE], common.BufferingLogger())
+
+        # And a run with a short lease
+        coordinators = []
+
+        def runner(*args, **kwargs):
+            coordinator = Coordinator(*args, lease=0.5, timeout=30,
+                                      **kwargs)
+            coordinators.append(coordinator)
+            return coordinator
+
+        results = []
+        running = threading.Thread(target=lambda: results.append(
+            self.core.run([CALCULATOR_FEATURE], common.BufferingLogger(),
+                          runner=runner)))
+        running.start()
+        while not (coordinators and coordinators[0].address):
+            time.sleep(0.01)
+        address = coordinators[0].address
+
+        # And a worker that takes a unit of work then goes silent
+        silent = socket.create_connection(address)
+        self.addCleanup(silent.close)
+        reader = silent.makefile('rb')
+        reader.readline()
+        silent.sendall(b'{"type": "next"}\n')
+        self.assertEqual(json.loads(reader.readline().decode('utf-8'))['type'],
+                         'unit')
+
+        # When another worker joins
+        worker = multiprocessing.Process(target=run_worker, args=address)
+        worker.start()
+        running.join(30)
+        worker.join(30)
+
+        # Then the silent worker's unit is run by the other once the lease
+        # is up
+        self.assertEqual(common.comparable(results[0]),
+                         common.comparable(serial))
+
+    def test_no_workers(self):
+        # When I run with no workers
+        # Then I am told no results arrived
+        with self.assertRaises(exc.WorkerTimeoutError):
+            self.core.run(
+                [CALCULATOR_FEATURE],
+                common.BufferingLogger(),
+                runner=functools.partial(Coordinator, timeout=0.1),
+            )
@@ -0,0 +1,163 @@
+from tests import common
+from unittest import TestCase
+import functools
+import os
+import shutil
+import tempfile
+import time
+
+from romaine.core import Core
+from romaine.failures import FailureCache
+from romaine.parallel import ProcessPoolRunner, ThreadPoolRunner
+
+FAILING_FEATURE = """Feature: Failing
+  Scenario: A
+    Given I am scenario A
+
+  Scenario: B
+    Given I am scenario B
+    And I fail
+
+  Scenario: C
+    Given I am scenario C
+"""
+
+LATER_FEATURE = """Feature: Later
+  Scenario: D
+    Given I am scenario D
+"""
+
+SLOW_FEATURE = """Feature: Slow
+  Scenario: Slow
+    Given I pause
+    And I pause
+    And I pause
+    And I pause
+    And I pause
+    And I am scenario Slow
+"""
+
+HANGING_FEATURE = """Feature: Hanging
+  Scenario: Hang
+    Given I hang
+"""
+
+
+class TestFailures(TestCase):
+    """
+        Test remembering failed scenarios and stopping at the first.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.cache_path = os.path.join(self.root, 'cache', 'failures.json')
+        self.failing = os.path.join(self.root, 'failing.feature')
+        self.later = os.path.join(self.root, 'later.feature')
+        common.write_file(self.failing, FAILING_FEATURE)
+        common.write_file(self.later, LATER_FEATURE)
+        self.core = Core()
+        self.steps = self.core.load_steps(['test_data.steps.order_steps'])[0]
+
+    def test_run_records_failures(self):
+        # Given a scenario that no longer exists failed last time
+        failures = FailureCache(self.cache_path)
+        failures.failed = set([self.failing + '::A'])
+
+        # When I run the failing feature
+        self.core.run([self.failing], common.BufferingLogger(),
+                      failures=failures)
+
+        # Then only the scenario that failed this time is saved
+        self.assertEqual(FailureCache(self.cache_path).failed,
+                         set([self.failing + '::B']))
+
+    def test_failed_first(self):
+        # Given B failed last time
+        failures = FailureCache(self.cache_path)
+        failures.failed = set([self.failing + '::B'])
+
+        # When I run both features failing first
+        self.core.run([self.later, self.failing], common.BufferingLogger(),
+                      failures=failures, failed_first=True)
+
+        # Then B runs before everything else
+        self.assertEqual(self.steps.ran, ['B', 'A', 'C', 'D'])
+
+    def test_failed_first_without_failures(self):
+        # When I run failing first with no failures to go by
+        # Then I am told they are needed, before anything runs
+        with self.assertRaises(ValueError):
+            self.core.run([self.failing], common.BufferingLogger(),
+                          failed_first=True)
+        self.assertEqual(self.steps.ran, [])
+
+    def test_fail_fast(self):
+        # When I run both features, failing fast
+        logger = common.BufferingLogger()
+        statistics = self.core.run(
+            [self.failing, self.later], logger, fail_fast=True)
+
+        # Then the run stops after B
+        self.assertEqual(self.steps.ran, ['A', 'B'])
+        self.assertEqual(statistics['features']['total'], 1)
+        self.assertEqual(statistics['scenarios']['total'], 2)
+        # And the scenarios after it are cancelled
+        self.assertEqual(statistics['scenarios']['cancelled'], 2)
+        self.assertIn('2 scenarios cancelled', logger.messages(logger.INFO))
+
+    def test_fail_fast_in_threads(self):
+        # When I run both features in one thread, failing fast
+        statistics = self.core.run(
+            [self.failing, self.later],
+            common.BufferingLogger(),
+            runner=functools.partial(ThreadPoolRunner, threads=1),
+            fail_fast=True,
+        )
+
+        # Then the later feature isn't merged
+        self.assertEqual(statistics['features']['total'], 1)
+        self.assertEqual(statistics['steps']['failed'], 1)
+
+    def test_cancel_running_scenarios(self):
+        # Given a slow scenario
+        slow = os.path.join(self.root, 'slow.feature')
+        common.write_file(slow, SLOW_FEATURE)
+
+        # When I run it alongside a failure in two threads, failing fast
+        statistics = self.core.run(
+            [slow, self.failing, self.later],
+            common.BufferingLogger(),
+            runner=functools.partial(ThreadPoolRunner, threads=2),
+            fail_fast=True,
+        )
+
+        # Then the slow scenario stops before its last step
+        self.assertNotIn('Slow', self.steps.ran)
+        # And the scenarios not started are dropped
+        self.assertNotIn('C', self.steps.ran)
+        self.assertNotIn('D', self.steps.ran)
+        # And only the failing feature is reported
+        self.assertEqual(statistics['features']['total'], 1)
+        self.assertEqual(statistics['scenarios']['total'], 2)
+        self.assertEqual(statistics['scenarios']['cancelled'], 3)
+
+    def test_grace_timeout(self):
+        # Given a scenario that hangs
+        hanging = os.path.join(self.root, 'hanging.feature')
+        common.write_file(hanging, HANGING_FEATURE)
+
+        # When I run it alongside a failure in two processes, failing fast
+        started = time.time()
+        statistics = self.core.run(
+            [hanging, self.failing, self.later],
+            common.BufferingLogger(),
+            runner=functools.partial(
+                ProcessPoolRunner, processes=2, grace=0.5),
+            fail_fast=True,
+        )
+
+        # Then the hanging scenario is given up on
+        self.assertLess(time.time() - started, 10)
+        self.assertEqual(statistics['scenarios']['total'], 2)
+        self.assertEqual(statistics['scenarios']['cancelled'], 3)
@@ -0,0 +1,88 @@
+from tests import common  # noqa
+from unittest import TestCase
+import hashlib
+import os
+import shutil
+import tempfile
+
+from romaine.core import Core
+from romaine.features import FeatureIndex
+
+
+class TestFeatureIndex(TestCase):
+    """
+        Test the per-core index of located features.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        for name in ('b.feature', 'a.feature'):
+            with open(os.path.join(self.root, name), 'w') as feature_file:
+                feature_file.write('Feature: {}\n'.format(name))
+        self.cwd = os.getcwd()
+        self.addCleanup(os.chdir, self.cwd)
+
+    def test_relative_and_absolute_paths(self):
+        # Given I have an index
+        index = FeatureIndex()
+        # And I am in the features directory
+        os.chdir(self.root)
+
+        # When I add a feature by relative, absolute and symlinked paths
+        os.symlink('b.feature', 'link.feature')
+        first = index.add('b.feature')
+        index.add(os.path.join(self.root, 'b.feature'))
+        index.add('link.feature')
+
+        # Then it is indexed once, under the first path
+        self.assertEqual(index.paths(), ['b.feature'])
+        self.assertIn(os.path.join(self.root, 'link.feature'), index)
+        self.assertIs(index.get('./b.feature'), first)
+
+    def test_record_stats(self):
+        # Given I have indexed a feature
+        index = FeatureIndex()
+        path = os.path.join(self.root, 'a.feature')
+        record = index.add(path)
+
+        # Then its size, mtime and digest are recorded
+        self.assertEqual(record.size, len('Feature: a.feature\n'))
+        self.assertEqual(record.mtime, os.stat(path).st_mtime)
+        self.assertEqual(
+            record.digest,
+            hashlib.sha1(b'Feature: a.feature\n').hexdigest(),
+        )
+
+        # When the feature changes and I index it again
+        with open(path, 'a') as feature_file:
+            feature_file.write('  More description\n')
+        index.add(path)
+
+        # Then the record is updated
+        self.assertEqual(record.size, os.stat(path).st_size)
+        with open(path, 'rb') as feature_file:
+            self.assertEqual(record.digest,
+                             hashlib.sha1(feature_file.read()).hexdigest())
+
+        # And when I remove the feature it is no longer indexed
+        index.remove(path)
+        self.assertEqual(len(index), 0)
+        self.assertIsNone(index.get(path))
+
+    def test_cores_do_not_share_features(self):
+        # Given I have two cores
+        first = Core()
+        second = Core()
+
+        # When I locate features with the first, sorted
+        first.locate_features(self.root, sort=True)
+
+        # Then the first has the features in the order located
+        self.assertEqual(
+            [record.path for record in first.features],
+            [os.path.join(self.root, 'a.feature'),
+             os.path.join(self.root, 'b.feature')],
+        )
+        # And the second has none
+        self.assertEqual(second.feature_file_paths, [])
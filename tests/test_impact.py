@@ -0,0 +1,184 @@
+from tests import common
+from unittest import TestCase, skipUnless
+import os
+import shutil
+import sys
+import tempfile
+
+from romaine.core import Core
+from romaine.impact import (
+    ImpactMap,
+    MonitoringTracer,
+    SettraceTracer,
+    relative_path,
+)
+
+HELPER = """def help_out():
+    return 'helped'
+"""
+
+STEPS = """from romaine.steps import Given
+
+import impact_helper
+
+ran = []
+
+
+@Given('I am helped')
+def helped():
+    ran.append(impact_helper.help_out())
+
+
+@Given('I am on my own')
+def on_my_own():
+    ran.append('alone')
+"""
+
+FEATURE = """Feature: Impact
+  Scenario: Helped
+    Given I am helped
+
+  Scenario: Alone
+    Given I am on my own
+"""
+
+UNDEFINED_FEATURE = """Feature: Undefined
+  Scenario: Undefined
+    Given I am on my own
+    And I am not defined yet
+"""
+
+
+def traced(tracer):
+    tracer.start()
+    try:
+        tracer.collect()
+        relative_path('.')
+        return set(code.co_name for code in tracer.collect())
+    finally:
+        tracer.stop()
+
+
+class TestImpact(TestCase):
+    """
+        Test recording the code scenarios run, and selecting scenarios by
+        changed files.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.map_path = os.path.join(self.root, 'cache', 'impact.json')
+        self.helper = os.path.join(self.root, 'impact_helper.py')
+        common.write_file(self.helper, HELPER)
+        self.module = os.path.join(self.root, 'impact_steps.py')
+        common.write_file(self.module, STEPS)
+        self.feature = os.path.join(self.root, 'impact.feature')
+        common.write_file(self.feature, FEATURE)
+        sys.path.insert(0, self.root)
+        self.addCleanup(sys.path.remove, self.root)
+        for module_name in ('impact_steps', 'impact_helper'):
+            self.addCleanup(sys.modules.pop, module_name, None)
+
+        self.core = Core()
+        self.steps = self.core.load_steps(['impact_steps'])[0]
+
+    def test_settrace_tracer(self):
+        # A function called while tracing is collected
+        self.assertIn('relative_path', traced(SettraceTracer()))
+
+    @skipUnless(hasattr(sys, 'monitoring'), 'needs sys.monitoring')
+    def test_monitoring_tracer(self):
+        self.assertIn('relative_path', traced(MonitoringTracer()))
+
+    def test_record(self):
+        # When I run the feature recording its impact
+        self.core.run([self.feature], common.BufferingLogger(),
+                      impact=ImpactMap(self.map_path))
+
+        # Then each scenario's files are saved
+        scenarios = ImpactMap(self.map_path).scenarios
+        helped = scenarios[relative_path(self.feature) + '::Helped']
+        alone = scenarios[relative_path(self.feature) + '::Alone']
+        self.assertEqual(helped[relative_path(self.helper)], ['help_out'])
+        self.assertIn('helped', helped[relative_path(self.module)])
+        self.assertNotIn(relative_path(self.helper), alone)
+        # And installed code is left out
+        self.assertFalse(any(path.endswith('/os.py') for path in helped))
+
+    def test_select_changed(self):
+        # Given I have recorded the feature's impact
+        self.core.run([self.feature], common.BufferingLogger(),
+                      impact=ImpactMap(self.map_path))
+
+        # When only the helper changes
+        del self.steps.ran[:]
+        statistics = self.core.run(
+            [self.feature],
+            common.BufferingLogger(),
+            impact=ImpactMap(self.map_path),
+            changed=[self.helper],
+        )
+
+        # Then only the scenario using it runs
+        self.assertEqual(self.steps.ran, ['helped'])
+        self.assertEqual(statistics['scenarios']['total'], 1)
+
+    def test_select_unrecorded(self):
+        # Given nothing is recorded
+        # When the helper changes
+        self.core.run(
+            [self.feature],
+            common.BufferingLogger(),
+            impact=ImpactMap(self.map_path),
+            changed=[self.helper],
+        )
+
+        # Then every scenario runs
+        self.assertEqual(self.steps.ran, ['helped', 'alone'])
+
+    def test_changed_without_impact(self):
+        # When I run only what changed files affect, with no impact map
+        # Then I am told one is needed, before anything runs
+        with self.assertRaises(ValueError):
+            self.core.run([self.feature], common.BufferingLogger(),
+                          changed=[self.helper])
+        self.assertEqual(self.steps.ran, [])
+
+    def test_select_undefined(self):
+        # Given I have recorded the impact of a scenario with an undefined
+        # step
+        undefined = os.path.join(self.root, 'undefined.feature')
+        common.write_file(undefined, UNDEFINED_FEATURE)
+        self.core.run([undefined], common.BufferingLogger(),
+                      impact=ImpactMap(self.map_path))
+
+        # When a file it didn't run changes, such as one the step may be
+        # defined in
+        del self.steps.ran[:]
+        self.core.run(
+            [undefined],
+            common.BufferingLogger(),
+            impact=ImpactMap(self.map_path),
+            changed=[self.helper],
+        )
+
+        # Then it runs again
+        self.assertEqual(self.steps.ran, ['alone'])
+
+    def test_select_changed_feature(self):
+        # Given I have recorded the feature's impact
+        self.core.run([self.feature], common.BufferingLogger(),
+                      impact=ImpactMap(self.map_path))
+
+        # When the feature file changes
+        del self.steps.ran[:]
+        self.core.run(
+            [self.feature],
+            common.BufferingLogger(),
+            impact=ImpactMap(self.map_path),
+            changed=[self.feature],
+        )
+
+        # Then every scenario in it runs
+        self.assertEqual(self.steps.ran, ['helped', 'alone'])
@@ -10,9 +10,10 @@ class TestLocateFeatures(unittest.TestCase):
     """
     feature_paths = ('tests/features',
                      '/tmp/romaine_tests/features')
-    features = ('feature1',
-                'feature2',
-                'subdir/feature3')
+    features = ('feature1.feature',
+                'feature2.feature',
+                'subdir/feature3.feature',
+                'subdir/not_a_feature.txt')
 
     def setUp(self):
         """
@@ -61,16 +62,16 @@ class TestLocateFeatures(unittest.TestCase):
         results = core.locate_features('tests/features')
 
         # Then I see the list:
-        #   | path                           |
-        #   | tests/features/feature1        |
-        #   | tests/features/feature2        |
-        #   | tests/features/subdir/feature3 |
+        #   | path                                   |
+        #   | tests/features/feature1.feature        |
+        #   | tests/features/feature2.feature        |
+        #   | tests/features/subdir/feature3.feature |
         self.assertEqual(
             sorted(results),
             [
-                'tests/features/feature1',
-                'tests/features/feature2',
-                'tests/features/subdir/feature3',
+                'tests/features/feature1.feature',
+                'tests/features/feature2.feature',
+                'tests/features/subdir/feature3.feature',
             ]
         )
 
@@ -86,16 +87,16 @@ class TestLocateFeatures(unittest.TestCase):
         results = core.locate_features('/tmp/romaine_tests/features')
 
         # Then I see the list:
-        #   | path                           |
-        #   | /tmp/romaine_tests/features/feature1        |
-        #   | /tmp/romaine_tests/features/feature2        |
-        #   | /tmp/romaine_tests/features/subdir/feature3 |
+        #   | path                                                |
+        #   | /tmp/romaine_tests/features/feature1.feature        |
+        #   | /tmp/romaine_tests/features/feature2.feature        |
+        #   | /tmp/romaine_tests/features/subdir/feature3.feature |
         self.assertEqual(
             sorted(results),
             [
-                '/tmp/romaine_tests/features/feature1',
-                '/tmp/romaine_tests/features/feature2',
-                '/tmp/romaine_tests/features/subdir/feature3',
+                '/tmp/romaine_tests/features/feature1.feature',
+                '/tmp/romaine_tests/features/feature2.feature',
+                '/tmp/romaine_tests/features/subdir/feature3.feature',
             ],
         )
 
@@ -112,7 +113,7 @@ class TestLocateFeatures(unittest.TestCase):
         #  And I locate features in /tmp/romaine_tests/features
         core.locate_features('/tmp/romaine_tests/features')
 
-        # Then the core's feature_paths_list variable contains no duplicates
+        # Then the core's feature_file_paths variable contains no duplicates
         feature_file_paths = list(core.feature_file_paths)
         for item in feature_file_paths:
             self.assertEqual(
@@ -120,9 +121,9 @@ class TestLocateFeatures(unittest.TestCase):
                 1,
             )
 
-    def test_confirm_features_in_class_variable(self):
+    def test_confirm_features_in_instance_variable(self):
         """
-            Check feature location populates class features variable.
+            Check feature location populates the core's features variable.
         """
         # Given I have Romaine's core
         from tests.common import romaine
@@ -133,22 +134,22 @@ class TestLocateFeatures(unittest.TestCase):
         core.locate_features('/tmp/romaine_tests/features')
         core.locate_features('tests/features')
 
-        # Then the core's feature_paths_list variable contains:
-        #   | path                                        |
-        #   | /tmp/romaine_tests/features/feature1        |
-        #   | /tmp/romaine_tests/features/feature2        |
-        #   | /tmp/romaine_tests/features/subdir/feature3 |
-        #   | tests/features/feature1                     |
-        #   | tests/features/feature2                     |
-        #   | tests/features/subdir/feature3              |
+        # Then the core's feature_file_paths variable contains:
+        #   | path                                                |
+        #   | /tmp/romaine_tests/features/feature1.feature        |
+        #   | /tmp/romaine_tests/features/feature2.feature        |
+        #   | /tmp/romaine_tests/features/subdir/feature3.feature |
+        #   | tests/features/feature1.feature                     |
+        #   | tests/features/feature2.feature                     |
+        #   | tests/features/subdir/feature3.feature              |
         self.assertEqual(
             sorted(core.feature_file_paths),
             [
-                '/tmp/romaine_tests/features/feature1',
-                '/tmp/romaine_tests/features/feature2',
-                '/tmp/romaine_tests/features/subdir/feature3',
-                'tests/features/feature1',
-                'tests/features/feature2',
-                'tests/features/subdir/feature3',
+                '/tmp/romaine_tests/features/feature1.feature',
+                '/tmp/romaine_tests/features/feature2.feature',
+                '/tmp/romaine_tests/features/subdir/feature3.feature',
+                'tests/features/feature1.feature',
+                'tests/features/feature2.feature',
+                'tests/features/subdir/feature3.feature',
             ]
         )
@@ -0,0 +1,43 @@
+from tests import common  # noqa
+from unittest import TestCase
+
+from romaine.outline import compile_template, fill_template
+
+
+class TestOutlineTemplates(TestCase):
+    """
+        Test filling outline steps from example rows.
+    """
+
+    def test_fill(self):
+        # Given a step with placeholders
+        template, unknown = compile_template(
+            '<first> minus <second> is <first name>',
+            ['first', 'second', 'first name'],
+        )
+
+        # When I fill it from a row
+        text = fill_template(
+            template, {'first': '5', 'second': '3', 'first name': 'two'})
+
+        # Then each placeholder is replaced
+        self.assertEqual(text, '5 minus 3 is two')
+
+    def test_comparison_is_not_a_placeholder(self):
+        # Given a step comparing numbers
+        template, unknown = compile_template('<a> < 3 and 4 > <a>', ['a'])
+
+        # Then only its placeholders are filled
+        self.assertEqual(fill_template(template, {'a': '1'}),
+                         '1 < 3 and 4 > 1')
+
+    def test_unknown_placeholder(self):
+        # Given a step with markup as well as a placeholder
+        template, unknown = compile_template(
+            'I see <b><count></b> apples', ['count'])
+
+        # Then only the placeholder is filled
+        self.assertEqual(fill_template(template, {'count': '3'}),
+                         'I see <b>3</b> apples')
+        # And the markup is reported as unknown placeholders
+        self.assertEqual(unknown, ['b', '/b'])
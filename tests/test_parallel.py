@@ -0,0 +1,252 @@
+from tests import common
+from unittest import TestCase
+import functools
+import logging
+import os
+import shutil
+import tempfile
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from romaine.core import Core
+from romaine.parallel import (
+    FEATURE,
+    SCENARIO,
+    ProcessPoolRunner,
+    ThreadPoolRunner,
+    WorkStealingRunner,
+    WorkStealingScheduler,
+    run_buffered,
+)
+from romaine.runner import prepare_feature, scenario_context
+
+CALCULATOR_FEATURE = os.path.join(common.FEATURES_DIR, 'calculator.feature')
+
+
+class TestProcessPoolRunner(TestCase):
+    """
+        Test running features in worker processes.
+    """
+
+    def setUp(self):
+        self.core = Core()
+        self.core.load_steps(['test_data.steps.calculator_steps'])
+        self.serial_logger = common.BufferingLogger()
+        self.serial = self.core.run(
+            [CALCULATOR_FEATURE, CALCULATOR_FEATURE], self.serial_logger)
+
+    def run_in_processes(self, granularity):
+        logger = common.BufferingLogger()
+        statistics = self.core.run(
+            [CALCULATOR_FEATURE, CALCULATOR_FEATURE],
+            logger,
+            runner=functools.partial(ProcessPoolRunner, processes=2,
+                                     granularity=granularity),
+        )
+        return statistics, logger
+
+    def test_scenarios_in_processes(self):
+        # When I run features with scenarios spread over two processes
+        statistics, logger = self.run_in_processes(SCENARIO)
+
+        # Then the statistics match a serial run's
+        self.assertEqual(common.comparable(statistics),
+                         common.comparable(self.serial))
+        # And so does what is logged
+        for level in (logging.INFO, logging.WARNING):
+            self.assertEqual(logger.messages(level),
+                             self.serial_logger.messages(level))
+
+    def test_features_in_processes(self):
+        # When I run features over two processes a feature at a time
+        statistics, logger = self.run_in_processes(FEATURE)
+
+        # Then the statistics match a serial run's
+        self.assertEqual(common.comparable(statistics),
+                         common.comparable(self.serial))
+        # And one stub is suggested for the undefined step
+        stubs = [
+            message
+            for message in logger.messages(logging.INFO)
+            if message.startswith('@')
+        ]
+        self.assertEqual(len(stubs), 1)
+
+    def test_unknown_granularity(self):
+        # When I ask for an unknown granularity
+        # Then I am told it is not valid
+        with self.assertRaises(ValueError):
+            ProcessPoolRunner(self.core, None, granularity='step')
+
+
+class TestThreadPoolRunner(TestCase):
+    """
+        Test running features in a pool of threads.
+    """
+
+    def setUp(self):
+        self.core = Core()
+        self.steps = self.core.load_steps(['test_data.steps.context_steps'])[0]
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        common.write_file(
+            os.path.join(self.root, 'counting.feature'),
+            'Feature: Counting\n' + ''.join(
+                common.COUNTING_SCENARIO.format(number=number,
+                                                total=number + 1)
+                for number in range(8)
+            ),
+        )
+
+    def test_scenarios_in_threads(self):
+        # Given I have run the scenarios serially
+        serial_logger = common.BufferingLogger()
+        serial = self.core.run([self.root], serial_logger)
+        del self.steps.waits[:]
+
+        # When I run them in eight threads
+        logger = common.BufferingLogger()
+        statistics = self.core.run(
+            [self.root],
+            logger,
+            runner=functools.partial(ThreadPoolRunner, threads=8),
+        )
+
+        # Then every scenario kept its own count
+        self.assertEqual(statistics['scenarios'],
+                         {'total': 8, 'passed': 8, 'cancelled': 0,
+                          'cached': 0})
+        self.assertEqual(common.comparable(statistics),
+                         common.comparable(serial))
+        # And the log is not interleaved
+        self.assertEqual(logger.messages(logging.INFO),
+                         serial_logger.messages(logging.INFO))
+        # And the waits overlapped
+        self.assertGreater(common.peak_concurrency(self.steps.waits), 1)
+        # And the context is gone after the run
+        self.assertIsNone(scenario_context())
+
+    def test_buffering_leaves_out_disabled_levels(self):
+        # Given I have the prepared scenarios
+        path = os.path.join(self.root, 'counting.feature')
+
+        def levels(level):
+            elements = prepare_feature(
+                path, self.core.parse_feature(path))['elements']
+            return set(
+                args[0]
+                for stats, records in run_buffered(
+                    self.core, True, elements, level=level)
+                for kind, args in records
+                if kind == 'alert'
+            )
+
+        # When I run them for loggers at DEBUG and at INFO level
+        # Then only the INFO run leaves DEBUG alerts out
+        self.assertIn(logging.DEBUG, levels(logging.DEBUG))
+        self.assertNotIn(logging.DEBUG, levels(logging.INFO))
+
+
+class TestWorkStealing(TestCase):
+    """
+        Test balancing work between workers by stealing.
+    """
+
+    def test_steal(self):
+        # Given one worker has two features' units
+        scheduler = WorkStealingScheduler(2)
+        for feature, unit in [('a', 1), ('a', 2), ('b', 3), ('b', 4),
+                              ('b', 5), ('b', 6)]:
+            scheduler.push(0, feature, unit)
+
+        # When the other worker takes work
+        # Then it steals the last feature's units, up to half, in order
+        self.assertEqual(scheduler.take(1), 4)
+        self.assertEqual(scheduler.take(1), 5)
+        self.assertEqual(scheduler.take(1), 6)
+        self.assertEqual(scheduler.steals, 1)
+        # And the owner keeps working through its own deque
+        self.assertEqual(scheduler.take(0), 1)
+
+        # When the thief runs out again, it steals again
+        self.assertEqual(scheduler.take(1), 3)
+        self.assertEqual(scheduler.take(0), 2)
+        # And there is nothing left once every deque is empty
+        self.assertIsNone(scheduler.take(0))
+        self.assertIsNone(scheduler.take(1))
+
+    def test_work_stealing_run(self):
+        # Given I have run features serially
+        core = Core()
+        core.load_steps(['test_data.steps.calculator_steps'])
+        serial_logger = common.BufferingLogger()
+        serial = core.run([CALCULATOR_FEATURE, CALCULATOR_FEATURE],
+                          serial_logger)
+
+        for processes in (False, True):
+            # When I run them on work stealing workers
+            logger = common.BufferingLogger()
+            statistics = core.run(
+                [CALCULATOR_FEATURE, CALCULATOR_FEATURE],
+                logger,
+                runner=functools.partial(WorkStealingRunner, workers=3,
+                                         processes=processes),
+            )
+
+            # Then the statistics and log match the serial run's
+            self.assertEqual(common.comparable(statistics),
+                             common.comparable(serial))
+            self.assertEqual(logger.messages(logging.INFO),
+                             serial_logger.messages(logging.INFO))
+
+    def test_worker_exiting(self):
+        # Given running a unit of work raises SystemExit
+        core = Core()
+        core.load_steps(['test_data.steps.calculator_steps'])
+
+        # When I run on work stealing workers
+        # Then the run stops with it rather than waiting forever
+        with mock.patch('romaine.parallel.run_buffered',
+                        side_effect=SystemExit(3)):
+            with self.assertRaises(SystemExit):
+                core.run(
+                    [CALCULATOR_FEATURE],
+                    common.BufferingLogger(),
+                    runner=functools.partial(WorkStealingRunner, workers=2),
+                )
+
+    def test_one_feature_spread(self):
+        # Given I have one feature of slow scenarios
+        core = Core()
+        steps = core.load_steps(['test_data.steps.context_steps'])[0]
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        common.write_file(
+            os.path.join(root, 'counting.feature'),
+            'Feature: Counting\n' + ''.join(
+                common.COUNTING_SCENARIO.format(number=number,
+                                                total=number + 1)
+                for number in range(8)
+            ),
+        )
+
+        # When I run it on four work stealing workers
+        runner = []
+
+        def work_stealing_runner(*args):
+            runner.append(WorkStealingRunner(*args, workers=4))
+            return runner[0]
+
+        statistics = core.run([root], common.BufferingLogger(),
+                              runner=work_stealing_runner)
+
+        # Then the idle workers stole scenarios from it
+        self.assertEqual(statistics['scenarios'],
+                         {'total': 8, 'passed': 8, 'cancelled': 0,
+                          'cached': 0})
+        self.assertGreater(runner[0].scheduler.steals, 0)
+        # And their waits overlapped
+        self.assertGreater(common.peak_concurrency(steps.waits), 1)
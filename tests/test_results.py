@@ -0,0 +1,156 @@
+from tests import common
+from unittest import TestCase
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+
+from romaine.converters import ConverterRegistry
+from romaine.core import Core
+from romaine.results import ResultCache
+
+STEPS = """from romaine.steps import Given
+
+ran = []
+
+
+@Given('I am scenario {name:word}')
+def record_scenario(name):
+    ran.append(name)
+
+
+@Given('I fail')
+def fail():
+    assert False, 'Failed on purpose'
+"""
+
+FEATURE = """Feature: Results
+  Background:
+    Given I am scenario background
+
+  Scenario: A
+    Given I am scenario A
+
+  Scenario: B
+    Given I am scenario B
+    And I fail
+"""
+
+
+CONVERTERS = """def to_name(literal):
+    return literal
+"""
+
+
+class TestResultCache(TestCase):
+    """
+        Test skipping scenarios that passed before and haven't changed.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.cache_path = os.path.join(self.root, 'cache', 'results.json')
+        self.input = os.path.join(self.root, 'input.txt')
+        common.write_file(self.input, 'first')
+        self.feature = os.path.join(self.root, 'results.feature')
+        common.write_file(self.feature, FEATURE)
+        self.module = os.path.join(self.root, 'result_steps.py')
+        common.write_file(self.module, STEPS)
+        sys.path.insert(0, self.root)
+        self.addCleanup(sys.path.remove, self.root)
+        self.addCleanup(sys.modules.pop, 'result_steps', None)
+
+        self.core = Core()
+        self.steps = self.core.load_steps(['result_steps'])[0]
+
+    def run_cached(self):
+        del self.steps.ran[:]
+        return self.core.run(
+            [self.feature],
+            common.BufferingLogger(),
+            results=ResultCache(self.cache_path, inputs=[self.input]),
+        )
+
+    def test_unchanged_scenario_is_cached(self):
+        # Given A passed and B failed
+        self.run_cached()
+
+        # When I run them again
+        del self.steps.ran[:]
+        logger = common.BufferingLogger()
+        statistics = self.core.run(
+            [self.feature],
+            logger,
+            results=ResultCache(self.cache_path, inputs=[self.input]),
+        )
+
+        # Then only B runs
+        self.assertNotIn('A', self.steps.ran)
+        self.assertEqual(statistics['scenarios']['total'], 1)
+        self.assertEqual(statistics['scenarios']['cached'], 1)
+        self.assertIn('1 scenario cached', logger.messages(logger.INFO))
+
+    def test_changed_feature_text(self):
+        # Given A passed
+        self.run_cached()
+
+        # When its background changes
+        common.write_file(self.feature, FEATURE.replace(
+            'scenario background', 'scenario changed'))
+        self.run_cached()
+
+        # Then it runs again
+        self.assertIn('A', self.steps.ran)
+
+    def test_changed_step_definition(self):
+        # Given A passed
+        self.run_cached()
+
+        # When the step definition it uses changes
+        common.write_file(self.module, STEPS.replace(
+            'ran.append(name)', 'ran.append(str(name))'))
+        self.steps, = self.core.reload_steps(['result_steps'])
+        statistics = self.run_cached()
+
+        # Then it runs again
+        self.assertIn('A', self.steps.ran)
+        self.assertEqual(statistics['scenarios']['cached'], 0)
+
+    def test_changed_converter(self):
+        # Given A passed with its name converted by a converter of mine
+        converters = os.path.join(self.root, 'result_converters.py')
+        self.addCleanup(sys.modules.pop, 'result_converters', None)
+        common.write_file(self.module, STEPS.replace(
+            '{name:word}', '{name:name}'))
+
+        def load_converter(source):
+            common.write_file(converters, source)
+            sys.modules.pop('result_converters', None)
+            module = importlib.import_module('result_converters')
+            self.core.steps.converters = ConverterRegistry()
+            self.core.steps.converters.register('name', module.to_name)
+            self.steps, = self.core.reload_steps(['result_steps'])
+
+        load_converter(CONVERTERS)
+        self.run_cached()
+
+        # When the converter changes
+        load_converter(CONVERTERS.replace('literal\n', 'literal.strip()\n'))
+        statistics = self.run_cached()
+
+        # Then it runs again
+        self.assertIn('A', self.steps.ran)
+        self.assertEqual(statistics['scenarios']['cached'], 0)
+
+    def test_changed_input(self):
+        # Given A passed
+        self.run_cached()
+
+        # When a declared input changes
+        common.write_file(self.input, 'second')
+        self.run_cached()
+
+        # Then it runs again
+        self.assertIn('A', self.steps.ran)
@@ -0,0 +1,180 @@
+from tests import common
+from unittest import TestCase
+import logging
+import os
+import shutil
+import tempfile
+
+from romaine.core import Core
+from romaine.runner import prepare_feature
+
+CALCULATOR_FEATURE = os.path.join(common.FEATURES_DIR, 'calculator.feature')
+
+FAILING_FEATURE = """Feature: Failing
+  Scenario: Wrong sum
+    Given I have a calculator
+    And I have entered 1 into the calculator
+    Then the result should be 2 on the screen
+    And the result should be 1 on the screen
+
+  Scenario: Right sum
+    Given I have a calculator
+    And I have entered 1 into the calculator
+    Then the result should be 1 on the screen
+"""
+
+MARKUP_FEATURE = """Feature: Markup
+  Scenario Outline: Bold
+    Given I have entered <number> into the <b>calculator</b>
+
+  Examples:
+| number |
+| 1      |
+"""
+
+
+class TestRunner(TestCase):
+    """
+        Test running features with Core.run.
+    """
+
+    def setUp(self):
+        self.core = Core()
+        self.core.load_steps(['test_data.steps.calculator_steps'])
+
+    def test_run(self):
+        # When I run the calculator feature
+        logger = common.BufferingLogger()
+        statistics = self.core.run([CALCULATOR_FEATURE], logger)
+
+        # Then the scenario passes, with its background step
+        self.assertEqual(statistics['scenarios'],
+                         {'total': 2, 'passed': 1, 'cancelled': 0,
+                          'cached': 0})
+        # And each outline row stops at the undefined step
+        self.assertEqual(statistics['steps']['total'], 15)
+        self.assertEqual(statistics['steps']['passed'], 11)
+        self.assertEqual(statistics['steps']['failed'], 2)
+        self.assertEqual(statistics['features']['passed'], 0)
+        # And the steps are logged with the example rows filled in
+        info = logger.messages(logging.INFO)
+        self.assertIn('Given I have entered 10 into the calculator', info)
+        self.assertIn('Then the result should be 120 on the screen', info)
+        # And a stub is suggested once for the undefined step
+        stubs = [message for message in info if message.startswith('@')]
+        self.assertEqual(len(stubs), 1)
+        self.assertIn("@When('I press subtract')", stubs[0])
+
+    def test_outline_rows_are_released(self):
+        # When I run the calculator feature
+        statistics = self.core.run([CALCULATOR_FEATURE],
+                                   common.BufferingLogger())
+
+        # Then the outline counts its rows' steps
+        outline = statistics['features']['run'][0]['elements'][1]
+        self.assertEqual(outline['stats']['total_steps'], 10)
+        self.assertEqual(outline['stats']['failed_steps'], 2)
+        # And its examples don't keep the steps each row ran
+        self.assertNotIn('runs', outline['examples'][0])
+
+    def test_failing_scenario(self):
+        # Given I have a feature with a failing scenario
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        common.write_file(os.path.join(root, 'failing.feature'),
+                          FAILING_FEATURE)
+
+        # When I run it
+        logger = common.BufferingLogger()
+        statistics = self.core.run([root], logger)
+
+        # Then the failing scenario stops at the failing step
+        self.assertEqual(statistics['steps'], {
+            'total': 7,
+            'passed': 5,
+            'skipped': 0,
+            'failed': 1,
+        })
+        self.assertIn('Then the result should be 2 on the screen',
+                      logger.messages(logging.ERROR))
+        # And the next scenario still runs
+        self.assertEqual(statistics['scenarios'],
+                         {'total': 2, 'passed': 1, 'cancelled': 0,
+                          'cached': 0})
+
+    def test_run_selected_scenarios(self):
+        # When I run one scenario of the calculator feature
+        statistics = self.core.run(
+            [CALCULATOR_FEATURE],
+            common.BufferingLogger(),
+            scenarios=[CALCULATOR_FEATURE + '::Add two numbers'],
+        )
+
+        # Then only that scenario runs
+        self.assertEqual(statistics['scenarios'],
+                         {'total': 1, 'passed': 1, 'cancelled': 0,
+                          'cached': 0})
+        self.assertEqual(statistics['steps']['total'], 5)
+
+    def test_quiet_run(self):
+        # Given I only log warnings and errors
+        logger = common.BufferingLogger(logging.WARNING)
+        alerts = []
+        logger.alert = lambda level, body='', exc_info=False: (
+            alerts.append((level, body))
+        )
+
+        # When I run the calculator feature
+        self.core.run([CALCULATOR_FEATURE], logger)
+
+        # Then passing steps are not alerted at all
+        self.assertFalse([
+            body for level, body in alerts
+            if body.startswith('Given') or body.startswith('Step ')
+        ])
+
+    def test_markup_in_outline(self):
+        # Given an outline with markup that reads like a placeholder
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        markup = os.path.join(root, 'markup.feature')
+        common.write_file(markup, MARKUP_FEATURE)
+
+        # When I run it before another feature
+        logger = common.BufferingLogger()
+        statistics = self.core.run([markup, CALCULATOR_FEATURE], logger)
+
+        # Then the markup is left as it is
+        self.assertIn(
+            "Step 'Given I have entered 1 into the <b>calculator</b>' "
+            "executed",
+            '\n'.join(logger.messages(logging.DEBUG)),
+        )
+        # And I am warned of it, with the step's line
+        self.assertEqual(logger.messages(logging.WARNING), [
+            'Given I have entered <number> into the <b>calculator</b> '
+            '(line 3) uses <{}>, which is not a column of the Examples '
+            'table, so it is left as it is'.format(name)
+            for name in ('b', '/b')
+        ])
+        # And the run carries on
+        self.assertEqual(statistics['features']['total'], 2)
+
+    def test_prepare_feature(self):
+        # Given I have parsed the calculator feature
+        feature = self.core.parse_feature(CALCULATOR_FEATURE)
+
+        # When I prepare it to run
+        prepared = prepare_feature(CALCULATOR_FEATURE, feature)
+
+        # Then each element starts with the background steps
+        scenario, outline = prepared['elements']
+        self.assertEqual(scenario['steps'][0]['text'], 'I have a calculator')
+        self.assertEqual(len(outline['steps']), 5)
+        # And examples have hashes
+        self.assertEqual(outline['examples'][0]['hashes'][1],
+                         {'first': '7', 'second': '9', 'result': '-2'})
+        # And the parsed feature is left alone
+        self.assertEqual(len(feature['elements'][0]['steps']), 4)
+        self.assertIsNot(scenario['steps'][0],
+                         feature['background']['steps'][0])
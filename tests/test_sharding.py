@@ -0,0 +1,124 @@
+from tests import common
+from unittest import TestCase
+import os
+
+from romaine.core import Core
+from romaine.sharding import Shard, shard_key, stable_hash
+from romaine.timings import TimingHistory
+
+CALCULATOR_FEATURE = os.path.join(common.FEATURES_DIR, 'calculator.feature')
+
+SCENARIO_IDS = [
+    'features/{}.feature::Scenario {}'.format(feature, scenario)
+    for feature in range(20)
+    for scenario in range(10)
+]
+
+
+class TestSharding(TestCase):
+    """
+        Test splitting scenarios between shards.
+    """
+
+    def assert_partitioned(self, shards):
+        selected = [shard.select(SCENARIO_IDS) for shard in shards]
+        # Every scenario is in exactly one shard
+        self.assertEqual(sum(len(ids) for ids in selected),
+                         len(SCENARIO_IDS))
+        self.assertEqual(set().union(*selected), set(SCENARIO_IDS))
+        return selected
+
+    def test_hash_shards(self):
+        # When I split the scenarios into four shards
+        selected = self.assert_partitioned(
+            [Shard(index, 4) for index in range(1, 5)])
+
+        # Then each shard has some of them
+        self.assertTrue(all(selected))
+        # And a shard selects the same scenarios whatever else is in the run
+        self.assertEqual(Shard(2, 4).select(SCENARIO_IDS[:50]),
+                         selected[1] & set(SCENARIO_IDS[:50]))
+
+    def test_stable_key(self):
+        # Given a scenario ID with an absolute path
+        path = os.path.join(os.getcwd(), 'features', 'a.feature')
+
+        # Then it is hashed as if it were relative
+        self.assertEqual(shard_key(path + '::A'), 'features/a.feature::A')
+        self.assertEqual(stable_hash(path + '::A'),
+                         stable_hash('features/a.feature::A'))
+
+    def test_normalized_key(self):
+        # Given the same scenario ID with its path written differently
+        ids = [
+            'features/a.feature::A',
+            './features/a.feature::A',
+            'features//sub/../a.feature::A',
+        ]
+
+        # Then they all have the same key, and so the same shard
+        self.assertEqual(set(shard_key(id_) for id_ in ids),
+                         set(['features/a.feature::A']))
+
+    def test_balanced_shards_with_other_paths(self):
+        # Given a history recorded with one spelling of the paths
+        history = TimingHistory(os.devnull)
+        history.durations = dict(
+            (scenario_id, 100.0 if index < 3 else 1.0)
+            for index, scenario_id in enumerate(SCENARIO_IDS)
+        )
+
+        # When the run gives the same paths another way
+        ids = ['./' + scenario_id for scenario_id in SCENARIO_IDS]
+
+        # Then their durations are still found
+        self.assertEqual(history.estimate(ids[0]), 100.0)
+        self.assertEqual(
+            [Shard(index, 3, history).select(ids) for index in range(1, 4)],
+            [
+                set('./' + id_ for id_ in selected)
+                for selected in [
+                    Shard(index, 3, history).select(SCENARIO_IDS)
+                    for index in range(1, 4)
+                ]
+            ],
+        )
+
+    def test_balanced_shards(self):
+        # Given a history where the first scenarios are very slow
+        history = TimingHistory(os.devnull)
+        history.durations = dict(
+            (scenario_id, 100.0 if index < 3 else 1.0)
+            for index, scenario_id in enumerate(SCENARIO_IDS)
+        )
+
+        # When I split the scenarios into three balanced shards
+        selected = self.assert_partitioned(
+            [Shard(index, 3, history) for index in range(1, 4)])
+
+        # Then each shard gets one slow scenario and a third of the rest
+        for ids in selected:
+            estimate = sum(history.estimate(id_) for id_ in ids)
+            self.assertAlmostEqual(estimate, 100 + 197 / 3.0, delta=1)
+
+    def test_parse(self):
+        shard = Shard.parse('3/20')
+        self.assertEqual((shard.index, shard.total), (3, 20))
+        for text in ('0/2', '3/2', 'a/2', '2'):
+            with self.assertRaises(ValueError):
+                Shard.parse(text)
+
+    def test_run_shard(self):
+        # Given I have loaded the calculator steps
+        core = Core()
+        core.load_steps(['test_data.steps.calculator_steps'])
+
+        # When I run each of two shards
+        totals = [
+            core.run([CALCULATOR_FEATURE], common.BufferingLogger(),
+                     shard=Shard(index, 2))['scenarios']['total']
+            for index in (1, 2)
+        ]
+
+        # Then each scenario runs in one of them
+        self.assertEqual(sum(totals), 2)
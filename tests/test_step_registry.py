@@ -0,0 +1,124 @@
+from tests import common
+from unittest import TestCase
+import threading
+
+from romaine import exc
+from romaine.core import Core
+from romaine.registry import StepRegistry, active_registry, registering_into
+from romaine.steps import Given
+
+
+class TestStepRegistry(TestCase):
+
+    def test_steps_registered_into_loading_core(self):
+        # Given I have two Romaine cores
+        first = Core()
+        second = Core()
+        # When I load "test_data.steps.registry_steps" into the first core
+        module = first.load_steps(["test_data.steps.registry_steps"])[0]
+        # Then the first core has the steps
+        self.assertEqual(sorted(first.steps),
+                         ['a registry step', 'another registry step'])
+        self.assertEqual(first.steps['a registry step'].func,
+                         module.registry_step_1)
+        # And the most recently created core does not
+        self.assertFalse(second.steps)
+
+    def test_module_loaded_into_two_cores(self):
+        # Given I have loaded "test_data.steps.registry_steps" into a core
+        first = Core()
+        first.load_steps(["test_data.steps.registry_steps"])
+        # When I load it into another core
+        second = Core()
+        second.load_steps(["test_data.steps.registry_steps"])
+        # Then both cores have the steps
+        self.assertEqual(sorted(first.steps),
+                         ['a registry step', 'another registry step'])
+        self.assertEqual(sorted(second.steps), sorted(first.steps))
+
+    def test_registering_is_scoped_to_thread(self):
+        # Given I have a core registering steps on this thread
+        core = Core()
+        other_registry = StepRegistry()
+        results = []
+
+        def register_elsewhere():
+            with registering_into(other_registry):
+                Given('from a thread')(lambda: None)
+            results.append(active_registry())
+
+        with core.registering():
+            # When another thread registers into its own registry
+            thread = threading.Thread(target=register_elsewhere)
+            thread.start()
+            thread.join()
+            # Then this thread's registry is still active
+            self.assertIs(active_registry(), core.steps)
+
+        # And each registry only has its own steps
+        self.assertEqual(list(other_registry), ['from a thread'])
+        self.assertFalse(core.steps)
+        # And the other thread's registry was deactivated when it finished
+        self.assertEqual(results, [None])
+
+    def test_concurrent_registration(self):
+        # Given I have a registry
+        registry = StepRegistry()
+
+        def register_many(offset):
+            with registering_into(registry):
+                for number in range(100):
+                    Given('step {}'.format(offset + number))(lambda: None)
+
+        # When several threads register steps at the same time
+        threads = [
+            threading.Thread(target=register_many, args=(offset,))
+            for offset in range(0, 800, 100)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Then no registration is lost
+        self.assertEqual(len(registry), 800)
+
+    def test_frozen_registry_rejects_steps(self):
+        # Given I have a frozen registry with a step
+        registry = StepRegistry()
+        with registering_into(registry):
+            Given('before freezing')(lambda: None)
+        self.assertIs(registry.freeze(), registry)
+
+        # When I register another step
+        # Then I see a RegistryFrozenError
+        with registering_into(registry):
+            with self.assertRaises(exc.RegistryFrozenError):
+                Given('after freezing')(lambda: None)
+
+        # And the registry still has only the original step
+        self.assertEqual(list(registry), ['before freezing'])
+        self.assertTrue(registry.frozen)
+
+    def test_block_adds_steps_together(self):
+        # Given I have a registry
+        registry = StepRegistry()
+        snapshots = []
+        set_steps = registry._set_steps
+
+        def record(steps):
+            snapshots.append(len(steps))
+            set_steps(steps)
+
+        registry._set_steps = record
+
+        # When I register several steps in one block
+        with registering_into(registry):
+            for number in range(5):
+                Given('step {}'.format(number))(lambda: None)
+            # Then none are visible until the block ends
+            self.assertEqual(len(registry), 0)
+
+        # And they are added in one go
+        self.assertEqual(snapshots, [5])
+        self.assertEqual(len(registry), 5)
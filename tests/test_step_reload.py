@@ -0,0 +1,96 @@
+from tests import common
+from unittest import TestCase
+import os
+import shutil
+import sys
+import tempfile
+
+from romaine import exc
+from romaine.core import Core
+
+STEPS = """from romaine.steps import Given
+
+
+@Given('a reloaded step')
+def reloaded_step():
+    return 'old'
+
+
+@Given('a removed step')
+def removed_step():
+    pass
+"""
+
+CHANGED_STEPS = """from romaine.steps import Given
+
+
+@Given('a reloaded step')
+def reloaded_step():
+    return 'new'
+
+
+@Given('an added step with {number:int}')
+def added_step(number):
+    pass
+"""
+
+
+class TestStepReload(TestCase):
+    """
+        Test reloading step modules into a running core.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.module = os.path.join(self.root, 'reloaded_steps.py')
+        common.write_file(self.module, STEPS)
+        sys.path.insert(0, self.root)
+        self.addCleanup(sys.path.remove, self.root)
+        self.addCleanup(sys.modules.pop, 'reloaded_steps', None)
+
+        self.core = Core()
+        self.core.load_steps(
+            ['reloaded_steps', 'test_data.steps.calculator_steps'])
+
+    def test_reload(self):
+        # Given I have resolved a step
+        self.assertEqual(
+            self.core.steps.find('a reloaded step').func(), 'old')
+        self.assertIsNone(self.core.steps.find('an added step with 3'))
+
+        # When I change and reload its module
+        common.write_file(self.module, CHANGED_STEPS)
+        self.core.reload_steps(['reloaded_steps'])
+
+        # Then the step resolves to the new definition
+        self.assertEqual(
+            self.core.steps.find('a reloaded step').func(), 'new')
+        # And new steps are added
+        self.assertEqual(
+            self.core.steps.resolve('an added step with 3')[1], (3,))
+        # And removed steps are dropped
+        self.assertNotIn('a removed step', self.core.steps)
+        self.assertIsNone(self.core.steps.find('a removed step'))
+        # And steps from other modules are kept
+        self.assertIn('I press add', self.core.steps)
+
+    def test_failed_reload(self):
+        # When I reload a module that fails to import
+        common.write_file(self.module, STEPS + '\nraise ValueError\n')
+        with self.assertRaises(ValueError):
+            self.core.reload_steps(['reloaded_steps'])
+
+        # Then its old steps are kept
+        self.assertEqual(
+            self.core.steps.find('a reloaded step').func(), 'old')
+        self.assertIn('a removed step', self.core.steps)
+
+    def test_reload_frozen(self):
+        # Given the core's steps are frozen
+        self.core.steps.freeze()
+
+        # When I reload a module
+        # Then I am told the registry is frozen
+        with self.assertRaises(exc.RegistryFrozenError):
+            self.core.reload_steps(['reloaded_steps'])
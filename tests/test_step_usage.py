@@ -0,0 +1,143 @@
+from tests import common
+from unittest import TestCase
+import os
+import shutil
+import tempfile
+
+from romaine.core import Core
+from romaine.steps import When
+from romaine.usage import StepUsageIndex
+
+CALCULATOR_FEATURE = os.path.join(common.FEATURES_DIR, 'calculator.feature')
+
+MARKUP_FEATURE = """Feature: Markup
+  Scenario Outline: Bold
+    Given I have entered <number> into the <b>calculator</b>
+
+  Examples:
+| number |
+| 1      |
+"""
+
+
+class TestStepUsageIndex(TestCase):
+
+    def setUp(self):
+        # Given I have a core with the calculator steps
+        self.core = Core()
+        self.core.load_steps(['test_data.steps.calculator_steps'])
+        # And a usage index of the calculator feature
+        self.index = StepUsageIndex(self.core)
+        self.index.update(CALCULATOR_FEATURE)
+
+    def test_usages_of(self):
+        # When I get the usages of the number entering step
+        step = self.core.steps['I have entered {number:int} into the '
+                               'calculator']
+        usages = self.index.usages_of(step)
+
+        # Then I see each place it is used, with the text used there
+        self.assertEqual(
+            [(usage['scenario'], usage['line'], usage['text'], usage['runs'])
+             for usage in usages],
+            [
+                ('Add two numbers', 10,
+                 'I have entered 50 into the calculator', 1),
+                ('Add two numbers', 11,
+                 'I have entered 70 into the calculator', 1),
+                ('Subtract two numbers', 16,
+                 'I have entered 10 into the calculator', 1),
+                ('Subtract two numbers', 16,
+                 'I have entered 7 into the calculator', 1),
+                ('Subtract two numbers', 17,
+                 'I have entered 5 into the calculator', 1),
+                ('Subtract two numbers', 17,
+                 'I have entered 9 into the calculator', 1),
+            ]
+        )
+        self.assertEqual(set(usage['path'] for usage in usages),
+                         set([CALCULATOR_FEATURE]))
+
+    def test_markup_in_outline(self):
+        # Given an outline with markup that reads like a placeholder
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root)
+        markup = os.path.join(root, 'markup.feature')
+        common.write_file(markup, MARKUP_FEATURE)
+
+        # When I index it
+        self.index.update(markup)
+
+        # Then its step is used with the markup left as it is
+        self.assertIn(('I have entered 1 into the <b>calculator</b>', 1),
+                      self.index.undefined_steps())
+
+    def test_definition_of(self):
+        # When I get the definition of some step texts
+        # Then I see the step used for each
+        self.assertIs(self.index.definition_of('I press add'),
+                      self.core.steps['I press add'])
+        self.assertIsNone(self.index.definition_of('I press subtract'))
+
+    def test_reports(self):
+        # When I get the unused definitions
+        # Then I see the clear step
+        self.assertEqual(
+            [step.name for step in self.index.unused_definitions()],
+            ['I press clear'],
+        )
+
+        # And the steps running most are the background and number entry
+        self.assertEqual(
+            [(step.name, runs) for step, runs in self.index.hot_steps(2)],
+            [
+                ('I have entered {number:int} into the calculator', 6),
+                ('I have a calculator', 3),
+            ]
+        )
+
+        # And the undefined steps are listed by how often they're used
+        self.assertEqual(self.index.undefined_steps(),
+                         [('I press subtract', 1)])
+
+    def test_incremental_update(self):
+        # Given I have a second copy of the feature
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        copy = os.path.join(directory, 'copy.feature')
+        shutil.copy(CALCULATOR_FEATURE, copy)
+
+        # When I index the copy
+        self.index.update(copy)
+        # Then undefined step uses are counted across both
+        self.assertEqual(self.index.undefined_steps(),
+                         [('I press subtract', 2)])
+
+        # When I change the copy and index it again
+        with open(copy, 'a') as feature_file:
+            feature_file.write(
+                '\n  Scenario: Clear\n    When I press clear\n')
+        self.index.update(copy)
+        # Then the clear step is used
+        self.assertEqual(self.index.unused_definitions(), [])
+
+        # When I remove the copy
+        self.index.remove(copy)
+        # Then it no longer counts
+        self.assertEqual(self.index.undefined_steps(),
+                         [('I press subtract', 1)])
+        self.assertEqual(
+            [step.name for step in self.index.unused_definitions()],
+            ['I press clear'],
+        )
+
+    def test_relink(self):
+        # Given I define the subtract step after indexing
+        with self.core.registering():
+            When('I press subtract')(lambda: None)
+
+        # When I relink the index
+        self.index.relink()
+
+        # Then no steps are undefined
+        self.assertEqual(self.index.undefined_steps(), [])
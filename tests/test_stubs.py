@@ -0,0 +1,170 @@
+from tests import common
+from unittest import TestCase
+import os
+import shutil
+import sys
+import tempfile
+
+from romaine import stubs
+from romaine.core import Core
+
+CALCULATOR_FEATURE = os.path.join(common.FEATURES_DIR, 'calculator.feature')
+
+
+class TestStubGeneration(TestCase):
+
+    def test_slugify(self):
+        # When I slugify text with punctuation
+        # Then every character that is not alphanumeric is an underscore
+        self.assertEqual(stubs.slugify('Given "a" step, with-stuff!'),
+                         'given__a__step__with_stuff_')
+
+    def test_deduplicated_by_normalized_text(self):
+        # Given I have steps that only differ in surrounding space
+        steps = [
+            {'type': 'Given', 'text': 'a test step'},
+            {'type': 'Given', 'text': '  a test step '},
+            {'type': 'When', 'text': 'a test step'},
+        ]
+
+        # When I generate stubs
+        # Then I see one stub
+        self.assertEqual(stubs.generate_stubs(steps), [
+            "@Given('a test step')\n"
+            "def given_a_test_step():\n"
+            "    raise NotImplementedError"
+        ])
+
+    def test_inner_space_is_kept(self):
+        # Given I have steps that differ in the space between words
+        steps = [
+            {'type': 'Given', 'text': 'a test step'},
+            {'type': 'Given', 'text': 'a  test step'},
+        ]
+
+        # When I generate stubs
+        results = stubs.generate_stubs(steps)
+
+        # Then each has a stub, as each resolves separately
+        self.assertEqual(
+            [result.splitlines()[0] for result in results],
+            ["@Given('a test step')", "@Given('a  test step')"],
+        )
+
+    def test_braces_are_escaped(self):
+        # When I stub a step with braces
+        stub = stubs.step_to_stub({'type': 'Given', 'text': 'a {b} step'})
+
+        # Then they are matched literally
+        self.assertEqual(stub.splitlines()[0], "@Given('a {{b}} step')")
+
+    def test_name_collisions(self):
+        # Given I have steps whose slugs are the same
+        steps = [
+            {'type': 'Given', 'text': 'a-b'},
+            {'type': 'Given', 'text': 'a b'},
+            {'type': 'Given', 'text': 'a.b'},
+        ]
+
+        # When I generate stubs
+        results = stubs.generate_stubs(steps)
+
+        # Then each stub has its own name
+        self.assertEqual(
+            [result.splitlines()[1] for result in results],
+            ['def given_a_b():', 'def given_a_b_2():', 'def given_a_b_3():'],
+        )
+
+    def test_outline_placeholders(self):
+        # Given I have an outline step with placeholders and braces
+        steps = [{'type': 'Given', 'text': 'I add <First> to {<2nd>}'}]
+
+        # When I generate stubs
+        # Then the placeholders are arguments of the stub
+        self.assertEqual(stubs.generate_stubs(steps), [
+            "@Given('I add {first} to {{{2nd}}}')\n"
+            "def given_i_add_first_to__2nd_(first, _2nd):\n"
+            "    raise NotImplementedError"
+        ])
+
+    def test_repeated_outline_placeholder(self):
+        # Given I have an outline step using a placeholder twice
+        steps = [
+            {'type': 'When', 'text': 'I move from <place> back to <place>'},
+        ]
+
+        # When I generate stubs
+        stub, = stubs.generate_stubs(steps)
+
+        # Then each occurrence is an argument of the stub
+        self.assertEqual(stub, (
+            "@When('I move from {place} back to {place_2}')\n"
+            "def when_i_move_from_place_back_to_place(place, place_2):\n"
+            "    raise NotImplementedError"
+        ))
+        # And the stub can be called with what its pattern captures
+        core = Core()
+        with core.registering():
+            exec('from romaine.steps import When\n' + stub, {})
+        step, arguments = core.steps.resolve('I move from home back to home')
+        self.assertEqual(arguments, ('home', 'home'))
+        self.assertRaises(NotImplementedError, step.func, *arguments)
+
+    def test_write_stub_module(self):
+        # Given I have a core with the calculator steps but no subtract step
+        core = Core()
+        core.load_steps(['test_data.steps.calculator_steps'])
+        # And the calculator feature, twice
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        copy = os.path.join(directory, 'copy.feature')
+        shutil.copy(CALCULATOR_FEATURE, copy)
+        with open(copy, 'a') as feature_file:
+            feature_file.write(
+                '\n  Scenario: Multiply\n'
+                '    Given I have entered 2 into the calculator\n'
+                '    And I have entered 2.5 into the calculator\n'
+                '    When I press multiply\n'
+                '    And I press  subtract\n'
+            )
+        module_path = os.path.join(directory, 'stub_steps.py')
+
+        # When I write a stub module for the corpus
+        count = stubs.write_stub_module(
+            core, [CALCULATOR_FEATURE, copy], module_path)
+
+        # Then it has one stub for each distinct undefined step
+        self.assertEqual(count, 4)
+        with open(module_path) as module_file:
+            source = module_file.read()
+        self.assertEqual(source, (
+            "from romaine.steps import Given, When\n"
+            "\n\n"
+            "@When('I press subtract')\n"
+            "def when_i_press_subtract():\n"
+            "    raise NotImplementedError\n"
+            "\n\n"
+            "@Given('I have entered 2.5 into the calculator')\n"
+            "def given_i_have_entered_2_5_into_the_calculator():\n"
+            "    raise NotImplementedError\n"
+            "\n\n"
+            "@When('I press multiply')\n"
+            "def when_i_press_multiply():\n"
+            "    raise NotImplementedError\n"
+            "\n\n"
+            "@When('I press  subtract')\n"
+            "def when_i_press__subtract():\n"
+            "    raise NotImplementedError\n"
+        ))
+
+        # And the module can be loaded
+        compile(source, module_path, 'exec')
+
+        # And its stubs define every step
+        sys.path.insert(0, directory)
+        self.addCleanup(sys.path.remove, directory)
+        self.addCleanup(sys.modules.pop, 'stub_steps', None)
+        core.load_steps(['stub_steps'])
+        self.assertEqual(
+            stubs.undefined_steps(core.steps, [core.parse_feature(copy)]),
+            [])
@@ -0,0 +1,106 @@
+from tests import common
+from unittest import TestCase
+import functools
+import os
+import shutil
+import tempfile
+
+from romaine.core import Core
+from romaine.parallel import ThreadPoolRunner
+from romaine.sharding import shard_key
+from romaine.timings import DEFAULT_ESTIMATE, TimingHistory
+
+ORDER_FEATURE = """Feature: Order
+  Scenario: A
+    Given I am scenario A
+
+  Scenario: B
+    Given I am scenario B
+
+  Scenario: C
+    Given I am scenario C
+"""
+
+
+class TestTimingHistory(TestCase):
+    """
+        Test recording scenario durations and scheduling by them.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.history_path = os.path.join(self.root, 'cache', 'timings.json')
+        self.feature = os.path.join(self.root, 'order.feature')
+        common.write_file(self.feature, ORDER_FEATURE)
+        self.core = Core()
+        self.steps = self.core.load_steps(['test_data.steps.order_steps'])[0]
+
+    def test_estimates(self):
+        # Given I have no history
+        history = TimingHistory(self.history_path)
+        # Then scenarios get the default estimate
+        self.assertEqual(history.estimate('a::b'), DEFAULT_ESTIMATE)
+
+        # When I save some durations
+        history.durations = {'a::1': 1.0, 'a::2': 5.0, 'a::3': 2.0}
+        history.save()
+        history = TimingHistory(self.history_path)
+
+        # Then they are estimated from
+        self.assertEqual(history.estimate('a::2'), 5.0)
+        # And unknown scenarios get the median
+        self.assertEqual(history.estimate('a::4'), 2.0)
+
+    def test_run_records_durations(self):
+        # When I run a feature with a timing history
+        self.core.run([self.feature], common.BufferingLogger(),
+                      timings=TimingHistory(self.history_path))
+
+        # Then each scenario's duration is saved, by its shard key
+        durations = TimingHistory(self.history_path).durations
+        self.assertEqual(sorted(durations), [
+            shard_key(self.feature + '::A'),
+            shard_key(self.feature + '::B'),
+            shard_key(self.feature + '::C'),
+        ])
+
+    def test_history_of_other_paths(self):
+        # Given a history saved with a feature's absolute path
+        history = TimingHistory(self.history_path)
+        history.durations = {self.feature + '::A': 4.0}
+        history.save()
+
+        # When I load it
+        history = TimingHistory(self.history_path)
+
+        # Then the duration is estimated from for the relative path too
+        self.assertEqual(
+            history.estimate(os.path.relpath(self.feature) + '::A'), 4.0)
+
+    def test_longest_first(self):
+        # Given C took longest last time and B has no history
+        history = TimingHistory(self.history_path)
+        history.durations = {
+            shard_key(self.feature + '::A'): 1.0,
+            shard_key(self.feature + '::C'): 3.0,
+        }
+        history.default = 2.0
+
+        # When I run the feature in one thread
+        logger = common.BufferingLogger()
+        statistics = self.core.run(
+            [self.feature],
+            logger,
+            runner=functools.partial(ThreadPoolRunner, threads=1),
+            timings=history,
+        )
+
+        # Then the scenarios ran longest first
+        self.assertEqual(self.steps.ran, ['C', 'B', 'A'])
+        # And they are reported in their order in the feature
+        self.assertEqual(
+            [element['description'].strip()
+             for element in statistics['features']['run'][0]['elements']],
+            ['A', 'B', 'C'],
+        )
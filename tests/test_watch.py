@@ -0,0 +1,257 @@
+from tests import common
+from unittest import TestCase
+import os
+import shutil
+import sys
+import tempfile
+import logging
+import time
+
+try:
+    from unittest import mock
+except ImportError:
+    import mock
+
+from romaine.core import Core
+from romaine.watch import Watcher, watch
+
+FEATURE = """Feature: Watched
+  Background:
+    Given I have a calculator
+
+  Scenario: First
+    Given I have entered 1 into the calculator
+    When I press add
+    And I press multiply
+
+  Scenario: Second
+    When I press clear
+"""
+
+STEPS = """from romaine.steps import When
+
+
+@When('I press clear')
+def press_clear():
+    pass
+"""
+
+
+DEFINED_STEP = """
+
+@When('I press multiply')
+def press_multiply():
+    pass
+"""
+
+
+class TestWatcher(TestCase):
+    """
+        Test detection of changed features and step modules.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.feature = os.path.join(self.root, 'watched.feature')
+        common.write_file(self.feature, FEATURE)
+        self.module = os.path.join(self.root, 'watched_steps.py')
+        common.write_file(self.module, STEPS)
+        sys.path.insert(0, self.root)
+        self.addCleanup(sys.path.remove, self.root)
+        self.addCleanup(sys.modules.pop, 'watched_steps', None)
+
+        self.core = Core()
+        self.core.load_steps(['test_data.steps.calculator_steps'])
+        self.watcher = Watcher(self.core, [self.root], ['watched_steps'],
+                               use_inotify=False)
+        self.initial = self.watcher.start()
+
+    def test_start(self):
+        # When I start watching
+        # Then I see every scenario
+        self.assertEqual(self.initial, [
+            self.feature + '::First',
+            self.feature + '::Second',
+        ])
+        # And nothing has changed yet
+        self.assertIsNone(self.watcher.poll())
+
+    def test_changed_scenario(self):
+        # When I change one scenario
+        changed = FEATURE.replace('entered 1', 'entered 2')
+        common.write_file(self.feature, changed)
+        changes = self.watcher.poll()
+
+        # Then only that scenario is affected
+        self.assertEqual(changes['features'], [self.feature])
+        self.assertEqual(changes['scenarios'], [self.feature + '::First'])
+
+    def test_comment_change(self):
+        # When I only add a comment
+        common.write_file(self.feature, FEATURE + '  # A comment\n')
+        changes = self.watcher.poll()
+
+        # Then the feature changed but no scenario is affected
+        self.assertEqual(changes['features'], [self.feature])
+        self.assertEqual(changes['scenarios'], [])
+
+    def test_changed_background(self):
+        # When I change the background
+        changed = FEATURE.replace('a calculator', 'an abacus')
+        common.write_file(self.feature, changed)
+        changes = self.watcher.poll()
+
+        # Then every scenario in the feature is affected
+        self.assertEqual(len(changes['scenarios']), 2)
+
+    def test_unparseable_feature(self):
+        # When I save a feature half way through an edit
+        common.write_file(self.feature,
+                          FEATURE + 'Scenario Outline: Third\n|a|b\n')
+        changes = self.watcher.poll()
+
+        # Then it is reported as an error
+        self.assertEqual(changes['errors'], [self.feature])
+        self.assertEqual(changes['scenarios'], [])
+
+    def test_markup_in_outline(self):
+        # When I add an outline with markup that reads like a placeholder
+        markup = os.path.join(self.root, 'markup.feature')
+        common.write_file(
+            markup,
+            'Feature: Markup\n'
+            '  Scenario Outline: Bold\n'
+            '    Given I have entered <number> into the <b>calculator</b>\n'
+            '\n'
+            '  Examples:\n'
+            '| number |\n'
+            '| 1      |\n',
+        )
+        changes = self.watcher.poll()
+
+        # Then its scenario is affected, without an error
+        self.assertEqual(changes['scenarios'], [markup + '::Bold'])
+        self.assertEqual(changes['errors'], [])
+
+    def test_new_and_removed_features(self):
+        # When I add a feature
+        added = os.path.join(self.root, 'added.feature')
+        common.write_file(added, 'Feature: Added\n  Scenario: Third\n')
+        changes = self.watcher.poll()
+        # Then its scenarios are affected
+        self.assertEqual(changes['scenarios'], [added + '::Third'])
+
+        # When I remove it
+        os.remove(added)
+        changes = self.watcher.poll()
+        # Then it is reported as removed
+        self.assertEqual(changes['removed'], [added])
+        self.assertEqual(changes['scenarios'], [])
+
+    def test_unchanged_directories_not_listed(self):
+        # Given the watched directory hasn't changed for a while
+        past = time.time() - 60
+        os.utime(self.root, (past, past))
+        watcher = Watcher(self.core, [self.root], ['watched_steps'],
+                          use_inotify=False)
+        watcher.start()
+        manifest = watcher.finder_options['manifest']
+        scanned = manifest.stats['scanned']
+
+        # When I poll
+        # Then nothing has changed
+        self.assertIsNone(watcher.poll())
+        # And the directory isn't listed again
+        self.assertEqual(manifest.stats['scanned'], scanned)
+
+    def test_module_without_file(self):
+        # Given I watch a step module with no file
+        watcher = Watcher(self.core, [self.root], ['watched_steps', 'sys'],
+                          use_inotify=False)
+        watcher.start()
+
+        # When I change the other step module
+        common.write_file(self.module, STEPS + '\n# Changed\n')
+        changes = watcher.poll()
+
+        # Then its change is seen
+        self.assertEqual(changes['modules'], ['watched_steps'])
+
+    def test_changed_step_module(self):
+        # When I change a step module
+        common.write_file(self.module, STEPS + '\n# Changed\n')
+        changes = self.watcher.poll()
+
+        # Then the scenarios using its steps are affected
+        self.assertEqual(changes['modules'], ['watched_steps'])
+        self.assertEqual(changes['scenarios'], [self.feature + '::Second'])
+
+    def test_step_module_defines_step(self):
+        # When I define a step that was undefined in a step module
+        common.write_file(self.module, STEPS + DEFINED_STEP)
+        changes = self.watcher.poll()
+
+        # Then the scenario using it is affected, along with those using
+        # the module's other steps
+        self.assertEqual(changes['scenarios'], [
+            self.feature + '::First',
+            self.feature + '::Second',
+        ])
+        # And the new step is used
+        self.assertIs(self.watcher.usage.definition_of('I press multiply'),
+                      self.core.steps['I press multiply'])
+
+    def test_broken_step_module(self):
+        # When I save a step module that does not import
+        common.write_file(self.module, STEPS + 'def broken(:\n')
+        changes = self.watcher.poll()
+
+        # Then it is reported as an error
+        self.assertEqual(changes['errors'], ['watched_steps'])
+        # And its old steps are kept
+        self.assertIn('I press clear', self.core.steps)
+
+    def test_watch(self):
+        # Given I change a feature
+        changed = FEATURE.replace('entered 1', 'entered 2')
+        common.write_file(self.feature, changed)
+        self.watcher.interval = 0
+        seen = []
+
+        # When I watch for two cycles
+        self.watcher.watch(seen.append, cycles=2)
+
+        # Then I am called back once
+        self.assertEqual([changes['scenarios'] for changes in seen],
+                         [[self.feature + '::First']])
+
+
+class TestWatch(TestCase):
+    """
+        Test watching features and re-running them.
+    """
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root)
+        self.feature = os.path.join(self.root, 'watched.feature')
+        common.write_file(self.feature, FEATURE)
+
+    def test_logger(self):
+        # Given I have a logger
+        logger = common.BufferingLogger()
+        core = Core()
+
+        # When I watch a feature, and interrupt the watch
+        with mock.patch.object(Watcher, 'watch',
+                               side_effect=KeyboardInterrupt):
+            watch(core, [self.root], logger=logger,
+                  step_modules=['test_data.steps.calculator_steps'],
+                  use_inotify=False)
+
+        # Then its scenarios are run first, reporting to the logger
+        self.assertTrue(any(
+            'Given I have a calculator' in message
+            for message in logger.messages(logging.INFO)
+        ))